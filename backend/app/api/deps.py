@@ -1,12 +1,17 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError
 
 from app import crud, models
 from app.config.mysql_config import get_mysql_db as get_db
+from app.config.mysql_config import get_async_mysql_db as get_async_db
+from app.config.mysql_config import SessionLocal
 from app.utils import security
 from app.crud import crud_user
+from app.utils.principal import Principal, get_principal, get_principal_async
 
 bearer_scheme = HTTPBearer()
 
@@ -76,6 +81,30 @@ def get_current_user_obj(
     
     return user
 
+async def get_current_user_obj_async(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    """Async variant of get_current_user_obj for async def endpoints"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = security.decode_token(credentials.credentials)
+    if payload is None:
+        raise credentials_exception
+
+    user_uuid = payload.get("sub")
+    if user_uuid is None:
+        raise credentials_exception
+
+    user = await db.scalar(select(models.User).where(models.User.uuid == user_uuid))
+    if user is None:
+        raise credentials_exception
+
+    return user
+
 def get_current_manager_user_obj(
     current_user: models.User = Depends(get_current_user_obj)
 ) -> models.User:
@@ -86,3 +115,65 @@ def get_current_manager_user_obj(
             detail="Not enough permissions. Manager role required."
         )
     return current_user
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def get_current_principal(
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Dependency to get current user's id/uuid/username/role, served from the principal cache (usually no DB query)"""
+    principal = get_principal(db, current_user["uuid"])
+    if principal is None:
+        raise _credentials_exception()
+    return principal
+
+def get_stream_principal(
+    current_user: dict = Depends(get_current_user)
+) -> Principal:
+    """Variant of get_current_principal for long-lived responses (SSE).
+
+    Yield dependencies such as get_db are only closed after the response body finishes, so the
+    lookup uses its own session that is closed before the stream starts instead of holding a
+    pooled connection for the lifetime of the stream.
+    """
+    db = SessionLocal()
+    try:
+        principal = get_principal(db, current_user["uuid"])
+    finally:
+        db.close()
+    if principal is None:
+        raise _credentials_exception()
+    return principal
+
+async def get_current_principal_async(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Async variant of get_current_principal for async def endpoints"""
+    principal = await get_principal_async(db, current_user["uuid"])
+    if principal is None:
+        raise _credentials_exception()
+    return principal
+
+def get_current_manager_principal(
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
+    """Dependency to ensure current user is a manager (returns Principal)"""
+    if current_user.role != "manager":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions. Manager role required."
+        )
+    return current_user
+
+def get_current_user_id(
+    current_user: Principal = Depends(get_current_principal)
+) -> int:
+    """Dependency to get current user's id only"""
+    return current_user.id
@@ -12,6 +12,8 @@ from app.schemas.announcement import (
     AnnouncementResponse,
     AnnouncementStatusUpdate,
 )
+from app.utils.cache import cached
+from app.utils.pagination import InvalidCursor
 from app.utils.response import Success, NotFound, BadRequest
 
 router = APIRouter()
@@ -63,6 +65,7 @@ def read_announcements_admin(
     current_user: User = Depends(deps.get_current_manager_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     status: Optional[str] = Query(None, description="状态过滤：draft, published"),
     start_time: Optional[datetime] = Query(None),
@@ -71,6 +74,21 @@ def read_announcements_admin(
     """
     Retrieve announcements with pagination and filtering (Admin only).
     """
+    if cursor is not None:
+        try:
+            next_cursor, announcements = crud_announcement.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                status=status,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [AnnouncementResponse.from_orm(a).model_dump() for a in announcements]})
+
     total, announcements = crud_announcement.get_multi(
         db,
         skip=skip,
@@ -83,10 +101,12 @@ def read_announcements_admin(
     return Success(data={"total": total, "items": [AnnouncementResponse.from_orm(a).model_dump() for a in announcements]})
 
 @router.get("/")
+@cached("announcement:published", ttl=60, tags=("announcement",))
 def read_announcements(
     db: Session = Depends(deps.get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     start_time: Optional[datetime] = Query(None),
     end_time: Optional[datetime] = Query(None),
@@ -94,6 +114,20 @@ def read_announcements(
     """
     Retrieve published announcements with pagination and filtering.
     """
+    if cursor is not None:
+        try:
+            next_cursor, announcements = crud_announcement.get_published_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [AnnouncementResponse.from_orm(a).model_dump() for a in announcements]})
+
     total, announcements = crud_announcement.get_published(
         db,
         skip=skip,
@@ -6,6 +6,7 @@ from redis import Redis
 from app import models, schemas
 from app.api import deps
 from app.services import auth_service
+from app.utils import principal
 from app.utils.response import Success, BadRequest, NotFound, Created, Unauthorized
 from app.api import deps
 from app.config.redis_config import get_redis_client
@@ -57,14 +58,14 @@ def register_user(
     return Created(data=user_data)
 
 @router.post("/login")
-def login_for_access_token(
+async def login_for_access_token(
     request: schemas.UserLogin,
     db: Session = Depends(deps.get_db)
 ):
     """
     Login to get access and refresh tokens (for regular clients with JSON body).
     """
-    user = auth_service.authenticate_user(db, identifier=request.identifier, password=request.password)
+    user = await auth_service.authenticate_user(db, identifier=request.identifier, password=request.password)
     if not user:
         return Unauthorized(message="Incorrect username or password")
     
@@ -72,14 +73,14 @@ def login_for_access_token(
     return Success(data=tokens.dict())
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_swagger(
+async def login_for_swagger(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(deps.get_db)
 ):
     """
     Login for Swagger UI authorization (form data).
     """
-    user = auth_service.authenticate_user(db, identifier=form_data.username, password=form_data.password)
+    user = await auth_service.authenticate_user(db, identifier=form_data.username, password=form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -173,6 +174,7 @@ def update_user_profile(
     
     db.add(current_user)
     db.commit()
+    principal.invalidate(current_user.uuid)
     db.refresh(current_user)
     
     user_data = schemas.UserResponse.from_orm(current_user).dict()
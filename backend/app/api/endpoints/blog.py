@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.crud.crud_blog import crud_blog, crud_blog_tag
-from app.models.user import User
+from app.utils.principal import Principal
 from app.schemas.blog import (
     Blog,
     BlogCreate,
@@ -18,7 +18,10 @@ from app.schemas.blog import (
     BlogTagCreate,
     BlogTagUpdate
 )
+from app.utils.cache import cached
+from app.utils.pagination import InvalidCursor
 from app.utils.response import success_response, error_response
+from app.utils import view_counter
 import math
 
 router = APIRouter()
@@ -38,6 +41,7 @@ def get_blog_tags(
 
 
 @router.get("/tags/popular", response_model=List[BlogTag])
+@cached("blog_tag:popular", ttl=300, tags=("blog", "blog_tag"))
 def get_popular_tags(
     *,
     db: Session = Depends(deps.get_db),
@@ -53,7 +57,7 @@ def create_blog_tag(
     *,
     db: Session = Depends(deps.get_db),
     tag_in: BlogTagCreate,
-    current_user: User = Depends(deps.get_current_user_obj)
+    current_user: Principal = Depends(deps.get_current_principal)
 ) -> Any:
     """创建Blog标签 (需要管理员权限)"""
     if current_user.role != "manager":
@@ -142,13 +146,22 @@ def search_blogs(
 
 
 @router.get("/", response_model=List[BlogSummary])
+@cached("blog:list", ttl=60, tags=("blog", "blog_tag"))
 def get_blogs(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
-    limit: int = Query(default=10, le=50)
+    limit: int = Query(default=10, le=50),
+    cursor: Optional[str] = Query(default=None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor")
 ) -> Any:
     """获取Blog列表（仅已发布）"""
-    blogs = crud_blog.get_published(db, skip=skip, limit=limit)
+    next_cursor = None
+    if cursor is not None:
+        try:
+            next_cursor, blogs = crud_blog.get_published_by_cursor(db, cursor=cursor, limit=limit)
+        except InvalidCursor:
+            return error_response(message="Invalid cursor")
+    else:
+        blogs = crud_blog.get_published(db, skip=skip, limit=limit)
     
     # 转换为摘要格式
     blog_summaries = []
@@ -181,6 +194,8 @@ def get_blogs(
         )
         blog_summaries.append(summary)
     
+    if cursor is not None:
+        return success_response(data={"next_cursor": next_cursor, "items": blog_summaries})
     return success_response(data=blog_summaries)
 
 
@@ -189,7 +204,7 @@ def create_blog(
     *,
     db: Session = Depends(deps.get_db),
     blog_in: BlogCreate,
-    current_user: User = Depends(deps.get_current_user_obj)
+    current_user: Principal = Depends(deps.get_current_principal)
 ) -> Any:
     """创建Blog文章 (需要管理员权限)"""
     if current_user.role != "manager":
@@ -209,7 +224,7 @@ def get_blog(
     *,
     db: Session = Depends(deps.get_db),
     blog_uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj)
+    current_user: Principal = Depends(deps.get_current_principal)
 ) -> Any:
     """根据UUID获取Blog详情"""
     blog = crud_blog.get_by_uuid(db, uuid=blog_uuid)
@@ -220,6 +235,7 @@ def get_blog(
     if blog.status != "published" and current_user.role != "manager" and blog.author_id != current_user.id:
         raise HTTPException(status_code=404, detail="Blog不存在")
     
+    view_counter.merge_pending("blog", [blog])
     return success_response(data=blog)
 
 
@@ -229,7 +245,7 @@ def update_blog(
     db: Session = Depends(deps.get_db),
     blog_uuid: str,
     blog_in: BlogUpdate,
-    current_user: User = Depends(deps.get_current_user_obj)
+    current_user: Principal = Depends(deps.get_current_principal)
 ) -> Any:
     """更新Blog文章 (需要管理员权限或作者本人)"""
     blog = crud_blog.get_by_uuid(db, uuid=blog_uuid)
@@ -252,7 +268,7 @@ def delete_blog(
     *,
     db: Session = Depends(deps.get_db),
     blog_uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj)
+    current_user: Principal = Depends(deps.get_current_principal)
 ) -> Any:
     """删除Blog文章 (需要管理员权限或作者本人)"""
     blog = crud_blog.get_by_uuid(db, uuid=blog_uuid)
@@ -285,7 +301,7 @@ def update_blog_view(
     if blog.status != "published":
         raise HTTPException(status_code=404, detail="Blog不存在")
     
-    blog = crud_blog.increment_view_count(db=db, blog_id=blog.id, increment=view_update.increment)
+    view_counter.record_view(db, "blog", blog, increment=view_update.increment)
     return success_response(data=blog)
 
 
@@ -338,7 +354,7 @@ def get_blogs_by_author(
 def admin_search_blogs(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
     keyword: str = Query(None, description="搜索关键词"),
     tag_ids: List[int] = Query([], description="标签ID列表"),
     author_id: int = Query(None, description="作者ID"),
@@ -14,7 +14,9 @@ from app.schemas.course_resource import (
     CourseResourceDetailResponse,
     CourseResourceStatusUpdate,
 )
+from app.utils.pagination import InvalidCursor
 from app.utils.response import Success, NotFound, BadRequest
+from app.utils import view_counter
 
 router = APIRouter()
 
@@ -49,6 +51,7 @@ def read_course_resources(
     current_user: dict = Depends(deps.get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     resource_type: Optional[str] = Query(None),
     start_time: Optional[datetime] = Query(None),
@@ -58,6 +61,21 @@ def read_course_resources(
     Retrieve published course resources with pagination and filtering.
     普通用户只能查看已发布的课程资源。
     """
+    if cursor is not None:
+        try:
+            next_cursor, resources = crud_course_resource.get_published_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                resource_type=resource_type,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [CourseResourceResponse.from_orm(r).model_dump() for r in resources]})
+
     total, resources = crud_course_resource.get_published(
         db,
         skip=skip,
@@ -103,6 +121,7 @@ def read_course_resources_admin(
     current_user: dict = Depends(deps.get_current_manager_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     resource_type: Optional[str] = Query(None),
     status: Optional[str] = Query(None, description="状态过滤：draft, published"),
@@ -113,6 +132,22 @@ def read_course_resources_admin(
     Retrieve course resources with pagination and filtering (Admin only).
     管理员可以查看所有状态的课程资源。
     """
+    if cursor is not None:
+        try:
+            next_cursor, resources = crud_course_resource.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                resource_type=resource_type,
+                status=status,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [CourseResourceResponse.from_orm(r).model_dump() for r in resources]})
+
     total, resources = crud_course_resource.get_multi(
         db,
         skip=skip,
@@ -140,6 +175,7 @@ def read_course_resource(
     resource = crud_course_resource.get_course_resource_by_uuid_published(db=db, uuid=uuid)
     if not resource:
         return NotFound(message="Course resource not found or not published")
+    view_counter.merge_pending("course_resource", [resource])
     return Success(data=CourseResourceResponse.from_orm(resource).model_dump())
 
 
@@ -271,9 +307,7 @@ def increment_view_count(
     if not resource:
         return NotFound(message="Course resource not found")
     
-    # 增加播放次数
-    resource.download_count += 1
-    db.commit()
-    db.refresh(resource)
+    # 增加播放次数（先记入Redis，定时批量写回）
+    view_counter.record_view(db, "course_resource", resource)
     
     return Success(data={"download_count": resource.download_count, "message": "View count updated"})
@@ -11,6 +11,8 @@ from app.schemas.forum_category import (
     ForumCategoryResponse,
     PaginatedForumCategoryResponse
 )
+from app.utils.cache import cached
+from app.utils.pagination import InvalidCursor
 from app.utils.response import Success, NotFound, BadRequest
 
 router = APIRouter()
@@ -20,16 +22,32 @@ admin_router = APIRouter()
 
 
 @router.get("/", response_model=PaginatedForumCategoryResponse)
+@cached("forum_category:list", ttl=300, tags=("forum_category",))
 def read_forum_categories(
     db: Session = Depends(deps.get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
 ):
     """
     获取论坛分类列表
     """
+    if cursor is not None:
+        try:
+            next_cursor, categories = crud_forum_category.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                is_active=is_active,
+                include_inactive=is_active is None
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ForumCategoryResponse.from_orm(c).model_dump() for c in categories]})
+
     total, categories = crud_forum_category.get_multi(
         db,
         skip=skip,
@@ -42,6 +60,7 @@ def read_forum_categories(
 
 
 @router.get("/active")
+@cached("forum_category:active", ttl=300, tags=("forum_category",))
 def read_active_categories(db: Session = Depends(deps.get_db)):
     """
     获取所有激活的分类
@@ -90,12 +109,27 @@ def read_forum_categories_admin(
     current_user: User = Depends(deps.get_current_manager_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     is_active: Optional[bool] = Query(None),
 ):
     """
     获取论坛分类列表 (管理员)
     """
+    if cursor is not None:
+        try:
+            next_cursor, categories = crud_forum_category.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                is_active=is_active,
+                include_inactive=True  # 管理员可以看到所有分类
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ForumCategoryResponse.from_orm(c).model_dump() for c in categories]})
+
     total, categories = crud_forum_category.get_multi(
         db,
         skip=skip,
@@ -107,6 +141,31 @@ def read_forum_categories_admin(
     return Success(data={"total": total, "items": [ForumCategoryResponse.from_orm(c).model_dump() for c in categories]})
 
 
+@admin_router.get("/post-count-drift")
+def read_post_count_drift(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_manager_user),
+):
+    """
+    帖子数与实际不一致的分类 (管理员)
+    """
+    items = crud_forum_category.get_post_count_drift(db)
+    return Success(data={"total": len(items), "items": items})
+
+
+@admin_router.post("/post-count-drift/reconcile")
+def reconcile_post_count_drift(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_manager_user),
+):
+    """
+    立即按实际帖子数纠正分类计数 (管理员)
+    """
+    # 不经过定时任务的锁：抢不到锁时会返回0，但漂移并未纠正
+    corrected = crud_forum_category.fix_post_counts(db)
+    return Success(data={"corrected": corrected})
+
+
 @admin_router.get("/{uuid}")
 def read_forum_category_admin(
     *,
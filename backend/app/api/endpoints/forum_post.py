@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
 
 from app.api import deps
 from app.crud import crud_forum_post, crud_forum_category
 from app.models import User
+from app.utils.principal import Principal
 from app.schemas.forum_post import (
     ForumPostCreate,
     ForumPostUpdate,
@@ -13,7 +15,11 @@ from app.schemas.forum_post import (
     ForumPostListResponse,
     PaginatedForumPostResponse
 )
+from app.utils.cache import cached
+from app.utils.pagination import InvalidCursor, TotalMode
 from app.utils.response import Success, NotFound, BadRequest, Forbidden
+from app.services import hot_ranking
+from app.utils import view_counter
 
 router = APIRouter()
 
@@ -22,14 +28,16 @@ admin_router = APIRouter()
 
 
 @router.get("/", response_model=PaginatedForumPostResponse)
-def read_forum_posts(
-    db: Session = Depends(deps.get_db),
+async def read_forum_posts(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     category_id: Optional[str] = Query(None),  # 改为字符串类型接受UUID
     title: Optional[str] = Query(None),
     start_time: Optional[datetime] = Query(None),
     end_time: Optional[datetime] = Query(None),
+    total_mode: TotalMode = Query(TotalMode.exact, description="总数计算方式：exact精确（短时缓存）、estimated估算、none不计算"),
 ):
     """
     获取论坛帖子列表
@@ -37,33 +45,58 @@ def read_forum_posts(
     # 如果提供了category_id（UUID），转换为数据库ID
     db_category_id = None
     if category_id:
-        category = crud_forum_category.get_forum_category_by_uuid(db=db, uuid=category_id)
+        category = await crud_forum_category.get_forum_category_by_uuid_async(db=db, uuid=category_id)
         if not category:
             return BadRequest(message="Invalid category")
         db_category_id = category.id
     
-    total, posts = crud_forum_post.get_multi(
+    if cursor is not None:
+        try:
+            next_cursor, posts = await crud_forum_post.get_multi_by_cursor_async(
+                db,
+                cursor=cursor,
+                limit=limit,
+                category_id=db_category_id,
+                title=title,
+                start_time=start_time,
+                end_time=end_time
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ForumPostListResponse.from_orm(p).model_dump() for p in posts]})
+
+    total, has_more, posts = await crud_forum_post.get_multi_async(
         db,
         skip=skip,
         limit=limit,
         category_id=db_category_id,
         title=title,
         start_time=start_time,
-        end_time=end_time
+        end_time=end_time,
+        total_mode=total_mode
     )
-    return Success(data={"total": total, "items": [ForumPostListResponse.from_orm(p).model_dump() for p in posts]})
+    return Success(data={"total": total, "has_more": has_more, "items": [ForumPostListResponse.from_orm(p).model_dump() for p in posts]})
 
 
 @router.get("/hot")
+@cached("forum_post:hot", ttl=60, tags=("forum_post", "forum_category"))
 def read_hot_posts(
     db: Session = Depends(deps.get_db),
     limit: int = Query(10, ge=1, le=50),
     days: int = Query(7, ge=1, le=30),
+    category_id: Optional[str] = Query(None, description="分类UUID，不传则为全站热门"),
 ):
     """
-    获取热门帖子
+    获取热门帖子（热度随时间衰减，回复和浏览会提升热度）
     """
-    posts = crud_forum_post.get_hot_posts(db, limit=limit, days=days)
+    db_category_id = None
+    if category_id:
+        category = crud_forum_category.get_forum_category_by_uuid(db=db, uuid=category_id)
+        if not category:
+            return BadRequest(message="Invalid category")
+        db_category_id = category.id
+    
+    posts = crud_forum_post.get_hot_posts(db, limit=limit, days=days, category_id=db_category_id)
     return Success(data=[ForumPostListResponse.from_orm(p).model_dump() for p in posts])
 
 
@@ -80,8 +113,9 @@ def read_forum_post(
     if not post:
         return NotFound(message="Forum post not found")
     
-    # 增加浏览数
-    crud_forum_post.increment_view_count(db=db, db_obj=post)
+    # 增加浏览数（先记入Redis，定时批量写回）
+    view_counter.record_view(db, "forum_post", post)
+    hot_ranking.record_view(post)
     
     return Success(data=ForumPostResponse.from_orm(post).model_dump())
 
@@ -91,7 +125,7 @@ def create_forum_post(
     *,
     db: Session = Depends(deps.get_db),
     post_in: ForumPostCreate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     创建论坛帖子
@@ -116,7 +150,7 @@ def update_forum_post(
     db: Session = Depends(deps.get_db),
     uuid: str,
     post_in: ForumPostUpdate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     更新论坛帖子
@@ -148,7 +182,7 @@ def delete_forum_post(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     删除论坛帖子
@@ -172,6 +206,7 @@ def read_forum_posts_admin(
     current_user: User = Depends(deps.get_current_manager_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     category_id: Optional[int] = Query(None),
     user_id: Optional[int] = Query(None),
     title: Optional[str] = Query(None),
@@ -179,11 +214,30 @@ def read_forum_posts_admin(
     is_locked: Optional[bool] = Query(None),
     start_time: Optional[datetime] = Query(None),
     end_time: Optional[datetime] = Query(None),
+    total_mode: TotalMode = Query(TotalMode.exact, description="总数计算方式：exact精确（短时缓存）、estimated估算、none不计算"),
 ):
     """
     获取论坛帖子列表 (管理员)
     """
-    total, posts = crud_forum_post.get_multi(
+    if cursor is not None:
+        try:
+            next_cursor, posts = crud_forum_post.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                category_id=category_id,
+                user_id=user_id,
+                title=title,
+                is_pinned=is_pinned,
+                is_locked=is_locked,
+                start_time=start_time,
+                end_time=end_time
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ForumPostListResponse.from_orm(p).model_dump() for p in posts]})
+
+    total, has_more, posts = crud_forum_post.get_multi(
         db,
         skip=skip,
         limit=limit,
@@ -193,9 +247,10 @@ def read_forum_posts_admin(
         is_pinned=is_pinned,
         is_locked=is_locked,
         start_time=start_time,
-        end_time=end_time
+        end_time=end_time,
+        total_mode=total_mode
     )
-    return Success(data={"total": total, "items": [ForumPostListResponse.from_orm(p).model_dump() for p in posts]})
+    return Success(data={"total": total, "has_more": has_more, "items": [ForumPostListResponse.from_orm(p).model_dump() for p in posts]})
 
 
 @admin_router.post("/{uuid}/pin")
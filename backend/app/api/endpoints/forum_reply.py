@@ -5,13 +5,15 @@ from typing import Optional
 from app.api import deps
 from app.crud import crud_forum_reply, crud_forum_post
 from app.models import User
+from app.utils.principal import Principal
 from app.schemas.forum_reply import (
     ForumReplyCreate,
     ForumReplyUpdate,
     ForumReplyResponse,
-    ForumReplyWithChildren,
     PaginatedForumReplyResponse
 )
+from app.services import hot_ranking
+from app.utils.pagination import InvalidCursor
 from app.utils.response import Success, NotFound, BadRequest, Forbidden
 
 router = APIRouter()
@@ -27,6 +29,7 @@ def read_post_replies(
     post_uuid: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     parent_id: Optional[int] = Query(None),
 ):
     """
@@ -37,6 +40,19 @@ def read_post_replies(
     if not post:
         return NotFound(message="Forum post not found")
     
+    if cursor is not None:
+        try:
+            next_cursor, replies = crud_forum_reply.get_replies_by_post_by_cursor(
+                db,
+                post_id=post.id,
+                cursor=cursor,
+                limit=limit,
+                parent_id=parent_id
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ForumReplyResponse.from_orm(r).model_dump() for r in replies]})
+
     total, replies = crud_forum_reply.get_replies_by_post(
         db,
         post_id=post.id,
@@ -61,16 +77,61 @@ def read_post_replies_tree(
     if not post:
         return NotFound(message="Forum post not found")
     
-    replies = crud_forum_reply.get_replies_tree(db, post_id=post.id)
+    # 单次查询取出全部回复并按路径组装，不经过ORM对象
+    return Success(data=crud_forum_reply.get_replies_tree(db, post_id=post.id))
+
+
+@router.get("/post/{post_uuid}/thread")
+def read_post_thread(
+    *,
+    db: Session = Depends(deps.get_db),
+    post_uuid: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    children: int = Query(3, ge=0, le=20, description="每个顶级回复附带的子回复条数"),
+):
+    """
+    获取帖子的楼层页：一页顶级回复，每个附带前若干条子回复及子回复总数
+    """
+    post = crud_forum_post.get_forum_post_by_uuid(db=db, uuid=post_uuid)
+    if not post:
+        return NotFound(message="Forum post not found")
     
-    def build_reply_tree(reply):
-        """递归构建回复树"""
-        result = ForumReplyWithChildren.from_orm(reply).model_dump()
-        if hasattr(reply, 'children'):
-            result['children'] = [build_reply_tree(child) for child in reply.children]
-        return result
+    threads = crud_forum_reply.get_thread_page(
+        db,
+        post_id=post.id,
+        skip=skip,
+        limit=limit,
+        children_limit=children
+    )
+    return Success(data={"items": threads})
+
+
+@router.get("/thread/{root_uuid}/children")
+def read_thread_children(
+    *,
+    db: Session = Depends(deps.get_db),
+    root_uuid: str,
+    cursor: Optional[str] = Query("", description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    获取顶级回复下的全部子回复（楼中楼），按树的先序排列
+    """
+    root = crud_forum_reply.get_forum_reply_by_uuid(db=db, uuid=root_uuid)
+    if not root or root.parent_id is not None:
+        return NotFound(message="Forum reply not found")
     
-    return Success(data=[build_reply_tree(reply) for reply in replies])
+    try:
+        next_cursor, replies = crud_forum_reply.get_thread_children(
+            db,
+            root_id=root.id,
+            cursor=cursor,
+            limit=limit
+        )
+    except InvalidCursor:
+        return BadRequest(message="Invalid cursor")
+    return Success(data={"next_cursor": next_cursor, "items": [ForumReplyResponse.from_orm(r).model_dump() for r in replies]})
 
 
 @router.get("/{uuid}")
@@ -93,7 +154,7 @@ def create_forum_reply(
     *,
     db: Session = Depends(deps.get_db),
     reply_in: ForumReplyCreate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     创建论坛回复
@@ -107,16 +168,22 @@ def create_forum_reply(
         return Forbidden(message="Post is locked, cannot reply")
     
     # 如果是回复其他回复，验证父回复是否存在
+    parent_reply = None
     if reply_in.parent_id:
         parent_reply = crud_forum_reply.get_forum_reply_by_id(db=db, reply_id=reply_in.parent_id)
         if not parent_reply or parent_reply.post_id != reply_in.post_id:
             return BadRequest(message="Invalid parent reply")
+        if parent_reply.depth >= crud_forum_reply.MAX_REPLY_DEPTH:
+            return BadRequest(message="Reply nesting is too deep")
         
         # 如果指定了回复对象，设置 reply_to_user_id
         if not reply_in.reply_to_user_id:
             reply_in.reply_to_user_id = parent_reply.user_id
     
-    reply = crud_forum_reply.create_forum_reply(db=db, reply_in=reply_in, user_id=current_user.id)
+    reply = crud_forum_reply.create_forum_reply(
+        db=db, reply_in=reply_in, user_id=current_user.id, parent=parent_reply
+    )
+    hot_ranking.record_reply(post)
     return Success(data=ForumReplyResponse.from_orm(reply).model_dump())
 
 
@@ -126,7 +193,7 @@ def update_forum_reply(
     db: Session = Depends(deps.get_db),
     uuid: str,
     reply_in: ForumReplyUpdate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     更新论坛回复
@@ -153,7 +220,7 @@ def delete_forum_reply(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     删除论坛回复
@@ -177,10 +244,23 @@ def read_user_replies(
     user_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
 ):
     """
     获取用户的回复列表
     """
+    if cursor is not None:
+        try:
+            next_cursor, replies = crud_forum_reply.get_user_replies_by_cursor(
+                db,
+                user_id=user_id,
+                cursor=cursor,
+                limit=limit
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ForumReplyResponse.from_orm(r).model_dump() for r in replies]})
+
     total, replies = crud_forum_reply.get_user_replies(
         db,
         user_id=user_id,
@@ -6,6 +6,7 @@ from datetime import datetime
 from app.api import deps
 from app.crud import crud_homework
 from app.models import User
+from app.utils.principal import Principal
 from app.schemas.homework import (
     HomeworkCreate,
     HomeworkUpdate,
@@ -13,6 +14,7 @@ from app.schemas.homework import (
     HomeworkDetailResponse,
     HomeworkStatusUpdate,
 )
+from app.utils.pagination import InvalidCursor
 from app.utils.response import Success, NotFound, BadRequest
 
 router = APIRouter()
@@ -27,7 +29,7 @@ def create_homework_admin(
     *,
     db: Session = Depends(deps.get_db),
     homework_in: HomeworkCreate,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Create new homework (Admin only).
@@ -67,9 +69,10 @@ def create_homework(
 @admin_router.get("/")
 def read_homeworks_admin(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     start_time: Optional[datetime] = Query(None),
     end_time: Optional[datetime] = Query(None),
@@ -79,6 +82,21 @@ def read_homeworks_admin(
     Retrieve homeworks with pagination and filtering (Admin only).
     管理员可以查看所有状态的作业，也可以按状态过滤。
     """
+    if cursor is not None:
+        try:
+            next_cursor, homeworks = crud_homework.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                start_time=start_time,
+                end_time=end_time,
+                status=status,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [HomeworkResponse.from_orm(h).model_dump() for h in homeworks]})
+
     total, homeworks = crud_homework.get_multi(
         db,
         skip=skip,
@@ -96,6 +114,7 @@ def read_homeworks(
     current_user: dict = Depends(deps.get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     start_time: Optional[datetime] = Query(None),
     end_time: Optional[datetime] = Query(None),
@@ -104,6 +123,21 @@ def read_homeworks(
     Retrieve published homeworks with pagination and filtering.
     普通用户只能查看已发布的作业。
     """
+    if cursor is not None:
+        try:
+            next_cursor, homeworks = crud_homework.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                start_time=start_time,
+                end_time=end_time,
+                status="published"  # 普通用户只能查看已发布的作业
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [HomeworkResponse.from_orm(h).model_dump() for h in homeworks]})
+
     total, homeworks = crud_homework.get_multi(
         db,
         skip=skip,
@@ -122,7 +156,7 @@ def read_homework_admin(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Get homework by UUID (Admin only).
@@ -160,7 +194,7 @@ def update_homework_admin(
     db: Session = Depends(deps.get_db),
     uuid: str,
     homework_in: HomeworkUpdate,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Update a homework (Admin only).
@@ -194,7 +228,7 @@ def delete_homework_admin(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Delete a homework (Admin only).
@@ -256,7 +290,7 @@ def update_homework_status_admin(
     db: Session = Depends(deps.get_db),
     uuid: str,
     status_update: HomeworkStatusUpdate,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Update homework status (Admin only).
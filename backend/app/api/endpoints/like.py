@@ -6,17 +6,15 @@ from app.crud import crud_showcase, crud_showcase_comment
 from app.crud.crud_like import crud_showcase_like, crud_showcase_comment_like, crud_showcase_comment_reply_like
 from app.crud.crud_showcase_comment_reply import crud_showcase_comment_reply
 from app.crud.crud_notification import crud_notification
-from app.models import User
+from app.utils.principal import Principal
 from app.schemas.notification import NotificationCreate
 from app.schemas.like import (
     ShowcaseLikeCreate,
     ShowcaseCommentLikeCreate,
     ShowcaseCommentReplyLikeCreate,
-    ShowcaseLikeResponse,
-    ShowcaseCommentLikeResponse,
-    ShowcaseCommentReplyLikeResponse
+    LikeStatusBatchRequest
 )
-from app.utils.response import Success, NotFound, BadRequest
+from app.utils.response import Success, NotFound
 
 router = APIRouter()
 
@@ -27,7 +25,7 @@ def toggle_showcase_like(
     *,
     db: Session = Depends(deps.get_db),
     like_in: ShowcaseLikeCreate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     切换作品点赞状态
@@ -37,40 +35,26 @@ def toggle_showcase_like(
     if not showcase:
         return NotFound(message="Showcase not found")
     
-    # 检查是否已点赞
-    existing_like = crud_showcase_like.get_showcase_like(
-        db=db, user_id=current_user.id, showcase_id=showcase.id
-    )
+    # 原子切换点赞状态
+    liked, likes_count = crud_showcase_like.toggle(db=db, target_id=showcase.id, user_id=current_user.id)
     
-    if existing_like:
-        # 取消点赞
-        success = crud_showcase_like.remove_showcase_like(
-            db=db, user_id=current_user.id, showcase_id=showcase.id
-        )
-        return Success(data={"liked": False, "message": "Like removed"})
+    if not liked:
+        return Success(data={"liked": False, "likes_count": likes_count, "message": "Like removed"})
     else:
-        # 添加点赞
-        try:
-            like = crud_showcase_like.create_showcase_like(
-                db=db, like_in=like_in, user_id=current_user.id, showcase_id=showcase.id
+        # 如果点赞者不是作品作者，则创建点赞通知给作品作者
+        if current_user.id != showcase.author_id:
+            notification_in = NotificationCreate(
+                recipient_id=showcase.author_id,
+                sender_id=current_user.id,
+                type="like_showcase",
+                title=f"{current_user.username} 赞了您的作品",
+                content=f"在作品《{showcase.name}》中获得了一个赞",
+                related_id=showcase.id,
+                related_uuid=showcase.uuid
             )
-            
-            # 如果点赞者不是作品作者，则创建点赞通知给作品作者
-            if current_user.id != showcase.author_id:
-                notification_in = NotificationCreate(
-                    recipient_id=showcase.author_id,
-                    sender_id=current_user.id,
-                    type="like_showcase",
-                    title=f"{current_user.username} 赞了您的作品",
-                    content=f"在作品《{showcase.name}》中获得了一个赞",
-                    related_id=showcase.id,
-                    related_uuid=showcase.uuid
-                )
-                crud_notification.create_notification(db=db, notification_in=notification_in)
-            
-            return Success(data={"liked": True, "message": "Like added", "like": ShowcaseLikeResponse.from_orm(like).model_dump()})
-        except ValueError as e:
-            return BadRequest(message=str(e))
+            crud_notification.create_notification(db=db, notification_in=notification_in)
+        
+        return Success(data={"liked": True, "likes_count": likes_count, "message": "Like added"})
 
 
 @router.get("/showcase/{showcase_uuid}/status")
@@ -78,7 +62,7 @@ def get_showcase_like_status(
     *,
     db: Session = Depends(deps.get_db),
     showcase_uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     获取用户对作品的点赞状态
@@ -87,11 +71,9 @@ def get_showcase_like_status(
     if not showcase:
         return NotFound(message="Showcase not found")
     
-    like = crud_showcase_like.get_showcase_like(
-        db=db, user_id=current_user.id, showcase_id=showcase.id
-    )
+    liked = crud_showcase_like.is_liked(db=db, target_id=showcase.id, user_id=current_user.id)
     
-    return Success(data={"liked": like is not None})
+    return Success(data={"liked": liked})
 
 
 # Comment likes
@@ -100,7 +82,7 @@ def toggle_comment_like(
     *,
     db: Session = Depends(deps.get_db),
     like_in: ShowcaseCommentLikeCreate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     切换评论点赞状态
@@ -110,40 +92,26 @@ def toggle_comment_like(
     if not comment:
         return NotFound(message="Comment not found")
     
-    # 检查是否已点赞
-    existing_like = crud_showcase_comment_like.get_comment_like(
-        db=db, user_id=current_user.id, comment_id=comment.id
-    )
+    # 原子切换点赞状态
+    liked, likes_count = crud_showcase_comment_like.toggle(db=db, target_id=comment.id, user_id=current_user.id)
     
-    if existing_like:
-        # 取消点赞
-        success = crud_showcase_comment_like.remove_comment_like(
-            db=db, user_id=current_user.id, comment_id=comment.id
-        )
-        return Success(data={"liked": False, "message": "Like removed"})
+    if not liked:
+        return Success(data={"liked": False, "likes_count": likes_count, "message": "Like removed"})
     else:
-        # 添加点赞
-        try:
-            like = crud_showcase_comment_like.create_comment_like(
-                db=db, like_in=like_in, user_id=current_user.id, comment_id=comment.id
+        # 如果点赞者不是评论作者，则创建点赞通知给评论作者
+        if current_user.id != comment.user_id:
+            notification_in = NotificationCreate(
+                recipient_id=comment.user_id,
+                sender_id=current_user.id,
+                type="like_comment",
+                title=f"{current_user.username} 赞了您的评论",
+                content=f"评论内容：{comment.content[:50]}{'...' if len(comment.content) > 50 else ''}",
+                related_id=comment.id,
+                related_uuid=comment.uuid
             )
-            
-            # 如果点赞者不是评论作者，则创建点赞通知给评论作者
-            if current_user.id != comment.user_id:
-                notification_in = NotificationCreate(
-                    recipient_id=comment.user_id,
-                    sender_id=current_user.id,
-                    type="like_comment",
-                    title=f"{current_user.username} 赞了您的评论",
-                    content=f"评论内容：{comment.content[:50]}{'...' if len(comment.content) > 50 else ''}",
-                    related_id=comment.id,
-                    related_uuid=comment.uuid
-                )
-                crud_notification.create_notification(db=db, notification_in=notification_in)
-            
-            return Success(data={"liked": True, "message": "Like added", "like": ShowcaseCommentLikeResponse.from_orm(like).model_dump()})
-        except ValueError as e:
-            return BadRequest(message=str(e))
+            crud_notification.create_notification(db=db, notification_in=notification_in)
+        
+        return Success(data={"liked": True, "likes_count": likes_count, "message": "Like added"})
 
 
 @router.get("/comment/{comment_uuid}/status")
@@ -151,7 +119,7 @@ def get_comment_like_status(
     *,
     db: Session = Depends(deps.get_db),
     comment_uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     获取用户对评论的点赞状态
@@ -160,11 +128,9 @@ def get_comment_like_status(
     if not comment:
         return NotFound(message="Comment not found")
     
-    like = crud_showcase_comment_like.get_comment_like(
-        db=db, user_id=current_user.id, comment_id=comment.id
-    )
+    liked = crud_showcase_comment_like.is_liked(db=db, target_id=comment.id, user_id=current_user.id)
     
-    return Success(data={"liked": like is not None})
+    return Success(data={"liked": liked})
 
 
 # Reply likes
@@ -173,7 +139,7 @@ def toggle_reply_like(
     *,
     db: Session = Depends(deps.get_db),
     like_in: ShowcaseCommentReplyLikeCreate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     切换回复点赞状态
@@ -183,40 +149,26 @@ def toggle_reply_like(
     if not reply:
         return NotFound(message="Reply not found")
     
-    # 检查是否已点赞
-    existing_like = crud_showcase_comment_reply_like.get_reply_like(
-        db=db, user_id=current_user.id, reply_id=reply.id
-    )
+    # 原子切换点赞状态
+    liked, likes_count = crud_showcase_comment_reply_like.toggle(db=db, target_id=reply.id, user_id=current_user.id)
     
-    if existing_like:
-        # 取消点赞
-        success = crud_showcase_comment_reply_like.remove_reply_like(
-            db=db, user_id=current_user.id, reply_id=reply.id
-        )
-        return Success(data={"liked": False, "message": "Like removed"})
+    if not liked:
+        return Success(data={"liked": False, "likes_count": likes_count, "message": "Like removed"})
     else:
-        # 添加点赞
-        try:
-            like = crud_showcase_comment_reply_like.create_reply_like(
-                db=db, like_in=like_in, user_id=current_user.id, reply_id=reply.id
+        # 如果点赞者不是回复作者，则创建点赞通知给回复作者
+        if current_user.id != reply.user_id:
+            notification_in = NotificationCreate(
+                recipient_id=reply.user_id,
+                sender_id=current_user.id,
+                type="like_comment",
+                title=f"{current_user.username} 赞了您的回复",
+                content=f"回复内容：{reply.content[:50]}{'...' if len(reply.content) > 50 else ''}",
+                related_id=reply.id,
+                related_uuid=reply.uuid
             )
-            
-            # 如果点赞者不是回复作者，则创建点赞通知给回复作者
-            if current_user.id != reply.user_id:
-                notification_in = NotificationCreate(
-                    recipient_id=reply.user_id,
-                    sender_id=current_user.id,
-                    type="like_comment",
-                    title=f"{current_user.username} 赞了您的回复",
-                    content=f"回复内容：{reply.content[:50]}{'...' if len(reply.content) > 50 else ''}",
-                    related_id=reply.id,
-                    related_uuid=reply.uuid
-                )
-                crud_notification.create_notification(db=db, notification_in=notification_in)
-            
-            return Success(data={"liked": True, "message": "Like added", "like": ShowcaseCommentReplyLikeResponse.from_orm(like).model_dump()})
-        except ValueError as e:
-            return BadRequest(message=str(e))
+            crud_notification.create_notification(db=db, notification_in=notification_in)
+        
+        return Success(data={"liked": True, "likes_count": likes_count, "message": "Like added"})
 
 
 @router.get("/reply/{reply_uuid}/status")
@@ -224,7 +176,7 @@ def get_reply_like_status(
     *,
     db: Session = Depends(deps.get_db),
     reply_uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     获取用户对回复的点赞状态
@@ -233,8 +185,32 @@ def get_reply_like_status(
     if not reply:
         return NotFound(message="Reply not found")
     
-    like = crud_showcase_comment_reply_like.get_reply_like(
-        db=db, user_id=current_user.id, reply_id=reply.id
-    )
+    liked = crud_showcase_comment_reply_like.is_liked(db=db, target_id=reply.id, user_id=current_user.id)
     
-    return Success(data={"liked": like is not None})
\ No newline at end of file
+    return Success(data={"liked": liked})
+
+
+@router.post("/status/batch")
+def get_like_status_batch(
+    *,
+    db: Session = Depends(deps.get_db),
+    status_in: LikeStatusBatchRequest,
+    current_user: Principal = Depends(deps.get_current_principal),
+):
+    """
+    批量获取用户对作品、评论、回复的点赞状态
+
+    每类对象一次IN查询加一次Redis pipeline，返回 {类型: {uuid: 是否已点赞}}，
+    不存在或已删除的对象不出现在结果中
+    """
+    return Success(data={
+        "showcase": crud_showcase_like.get_liked_status_by_uuids(
+            db=db, uuids=status_in.showcase_uuids, user_id=current_user.id
+        ),
+        "comment": crud_showcase_comment_like.get_liked_status_by_uuids(
+            db=db, uuids=status_in.comment_uuids, user_id=current_user.id
+        ),
+        "reply": crud_showcase_comment_reply_like.get_liked_status_by_uuids(
+            db=db, uuids=status_in.reply_uuids, user_id=current_user.id
+        ),
+    })
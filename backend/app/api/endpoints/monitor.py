@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+
+from app.api import deps
+from app.config.pool_metrics import get_pool_stats
+from app.utils import password_hasher, redis_bus
+from app.utils.response import Success
+
+# 内部监控路由，仅管理员可访问
+admin_router = APIRouter()
+
+
+@admin_router.get("/db-pool")
+def read_db_pool_stats(
+    current_user: dict = Depends(deps.get_current_manager_user),
+):
+    """
+    获取数据库连接池实时统计（签出数、溢出数、等待时间直方图、签出/归还次数）
+    """
+    return Success(data=get_pool_stats())
+
+
+@admin_router.get("/notification-stream")
+def read_notification_stream_stats(
+    current_user: dict = Depends(deps.get_current_manager_user),
+):
+    """
+    获取本worker的通知推送统计（当前连接数、积压消息数、投递/丢弃次数、订阅重连次数）
+    """
+    return Success(data=redis_bus.get_stats())
+
+
+@admin_router.get("/password-hasher")
+def read_password_hasher_stats(
+    current_user: dict = Depends(deps.get_current_manager_user),
+):
+    """
+    获取本worker的密码哈希进程池统计（排队数、完成/失败/拒绝次数、耗时）
+    """
+    return Success(data=password_hasher.metrics.snapshot())
@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, Query
+import json
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.api import deps
-from app.crud.crud_notification import crud_notification
-from app.models import User
+from app.config.settings import settings
+from app.crud.crud_notification import BROADCAST_CHANNEL, crud_notification, user_channel
+from app.utils.principal import Principal
 from app.schemas.notification import (
+    NotificationBroadcast,
     NotificationCreate,
     NotificationUpdate,
     NotificationResponse,
     PaginatedNotificationResponse,
     NotificationMarkAllReadRequest
 )
-from app.utils.response import Success, NotFound, Forbidden
+from app.utils import redis_bus
+from app.utils.pagination import InvalidCursor, TotalMode
+from app.utils.response import Success, NotFound, Forbidden, BadRequest, ServiceUnavailable
 
 router = APIRouter()
 
@@ -21,22 +29,39 @@ admin_router = APIRouter()
 
 
 @router.get("/", response_model=dict)
-def read_notifications(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user_obj),
+async def read_notifications(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal_async),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
+    total_mode: TotalMode = Query(TotalMode.exact, description="总数计算方式：exact精确（短时缓存）、estimated估算、none不计算"),
 ):
     """
     获取当前用户的通知列表
+
+    游标分页模式下不返回总数和未读数，未读数请使用 /unread-count
     """
-    total, unread_count, notifications = crud_notification.get_user_notifications(
-        db, user_id=current_user.id, skip=skip, limit=limit
+    if cursor is not None:
+        try:
+            next_cursor, notifications = await crud_notification.get_user_notifications_by_cursor_async(
+                db, user_id=current_user.id, cursor=cursor, limit=limit
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={
+            "next_cursor": next_cursor,
+            "items": [NotificationResponse.from_orm(n).model_dump() for n in notifications]
+        })
+    
+    total, unread_count, has_more, notifications = await crud_notification.get_user_notifications_async(
+        db, user_id=current_user.id, skip=skip, limit=limit, total_mode=total_mode
     )
     
     response_data = PaginatedNotificationResponse(
         total=total,
         unread_count=unread_count,
+        has_more=has_more,
         items=[NotificationResponse.from_orm(n).model_dump() for n in notifications]
     )
     
@@ -46,26 +71,80 @@ def read_notifications(
 @router.get("/unread-count", response_model=dict)
 def get_unread_count(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user_obj),
+    user_id: int = Depends(deps.get_current_user_id),
 ):
     """
     获取当前用户未读通知数量
+    
+    用户id与未读数都缓存在Redis中，命中时不查询数据库
     """
-    count = crud_notification.get_unread_count(db, user_id=current_user.id)
+    count = crud_notification.get_unread_count(db, user_id=user_id)
     return Success(data={"unread_count": count})
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _notification_events(request: Request, *, user_id: int, role: str, include_broadcasts: bool):
+    # 已停用的账号看不到广播，也不推送
+    channels = [user_channel(user_id), BROADCAST_CHANNEL] if include_broadcasts else [user_channel(user_id)]
+    async with redis_bus.subscribe(channels, maxsize=settings.NOTIFICATION_STREAM_QUEUE_SIZE) as subscription:
+        yield f"retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n\n"
+        while not await request.is_disconnected():
+            if subscription.overflowed:
+                # 客户端跟不上或订阅中断过：丢弃积压，让客户端重新拉取列表和未读数
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                yield _sse("resync", {})
+                continue
+            message = await subscription.get(timeout=settings.NOTIFICATION_STREAM_HEARTBEAT)
+            if message is None:
+                yield ": ping\n\n"
+                continue
+            target_role = message.get("target_role")
+            if target_role and target_role != role:
+                continue
+            yield _sse(message["event"], {k: v for k, v in message.items() if k not in ("event", "target_role")})
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    current_user: Principal = Depends(deps.get_stream_principal),
+):
+    """
+    通知推送（Server-Sent Events）
+    
+    事件：notification（新通知，个人通知附带最新未读数）、unread_count（未读数变化，为null时需重新获取）、
+    resync（有消息丢失，需重新拉取通知列表和未读数）。空闲时定期发送注释行保活。
+    """
+    if redis_bus.get_stats()["subscriptions"] >= settings.NOTIFICATION_STREAM_MAX_CONNECTIONS:
+        return ServiceUnavailable(message="Too many notification streams, fall back to polling")
+    return StreamingResponse(
+        _notification_events(
+            request, user_id=current_user.id, role=current_user.role, include_broadcasts=current_user.is_active
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{uuid}", response_model=dict)
 def read_notification(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     获取通知详情
     """
     notification = crud_notification.get_notification_by_uuid(db=db, uuid=uuid)
+    if not notification:
+        # 不是个人通知时按广播通知查找
+        notification = crud_notification.get_broadcast_for_user(db=db, uuid=uuid, user_id=current_user.id)
     if not notification:
         return NotFound(message="Notification not found")
     
@@ -81,7 +160,7 @@ def mark_notification_as_read(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     标记通知为已读
@@ -100,7 +179,7 @@ def mark_notification_as_read(
 def mark_all_notifications_as_read(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     标记所有通知为已读
@@ -114,12 +193,15 @@ def delete_notification(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     删除通知
     """
     notification = crud_notification.get_notification_by_uuid(db=db, uuid=uuid)
+    if not notification:
+        # 不是个人通知时按广播通知查找
+        notification = crud_notification.get_broadcast_for_user(db=db, uuid=uuid, user_id=current_user.id)
     if not notification:
         return NotFound(message="Notification not found")
     
@@ -137,7 +219,7 @@ def create_notification_admin(
     *,
     db: Session = Depends(deps.get_db),
     notification_in: NotificationCreate,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     创建通知（管理员）
@@ -155,26 +237,20 @@ def broadcast_notification(
     db: Session = Depends(deps.get_db),
     title: str,
     content: Optional[str] = None,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    role: Optional[str] = Query(None, description="只对该角色的用户可见，为空时对所有用户可见"),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     广播通知给所有用户（管理员）
-    """
-    from app.models.user import User as UserModel
-    
-    # 获取所有活跃用户
-    users = db.query(UserModel).filter(UserModel.is_active == True).all()
     
-    created_count = 0
-    for user in users:
-        notification_in = NotificationCreate(
-            recipient_id=user.id,
-            admin_id=current_user.id,
-            type="system_announcement",
-            title=title,
-            content=content
-        )
-        crud_notification.create_notification(db=db, notification_in=notification_in)
-        created_count += 1
+    只写入一条广播记录，用户读取通知列表时合并
+    """
+    notification_in = NotificationBroadcast(
+        admin_id=current_user.id,
+        type="system_announcement",
+        title=title,
+        content=content
+    )
+    broadcast = crud_notification.create_broadcast(db=db, notification_in=notification_in, target_role=role)
     
-    return Success(data={"message": f"Broadcast notification sent to {created_count} users"})
\ No newline at end of file
+    return Success(data={"uuid": broadcast.uuid, "message": "Broadcast notification sent"})
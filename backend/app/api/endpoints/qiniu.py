@@ -12,7 +12,7 @@ from app.schemas.qiniu_token import (
 )
 from app.schemas.response import UnifiedResponse
 from app.services.qiniu_service import qiniu_service
-from app.models.user import User
+from app.utils.principal import Principal
 
 router = APIRouter()
 
@@ -20,7 +20,7 @@ router = APIRouter()
 def request_upload_token(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
     token_request: QiniuTokenCreate
 ):
     """
@@ -73,7 +73,7 @@ def request_upload_token(
 def request_download_token(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
     token_request: QiniuTokenCreate,
     file_url: str
 ):
@@ -127,7 +127,7 @@ def request_download_token(
 def get_my_tokens(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
     skip: int = 0,
     limit: int = 20
 ):
@@ -148,7 +148,7 @@ def get_my_tokens(
 def get_pending_tokens(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
     skip: int = 0,
     limit: int = 20
 ):
@@ -169,7 +169,7 @@ def get_pending_tokens(
 def approve_token(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
     token_id: int,
     approval_data: QiniuTokenApproval
 ):
@@ -206,7 +206,7 @@ def approve_token(
 def mark_token_used(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
     token_id: int
 ):
     """
@@ -244,7 +244,7 @@ def mark_token_used(
 def cleanup_expired_tokens(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_manager_user_obj)
+    current_user: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Cleanup expired tokens (Manager only)
@@ -259,7 +259,7 @@ def cleanup_expired_tokens(
 
 @router.get("/bucket-info", )
 def get_bucket_info(
-    current_user: User = Depends(deps.get_current_manager_user_obj)
+    current_user: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Get Qiniu bucket configuration info (Manager only)
@@ -276,7 +276,7 @@ def get_bucket_info(
 def request_admin_upload_token(
     *,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
     upload_request: QiniuAdminUploadRequest
 ):
     """
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.api import deps
+from app.crud import crud_search
+from app.utils.principal import Principal
+from app.utils.response import Success, BadRequest
+
+router = APIRouter()
+
+# 管理员路由
+admin_router = APIRouter()
+
+
+@router.get("")
+def search_content(
+    *,
+    db: Session = Depends(deps.get_db),
+    q: str = Query(..., min_length=1, max_length=100, description="搜索关键词，多个词用空格分隔"),
+    type: Optional[str] = Query(None, description="内容类型：blog、forum_post、showcase，不传则搜索全部"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50),
+):
+    """
+    全文搜索博客、论坛帖子和作品展示，按相关度排序，title和snippet中命中的词以<em>标出
+    """
+    keyword = q.strip()
+    if not keyword:
+        return BadRequest(message="Keyword is required")
+    if type is not None and type not in crud_search.CONTENT_TYPES:
+        return BadRequest(message=f"Invalid type, expected one of: {', '.join(crud_search.CONTENT_TYPES)}")
+    
+    items = crud_search.search(db, keyword=keyword, content_type=type, skip=skip, limit=limit)
+    return Success(data={"items": items})
+
+
+@admin_router.post("/reindex")
+def reindex_search_documents(
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
+):
+    """
+    重建全文检索索引（执行迁移后或索引与内容不一致时使用）
+    """
+    count = crud_search.reindex_all(db)
+    return Success(data={"indexed": count})
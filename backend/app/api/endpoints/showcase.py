@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
 
 from app.api import deps
 from app.crud import crud_showcase
 from app.crud.crud_notification import crud_notification
-from app.models import User
+from app.utils.principal import Principal
 from app.schemas.notification import NotificationCreate
 from app.schemas.showcase import (
     ShowcaseCreate,
@@ -15,7 +16,10 @@ from app.schemas.showcase import (
     ShowcaseReviewRequest,
     ShowcasePromotionRequest,
 )
+from app.utils.cache import cached
+from app.utils.pagination import InvalidCursor, TotalMode
 from app.utils.response import Success, NotFound, BadRequest
+from app.utils import view_counter
 
 router = APIRouter()
 
@@ -29,7 +33,7 @@ def create_showcase_admin(
     *,
     db: Session = Depends(deps.get_db),
     showcase_in: ShowcaseCreate,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Create new showcase (Admin only).
@@ -46,7 +50,7 @@ def create_showcase(
     *,
     db: Session = Depends(deps.get_db),
     showcase_in: ShowcaseCreate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Create new showcase.
@@ -63,9 +67,10 @@ def create_showcase(
 @admin_router.get("/")
 def read_showcases_admin(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     start_time: Optional[datetime] = Query(None),
@@ -74,6 +79,21 @@ def read_showcases_admin(
     """
     Retrieve showcases with pagination and filtering (Admin only).
     """
+    if cursor is not None:
+        try:
+            next_cursor, showcases = crud_showcase.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                status=status,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ShowcaseResponse.from_orm(s).model_dump() for s in showcases]})
+
     total, showcases = crud_showcase.get_multi(
         db,
         skip=skip,
@@ -90,6 +110,7 @@ def read_showcases(
     db: Session = Depends(deps.get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     start_time: Optional[datetime] = Query(None),
@@ -98,6 +119,21 @@ def read_showcases(
     """
     Retrieve showcases with pagination and filtering.
     """
+    if cursor is not None:
+        try:
+            next_cursor, showcases = crud_showcase.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                status=status,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ShowcaseResponse.from_orm(s).model_dump() for s in showcases]})
+
     total, showcases = crud_showcase.get_multi(
         db,
         skip=skip,
@@ -114,13 +150,26 @@ def read_showcases(
 @admin_router.get("/pending-review")
 def get_pending_review_showcases_admin(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
 ):
     """
     Get showcases pending review (Admin only).
     """
+    if cursor is not None:
+        try:
+            next_cursor, showcases = crud_showcase.get_multi_by_cursor(
+                db,
+                cursor=cursor,
+                limit=limit,
+                status="pending_review",
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ShowcaseResponse.from_orm(s).model_dump() for s in showcases]})
+
     print(f"获取待审核作品列表 - 用户: {current_user.id}, skip: {skip}, limit: {limit}")
     total, showcases = crud_showcase.get_multi(
         db,
@@ -140,7 +189,7 @@ def read_showcase_admin(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Get showcase by UUID (Admin only).
@@ -152,30 +201,48 @@ def read_showcase_admin(
 
 # 前端用户作品展示端点（仅显示优秀作品）- 必须在/{uuid}路由之前
 @router.get("/frontend")
-def read_showcases_frontend(
-    db: Session = Depends(deps.get_db),
+@cached("showcase:frontend", ttl=60, tags=("showcase",))
+async def read_showcases_frontend(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     name: Optional[str] = Query(None),
     start_time: Optional[datetime] = Query(None),
     end_time: Optional[datetime] = Query(None),
+    total_mode: TotalMode = Query(TotalMode.exact, description="总数计算方式：exact精确（短时缓存）、estimated估算、none不计算"),
 ):
     """
     Retrieve showcases for frontend display (only excellent works).
     """
+    if cursor is not None:
+        try:
+            next_cursor, showcases = await crud_showcase.get_showcases_for_frontend_by_cursor_async(
+                db,
+                cursor=cursor,
+                limit=limit,
+                name=name,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ShowcaseResponse.from_orm(s).model_dump() for s in showcases]})
+
     try:
-        total, showcases = crud_showcase.get_showcases_for_frontend(
+        total, has_more, showcases = await crud_showcase.get_showcases_for_frontend_async(
             db,
             skip=skip,
             limit=limit,
             name=name,
             start_time=start_time,
             end_time=end_time,
+            total_mode=total_mode,
         )
         print(f"DEBUG: Found {total} showcases with excellent status")
         
-        if total == 0:
-            return Success(data={"total": 0, "items": []})
+        if not showcases:
+            return Success(data={"total": total, "has_more": False, "items": []})
         
         showcase_items = []
         for s in showcases:
@@ -185,7 +252,7 @@ def read_showcases_frontend(
                 print(f"DEBUG: Error converting showcase {s.id}: {e}")
                 continue
                 
-        return Success(data={"total": total, "items": showcase_items})
+        return Success(data={"total": total, "has_more": has_more, "items": showcase_items})
     except Exception as e:
         print(f"DEBUG: Error in frontend showcase API: {e}")
         return Success(data={"total": 0, "items": [], "debug_error": str(e)})
@@ -202,6 +269,7 @@ def read_showcase(
     showcase = crud_showcase.get_showcase_by_uuid(db=db, uuid=uuid)
     if not showcase:
         return NotFound(message="Showcase not found")
+    view_counter.record_view(db, "showcase", showcase)
     return Success(data=ShowcaseResponse.from_orm(showcase).model_dump())
 
 
@@ -212,7 +280,7 @@ def update_showcase_admin(
     db: Session = Depends(deps.get_db),
     uuid: str,
     showcase_in: ShowcaseUpdate,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Update a showcase (Admin only).
@@ -229,7 +297,7 @@ def update_showcase(
     db: Session = Depends(deps.get_db),
     uuid: str,
     showcase_in: ShowcaseUpdate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Update a showcase. Users can only update their own showcases.
@@ -252,7 +320,7 @@ def delete_showcase_admin(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Delete a showcase (Admin only).
@@ -268,7 +336,7 @@ def delete_showcase(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Delete a showcase. Users can only delete their own showcases.
@@ -292,7 +360,7 @@ def review_showcase_admin(
     db: Session = Depends(deps.get_db),
     uuid: str,
     review_request: ShowcaseReviewRequest,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Review a showcase (approve/reject) - Admin only.
@@ -356,7 +424,7 @@ def promote_showcase_admin(
     db: Session = Depends(deps.get_db),
     uuid: str,
     promotion_request: ShowcasePromotionRequest,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Promote showcase to excellent - Admin only.
@@ -399,7 +467,7 @@ def archive_showcase_admin(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Archive showcase (published/excellent -> draft) - Admin only.
@@ -421,7 +489,7 @@ def restore_showcase_admin(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_manager_user_obj),
+    current_user: Principal = Depends(deps.get_current_manager_principal),
 ):
     """
     Restore showcase (draft -> published/excellent) - Admin only.
@@ -5,13 +5,14 @@ from typing import Optional
 from app.api import deps
 from app.crud import crud_showcase_comment, crud_showcase
 from app.crud.crud_notification import crud_notification
-from app.models import User
+from app.utils.principal import Principal
 from app.schemas.notification import NotificationCreate
 from app.schemas.showcase_comment import (
     ShowcaseCommentCreate,
     ShowcaseCommentUpdate,
     ShowcaseCommentResponse,
 )
+from app.utils.pagination import InvalidCursor
 from app.utils.response import Success, NotFound, BadRequest
 
 router = APIRouter()
@@ -22,7 +23,7 @@ def create_showcase_comment(
     *,
     db: Session = Depends(deps.get_db),
     comment_in: ShowcaseCommentCreate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Create new showcase comment.
@@ -55,12 +56,27 @@ def read_showcase_comments(
     showcase_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
     sort_by: str = Query("created_at", regex="^(created_at|likes_count)$"),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
 ):
     """
     Retrieve showcase comments with pagination.
     """
+    if cursor is not None:
+        try:
+            next_cursor, comments = crud_showcase_comment.get_multi_by_showcase_id_by_cursor(
+                db,
+                showcase_id=showcase_id,
+                cursor=cursor,
+                limit=limit,
+                sort_by=sort_by,
+                sort_order=sort_order,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ShowcaseCommentResponse.from_orm(c).model_dump() for c in comments]})
+
     total, comments = crud_showcase_comment.get_multi_by_showcase_id(
         db,
         showcase_id=showcase_id,
@@ -93,7 +109,7 @@ def update_showcase_comment(
     db: Session = Depends(deps.get_db),
     uuid: str,
     comment_in: ShowcaseCommentUpdate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Update a showcase comment. Users can only update their own comments.
@@ -115,7 +131,7 @@ def delete_showcase_comment(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Delete a showcase comment. Users can only delete their own comments.
@@ -5,13 +5,14 @@ from typing import Optional
 from app.api import deps
 from app.crud import crud_showcase_comment_reply, crud_showcase_comment
 from app.crud.crud_notification import crud_notification
-from app.models import User
+from app.utils.principal import Principal
 from app.schemas.notification import NotificationCreate
 from app.schemas.showcase_comment_reply import (
     ShowcaseCommentReplyCreate,
     ShowcaseCommentReplyUpdate,
     ShowcaseCommentReplyResponse,
 )
+from app.utils.pagination import InvalidCursor
 from app.utils.response import Success, NotFound, BadRequest
 
 router = APIRouter()
@@ -22,7 +23,7 @@ def create_showcase_comment_reply(
     *,
     db: Session = Depends(deps.get_db),
     reply_in: ShowcaseCommentReplyCreate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Create new showcase comment reply.
@@ -55,10 +56,23 @@ def read_showcase_comment_replies(
     comment_id: int = Query(...),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上一页返回的next_cursor"),
 ):
     """
     Retrieve showcase comment replies with pagination.
     """
+    if cursor is not None:
+        try:
+            next_cursor, replies = crud_showcase_comment_reply.get_multi_by_comment_id_by_cursor(
+                db,
+                comment_id=comment_id,
+                cursor=cursor,
+                limit=limit,
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={"next_cursor": next_cursor, "items": [ShowcaseCommentReplyResponse.from_orm(r).model_dump() for r in replies]})
+
     total, replies = crud_showcase_comment_reply.get_multi_by_comment_id(
         db,
         comment_id=comment_id,
@@ -89,7 +103,7 @@ def update_showcase_comment_reply(
     db: Session = Depends(deps.get_db),
     uuid: str,
     reply_in: ShowcaseCommentReplyUpdate,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Update a showcase comment reply. Users can only update their own replies.
@@ -111,7 +125,7 @@ def delete_showcase_comment_reply(
     *,
     db: Session = Depends(deps.get_db),
     uuid: str,
-    current_user: User = Depends(deps.get_current_user_obj),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
     Delete a showcase comment reply. Users can only delete their own replies.
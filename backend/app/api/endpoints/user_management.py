@@ -4,7 +4,9 @@ from typing import Optional
 
 from app import models, crud
 from app.schemas.user import UserUpdate, UserSearchRequest, UserResponse, AdminUserCreate, AdminPasswordResetRequest
+from app.utils.principal import Principal
 from app.api import deps
+from app.utils.pagination import InvalidCursor
 from app.utils.response import Success, BadRequest, NotFound, Created
 
 router = APIRouter()
@@ -13,7 +15,7 @@ router = APIRouter()
 def create_user(
     user_data: AdminUserCreate,
     db: Session = Depends(deps.get_db),
-    current_manager: models.User = Depends(deps.get_current_manager_user_obj)
+    current_manager: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Create user directly by admin (Manager only).
@@ -38,12 +40,13 @@ def create_user(
 def get_users(
     skip: int = Query(0, ge=0, description="Skip records"),
     limit: int = Query(20, ge=1, le=100, description="Limit records"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination: empty string for the first page, then the previous next_cursor"),
     search: Optional[str] = Query(None, description="Search by username, email, uuid, or real name"),
     role: Optional[str] = Query(None, description="Filter by role"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     school: Optional[str] = Query(None, description="Filter by school"),
     db: Session = Depends(deps.get_db),
-    current_manager: models.User = Depends(deps.get_current_manager_user_obj)
+    current_manager: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Get users with pagination and optional search/filter (Manager only).
@@ -55,6 +58,22 @@ def get_users(
         school=school
     )
     
+    if cursor is not None:
+        try:
+            next_cursor, users = crud.crud_user.get_users_by_cursor(
+                db=db,
+                cursor=cursor,
+                limit=limit,
+                search_params=search_params
+            )
+        except InvalidCursor:
+            return BadRequest(message="Invalid cursor")
+        return Success(data={
+            "next_cursor": next_cursor,
+            "items": [UserResponse.from_orm(user).dict() for user in users],
+            "limit": limit
+        })
+    
     total, users = crud.crud_user.get_users_with_pagination(
         db=db, 
         skip=skip, 
@@ -75,7 +94,7 @@ def get_users(
 def get_user(
     user_id: int,
     db: Session = Depends(deps.get_db),
-    current_manager: models.User = Depends(deps.get_current_manager_user_obj)
+    current_manager: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Get user by ID (Manager only).
@@ -91,7 +110,7 @@ def update_user(
     user_id: int,
     user_update: UserUpdate,
     db: Session = Depends(deps.get_db),
-    current_manager: models.User = Depends(deps.get_current_manager_user_obj)
+    current_manager: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Update user information (Manager only).
@@ -120,7 +139,7 @@ def update_user(
 def ban_user(
     user_id: int,
     db: Session = Depends(deps.get_db),
-    current_manager: models.User = Depends(deps.get_current_manager_user_obj)
+    current_manager: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Ban user (set is_active to False) (Manager only).
@@ -147,7 +166,7 @@ def ban_user(
 def unban_user(
     user_id: int,
     db: Session = Depends(deps.get_db),
-    current_manager: models.User = Depends(deps.get_current_manager_user_obj)
+    current_manager: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Unban user (set is_active to True) (Manager only).
@@ -169,7 +188,7 @@ def unban_user(
 def delete_user(
     user_id: int,
     db: Session = Depends(deps.get_db),
-    current_manager: models.User = Depends(deps.get_current_manager_user_obj)
+    current_manager: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Soft delete user (Manager only).
@@ -192,7 +211,7 @@ def reset_user_password(
     user_id: int,
     password_data: AdminPasswordResetRequest,
     db: Session = Depends(deps.get_db),
-    current_manager: models.User = Depends(deps.get_current_manager_user_obj)
+    current_manager: Principal = Depends(deps.get_current_manager_principal)
 ):
     """
     Reset user password by admin (Manager only).
@@ -1,9 +1,100 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import random
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Select
 from .settings import settings
+from .pool_metrics import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, instrument_engine
+
+pool_options = {
+    "pool_size": settings.MYSQL_POOL_SIZE,
+    "max_overflow": settings.MYSQL_MAX_OVERFLOW,
+    "pool_timeout": settings.MYSQL_POOL_TIMEOUT,
+    "pool_recycle": settings.MYSQL_POOL_RECYCLE,
+    "pool_pre_ping": settings.MYSQL_POOL_PRE_PING,
+}
+
+# session.info 中的标记：本会话已写入，后续读取全部走主库
+STICKY_PRIMARY_KEY = "sticky_primary"
+
+
+class RoutingSession(Session):
+    """
+    读写分离Session
+
+    普通SELECT发往本会话随机选定的一个从库；INSERT/UPDATE/DELETE、flush、
+    SELECT ... FOR UPDATE 发往主库。会话内一旦发生写入即粘滞到主库，
+    保证同一请求内读到自己刚写入的数据。未配置从库时行为与普通Session一致。
+    """
+
+    def __init__(self, *args, replicas=(), **kw):
+        super().__init__(*args, **kw)
+        self.replicas = list(replicas)
+        self.replica = random.choice(self.replicas) if self.replicas else None
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if (
+            self.replica is not None
+            and not self._flushing
+            and not self.info.get(STICKY_PRIMARY_KEY)
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            return self.replica
+        if clause is not None and clause.is_dml:
+            self.info[STICKY_PRIMARY_KEY] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_to_primary(session, flush_context):
+    session.info[STICKY_PRIMARY_KEY] = True
 
-engine = create_engine(settings.mysql_database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def stick_to_primary(db) -> None:
+    """强制该会话后续读取走主库，用于对复制延迟敏感的读（同步或异步Session均可）"""
+    db.info[STICKY_PRIMARY_KEY] = True
+
+
+engine = create_engine(
+    settings.mysql_database_url,
+    poolclass=InstrumentedQueuePool,
+    **pool_options
+)
+instrument_engine(engine, "primary")
+
+replica_engines = []
+for i, url in enumerate(settings.mysql_replica_urls("pymysql")):
+    replica = create_engine(url, poolclass=InstrumentedQueuePool, **pool_options)
+    replica_engines.append(instrument_engine(replica, f"replica-{i}"))
+
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine, class_=RoutingSession, replicas=replica_engines
+)
+
+# 异步engine（aiomysql），供 async def 端点使用，不占用线程池
+async_engine = create_async_engine(
+    settings.mysql_async_database_url,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    **pool_options
+)
+instrument_engine(async_engine.sync_engine, "primary-async")
+
+async_replica_engines = []
+for i, url in enumerate(settings.mysql_replica_urls("aiomysql")):
+    replica = create_async_engine(url, poolclass=InstrumentedAsyncAdaptedQueuePool, **pool_options)
+    instrument_engine(replica.sync_engine, f"replica-{i}-async")
+    async_replica_engines.append(replica)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    replicas=[replica.sync_engine for replica in async_replica_engines],
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 def get_mysql_db():
     db = SessionLocal()
@@ -11,3 +102,7 @@ def get_mysql_db():
         yield db
     finally:
         db.close()
+
+async def get_async_mysql_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,151 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# 连接等待时间直方图的桶上限（秒）
+WAIT_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """
+    单个连接池的运行统计
+
+    计数器在多个线程中被更新，所有写操作都在锁内完成。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_TIME_BUCKETS) + 1)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        index = len(WAIT_TIME_BUCKETS)
+        for i, upper in enumerate(WAIT_TIME_BUCKETS):
+            if seconds <= upper:
+                index = i
+                break
+
+        with self._lock:
+            self.wait_count += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_buckets[index] += 1
+            if timed_out:
+                self.timeouts += 1
+
+    def incr(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        with self._lock:
+            histogram = {
+                f"le_{upper}": count
+                for upper, count in zip(WAIT_TIME_BUCKETS, self.wait_buckets)
+            }
+            histogram["le_inf"] = self.wait_buckets[-1]
+            return {
+                "name": self.name,
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_time": {
+                    "count": self.wait_count,
+                    "sum": round(self.wait_sum, 6),
+                    "max": round(self.wait_max, 6),
+                    "avg": round(self.wait_sum / self.wait_count, 6) if self.wait_count else 0.0,
+                    "histogram": histogram,
+                },
+            }
+
+
+class InstrumentedPoolMixin:
+    """
+    记录获取连接等待时间的连接池混入类
+
+    等待时间包括池满时排队的时间以及新建连接的时间。
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_wait(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() 会重建连接池，统计对象需要跟随新池
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    """同步engine使用的带统计QueuePool"""
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """异步engine使用的带统计QueuePool"""
+
+
+_registry: Dict[str, Tuple[Engine, PoolMetrics]] = {}
+
+
+def instrument_engine(engine: Engine, name: str) -> Engine:
+    """
+    为engine的连接池挂载统计，并以name注册到全局表中
+
+    异步engine需传入其 sync_engine，连接池事件只能注册在同步engine上。
+    """
+    metrics = PoolMetrics(name)
+    if isinstance(engine.pool, InstrumentedPoolMixin):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.incr("connects")
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.incr("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.incr("checkins")
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.incr("invalidations")
+
+    _registry[name] = (engine, metrics)
+    return engine
+
+
+def get_pool_stats() -> List[dict]:
+    """返回所有已注册连接池的实时统计"""
+    return [metrics.snapshot(engine.pool) for engine, metrics in _registry.values()]
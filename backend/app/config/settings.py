@@ -16,12 +16,75 @@ class Settings(BaseSettings):
     MYSQL_PORT: int = 3306
     MYSQL_DB: str
 
+    # MySQL Connection Pool Configuration
+    MYSQL_POOL_SIZE: int = 10
+    MYSQL_MAX_OVERFLOW: int = 20
+    MYSQL_POOL_TIMEOUT: int = 30
+    MYSQL_POOL_RECYCLE: int = 3600  # 需小于MySQL的wait_timeout
+    MYSQL_POOL_PRE_PING: bool = True
+
+    # MySQL Read Replicas, 逗号分隔的 host[:port]，为空时所有读写都走主库
+    MYSQL_REPLICA_HOSTS: str = ""
+
     # Redis Configuration
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: str = ""
 
+    # Response Cache Configuration
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_MAX_ENTRY_BYTES: int = 512 * 1024
+
+    # 分页总数缓存（秒）：精确模式可接受的缓存时长 / 估算模式可接受的缓存时长
+    COUNT_CACHE_TTL: int = 30
+    COUNT_ESTIMATE_TTL: int = 600
+
+    # 浏览计数写回数据库的间隔（秒）
+    VIEW_COUNT_FLUSH_INTERVAL: int = 10
+
+    # 点赞状态写回数据库的间隔（秒）
+    LIKE_RECONCILE_INTERVAL: int = 10
+
+    # 论坛热门帖子：热度半衰期（秒）/ 按数据库全量重算的间隔（秒）
+    FORUM_HOT_HALF_LIFE: int = 86400
+    FORUM_HOT_RECOMPUTE_INTERVAL: int = 600
+
+    # 论坛分类帖子数按数据库核对纠正的间隔（秒）
+    FORUM_CATEGORY_COUNT_RECONCILE_INTERVAL: int = 3600
+
+    # 博客标签的博客数按数据库核对纠正的间隔（秒）
+    BLOG_TAG_COUNT_RECONCILE_INTERVAL: int = 3600
+
+    # 未读通知数按数据库纠正的间隔（秒）
+    NOTIFICATION_UNREAD_RECONCILE_INTERVAL: int = 300
+
+    # 通知推送：每个worker的最大连接数 / 每个连接的待发送队列长度 / 保活间隔（秒）/ 客户端重连间隔（毫秒）
+    NOTIFICATION_STREAM_MAX_CONNECTIONS: int = 1000
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = 100
+    NOTIFICATION_STREAM_HEARTBEAT: int = 15
+    NOTIFICATION_STREAM_RETRY_MS: int = 5000
+
+    # 当前用户缓存：Redis缓存时长（秒）/ 进程内缓存时长（秒）/ 进程内缓存条数
+    PRINCIPAL_CACHE_TTL: int = 60
+    PRINCIPAL_LOCAL_TTL: int = 5
+    PRINCIPAL_LOCAL_CACHE_SIZE: int = 10000
+
+    # refresh token黑名单：本地布隆过滤器的容量 / 误判率 / 定期重建间隔（秒）
+    TOKEN_BLACKLIST_BLOOM_CAPACITY: int = 100000
+    TOKEN_BLACKLIST_BLOOM_ERROR_RATE: float = 0.01
+    TOKEN_BLACKLIST_REBUILD_INTERVAL: int = 3600
+
+    # 密码哈希：bcrypt成本 / 哈希进程数（0为在请求线程中计算）/ 排队与执行中的任务上限
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # 批量导入用户：每个多行INSERT/SAVEPOINT包含的行数 / 单个文件最多导入的行数
+    USER_IMPORT_CHUNK_SIZE: int = 500
+    USER_IMPORT_MAX_ROWS: int = 10000
+
     # JWT Configuration
     JWT_SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -46,6 +109,22 @@ class Settings(BaseSettings):
     def mysql_database_url(self) -> str:
         return f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
 
+    @property
+    def mysql_async_database_url(self) -> str:
+        return f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
+
+    def mysql_replica_urls(self, driver: str = "pymysql") -> list[str]:
+        urls = []
+        for item in self.MYSQL_REPLICA_HOSTS.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            host, _, port = item.partition(":")
+            urls.append(
+                f"mysql+{driver}://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{host}:{port or self.MYSQL_PORT}/{self.MYSQL_DB}"
+            )
+        return urls
+
     # No need for model_config to specify env_file anymore, as we've loaded it manually
     model_config = SettingsConfigDict(env_file_encoding='utf-8')
 
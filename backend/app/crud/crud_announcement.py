@@ -6,12 +6,21 @@ import uuid
 
 from app.models.announcement import Announcement, AnnouncementStatus
 from app.schemas.announcement import AnnouncementCreate, AnnouncementUpdate
+from app.utils.cache import invalidate_tags
+from app.utils.pagination import paginate_keyset
+
+# 游标分页的排序键
+KEYSET_ORDER = (
+    (Announcement.created_at, True),
+    (Announcement.id, True)
+)
 
 
 def create_announcement(db: Session, *, announcement_in: AnnouncementCreate, publisher_id: int) -> Announcement:
     db_obj = Announcement(**announcement_in.dict(exclude={"uuid"}), uuid=str(uuid.uuid4()), publisher_id=publisher_id)
     db.add(db_obj)
     db.commit()
+    invalidate_tags("announcement")
     db.refresh(db_obj)
     return db_obj
 
@@ -24,16 +33,14 @@ def get_by_name(db: Session, *, name: str) -> Optional[Announcement]:
     return db.query(Announcement).filter(Announcement.name == name, Announcement.deleted_at.is_(None)).first()
 
 
-def get_multi(
+def _multi_query(
     db: Session,
     *,
-    skip: int = 0,
-    limit: int = 10,
     name: Optional[str] = None,
     status: Optional[str] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None
-) -> Tuple[int, list[Announcement]]:
+):
     query = db.query(Announcement).filter(Announcement.deleted_at.is_(None))
 
     filters = []
@@ -48,6 +55,20 @@ def get_multi(
 
     if filters:
         query = query.filter(and_(*filters))
+    return query
+
+
+def get_multi(
+    db: Session,
+    *,
+    skip: int = 0,
+    limit: int = 10,
+    name: Optional[str] = None,
+    status: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[int, list[Announcement]]:
+    query = _multi_query(db, name=name, status=status, start_time=start_time, end_time=end_time)
 
     total = query.count()
     items = query.order_by(Announcement.created_at.desc()).offset(skip).limit(limit).all()
@@ -55,6 +76,21 @@ def get_multi(
     return total, items
 
 
+def get_multi_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    name: Optional[str] = None,
+    status: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[Announcement]]:
+    """get_multi 的游标分页版本，返回 (next_cursor, items)"""
+    query = _multi_query(db, name=name, status=status, start_time=start_time, end_time=end_time)
+    return paginate_keyset(query, KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
 def update_announcement(db: Session, *, db_obj: Announcement, obj_in: AnnouncementUpdate) -> Announcement:
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -62,6 +98,7 @@ def update_announcement(db: Session, *, db_obj: Announcement, obj_in: Announceme
 
     db.add(db_obj)
     db.commit()
+    invalidate_tags("announcement")
     db.refresh(db_obj)
     return db_obj
 
@@ -70,6 +107,7 @@ def remove_announcement(db: Session, *, db_obj: Announcement) -> Announcement:
     db_obj.deleted_at = datetime.utcnow()
     db.add(db_obj)
     db.commit()
+    invalidate_tags("announcement")
     db.refresh(db_obj)
     return db_obj
 
@@ -79,6 +117,7 @@ def update_status(db: Session, *, db_obj: Announcement, status: str) -> Announce
     db_obj.status = status
     db.add(db_obj)
     db.commit()
+    invalidate_tags("announcement")
     db.refresh(db_obj)
     return db_obj
 
@@ -101,4 +140,25 @@ def get_published(
         status=AnnouncementStatus.published.value,
         start_time=start_time,
         end_time=end_time
+    )
+
+
+def get_published_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[Announcement]]:
+    """Keyset variant of get_published"""
+    return get_multi_by_cursor(
+        db,
+        cursor=cursor,
+        limit=limit,
+        name=name,
+        status=AnnouncementStatus.published.value,
+        start_time=start_time,
+        end_time=end_time
     )
\ No newline at end of file
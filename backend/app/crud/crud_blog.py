@@ -1,16 +1,58 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_
+import logging
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import case, desc, and_, func, or_, select, update
+from app.config.mysql_config import stick_to_primary
 from app.crud.base import CRUDBase
 from app.models.blog import Blog, BlogTag, BlogTagRelation, BlogStatus
 from app.schemas.blog import (
     BlogCreate, BlogUpdate, BlogSearchRequest,
     BlogTagCreate, BlogTagUpdate
 )
+from app.crud.crud_search import sync_document
+from app.utils import redis_lock
+from app.utils.cache import invalidate_tags
+from app.utils.pagination import paginate_keyset
 from uuid import uuid4
 
+logger = logging.getLogger("app")
+
+RECONCILE_LOCK_KEY = "blog:tag:blog_count:reconcile:lock"
+RECONCILE_LOCK_TTL = 60
+
+# 列表页需要作者和标签，一次性加载，避免逐篇懒加载
+LIST_OPTIONS = (
+    joinedload(Blog.author),
+    selectinload(Blog.tag_relations).joinedload(BlogTagRelation.tag)
+)
+
+
+def _counted(blog: Blog) -> bool:
+    """标签的 blog_count 只统计已发布且未删除的博客"""
+    return not blog.is_deleted and blog.status == BlogStatus.published
+
+
+def _adjust_tag_counts(db: Session, tag_ids: Iterable[int], delta: int) -> None:
+    """在数据库中原子地增减标签的博客数，不提交事务"""
+    tag_ids = set(tag_ids)
+    if not tag_ids:
+        return
+    if delta >= 0:
+        blog_count = BlogTag.blog_count + delta
+    else:
+        # 列为无符号整数，先判断再减
+        blog_count = case((BlogTag.blog_count > -delta, BlogTag.blog_count + delta), else_=0)
+    db.execute(
+        update(BlogTag)
+        .where(BlogTag.id.in_(tag_ids))
+        .values(blog_count=blog_count)
+        .execution_options(synchronize_session=False)
+    )
+
 
 class CRUDBlog(CRUDBase[Blog, BlogCreate, BlogUpdate]):
+    cache_tags = ("blog", "blog_tag")
+
     def create_with_tags(self, db: Session, *, obj_in: BlogCreate) -> Blog:
         """创建Blog文章并关联标签"""
         # 生成UUID
@@ -27,45 +69,51 @@ class CRUDBlog(CRUDBase[Blog, BlogCreate, BlogUpdate]):
             status=obj_in.status
         )
         db.add(db_obj)
+        sync_document(db, db_obj)
+        
+        # 关联标签，标签的博客数与文章在同一事务中提交
+        tag_ids = set(obj_in.tag_ids or [])
+        for tag_id in tag_ids:
+            db.add(BlogTagRelation(blog=db_obj, tag_id=tag_id))
+        if _counted(db_obj):
+            _adjust_tag_counts(db, tag_ids, 1)
         db.commit()
+        invalidate_tags(*self.cache_tags)
         db.refresh(db_obj)
-        
-        # 关联标签
-        if obj_in.tag_ids:
-            for tag_id in obj_in.tag_ids:
-                tag_relation = BlogTagRelation(
-                    blog_id=db_obj.id,
-                    tag_id=tag_id
-                )
-                db.add(tag_relation)
-            db.commit()
-            db.refresh(db_obj)
-        
         return db_obj
 
     def update_with_tags(self, db: Session, *, db_obj: Blog, obj_in: BlogUpdate) -> Blog:
         """更新Blog文章并更新标签关联"""
+        # 计数的增减依据文章当前的状态和标签，必须从主库读取：从库延迟时会算错，并重复插入已有关联
+        stick_to_primary(db)
+        db.refresh(db_obj)
+        was_counted = _counted(db_obj)
+        old_tag_ids = {relation.tag_id for relation in db_obj.tag_relations}
+
         # 更新基本信息
         update_data = obj_in.dict(exclude_unset=True, exclude={"tag_ids"})
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         
-        # 更新标签关联
+        # 更新标签关联：只增删有变化的关联
+        new_tag_ids = old_tag_ids
         if obj_in.tag_ids is not None:
-            # 删除现有关联
-            db.query(BlogTagRelation).filter(
-                BlogTagRelation.blog_id == db_obj.id
-            ).delete()
-            
-            # 创建新关联
-            for tag_id in obj_in.tag_ids:
-                tag_relation = BlogTagRelation(
-                    blog_id=db_obj.id,
-                    tag_id=tag_id
-                )
-                db.add(tag_relation)
+            current = {relation.tag_id: relation for relation in db_obj.tag_relations}
+            new_tag_ids = set(obj_in.tag_ids)
+            for tag_id in current.keys() - new_tag_ids:
+                db_obj.tag_relations.remove(current[tag_id])
+            for tag_id in new_tag_ids - current.keys():
+                db_obj.tag_relations.append(BlogTagRelation(tag_id=tag_id))
+
+        # 标签的博客数随关联和发布状态的变化增减
+        if was_counted:
+            _adjust_tag_counts(db, old_tag_ids - new_tag_ids if _counted(db_obj) else old_tag_ids, -1)
+        if _counted(db_obj):
+            _adjust_tag_counts(db, new_tag_ids - old_tag_ids if was_counted else new_tag_ids, 1)
         
+        sync_document(db, db_obj)
         db.commit()
+        invalidate_tags(*self.cache_tags)
         db.refresh(db_obj)
         return db_obj
 
@@ -79,18 +127,32 @@ class CRUDBlog(CRUDBase[Blog, BlogCreate, BlogUpdate]):
         self, db: Session, *, skip: int = 0, limit: int = 10
     ) -> List[Blog]:
         """获取已发布的Blog列表"""
-        return db.query(Blog).filter(
+        return db.query(Blog).options(*LIST_OPTIONS).filter(
             and_(
                 Blog.status == BlogStatus.published,
                 Blog.is_deleted == False
             )
         ).order_by(desc(Blog.created_at)).offset(skip).limit(limit).all()
 
+    def get_published_by_cursor(
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 10
+    ) -> Tuple[Optional[str], List[Blog]]:
+        """游标分页获取已发布的Blog列表，返回 (next_cursor, items)"""
+        query = db.query(Blog).options(*LIST_OPTIONS).filter(
+            and_(
+                Blog.status == BlogStatus.published,
+                Blog.is_deleted == False
+            )
+        )
+        return paginate_keyset(
+            query, ((Blog.created_at, True), (Blog.id, True)), cursor=cursor, limit=limit
+        )
+
     def get_by_author(
         self, db: Session, *, author_id: int, skip: int = 0, limit: int = 10
     ) -> List[Blog]:
         """获取指定作者的Blog列表"""
-        return db.query(Blog).filter(
+        return db.query(Blog).options(*LIST_OPTIONS).filter(
             and_(
                 Blog.author_id == author_id,
                 Blog.is_deleted == False
@@ -134,58 +196,93 @@ class CRUDBlog(CRUDBase[Blog, BlogCreate, BlogUpdate]):
         total = query.count()
         
         # 分页和排序
-        blogs = query.order_by(desc(Blog.created_at)).offset(
+        blogs = query.options(*LIST_OPTIONS).order_by(desc(Blog.created_at)).offset(
             (search_params.page - 1) * search_params.size
         ).limit(search_params.size).all()
         
         return blogs, total
 
-    def increment_view_count(self, db: Session, *, blog_id: int, increment: int = 1) -> Blog:
-        """增加Blog浏览次数"""
-        db_obj = db.query(Blog).filter(Blog.id == blog_id).first()
-        if db_obj:
-            db_obj.view_count += increment
-            db.commit()
-            db.refresh(db_obj)
-        return db_obj
-
     def soft_delete(self, db: Session, *, id: int) -> Optional[Blog]:
         """软删除Blog"""
-        db_obj = db.query(Blog).filter(Blog.id == id).first()
+        stick_to_primary(db)
+        db_obj = db.query(Blog).populate_existing().filter(Blog.id == id).first()
         if db_obj:
+            if _counted(db_obj):
+                _adjust_tag_counts(db, (relation.tag_id for relation in db_obj.tag_relations), -1)
             db_obj.is_deleted = True
+            sync_document(db, db_obj)
             db.commit()
+            invalidate_tags(*self.cache_tags)
             db.refresh(db_obj)
         return db_obj
 
 
 class CRUDBlogTag(CRUDBase[BlogTag, BlogTagCreate, BlogTagUpdate]):
+    cache_tags = ("blog", "blog_tag")
+
     def get_by_name(self, db: Session, *, name: str) -> Optional[BlogTag]:
         """根据名称获取标签"""
         return db.query(BlogTag).filter(BlogTag.name == name).first()
 
     def get_popular_tags(self, db: Session, *, limit: int = 10) -> List[BlogTag]:
-        """获取热门标签（按使用次数排序）"""
-        # 使用子查询获取每个标签的使用次数
-        from sqlalchemy import func
-        
-        tag_counts = db.query(
-            BlogTag.id,
-            func.count(BlogTagRelation.id).label('count')
-        ).join(
-            BlogTagRelation, BlogTag.id == BlogTagRelation.tag_id
+        """获取热门标签（按已发布的博客数排序，走 blog_count 索引）"""
+        return db.query(BlogTag).filter(
+            BlogTag.blog_count > 0
+        ).order_by(desc(BlogTag.blog_count), BlogTag.id).limit(limit).all()
+
+    def get_count_drift(self, db: Session) -> List[dict]:
+        """按实际已发布的博客数核对各标签的计数，返回不一致的标签（与 migration_blog_tag_count.sql 的初始化查询一致）"""
+        actual = select(
+            BlogTagRelation.tag_id,
+            func.count().label("blog_count")
         ).join(
-            Blog, BlogTagRelation.blog_id == Blog.id
-        ).filter(
-            and_(Blog.is_deleted == False, Blog.status == BlogStatus.published)
-        ).group_by(BlogTag.id).subquery()
-        
-        # 获取标签及其使用次数
-        return db.query(BlogTag).join(
-            tag_counts, BlogTag.id == tag_counts.c.id
-        ).order_by(desc(tag_counts.c.count)).limit(limit).all()
+            Blog, Blog.id == BlogTagRelation.blog_id
+        ).where(
+            Blog.is_deleted == False,
+            Blog.status == BlogStatus.published
+        ).group_by(BlogTagRelation.tag_id).subquery()
+        actual_count = func.coalesce(actual.c.blog_count, 0)
+
+        rows = db.execute(
+            select(BlogTag.id, BlogTag.blog_count, actual_count.label("actual_count"))
+            .outerjoin(actual, actual.c.tag_id == BlogTag.id)
+            .where(BlogTag.blog_count != actual_count)
+            .order_by(BlogTag.id)
+        )
+        return [{"id": row.id, "blog_count": row.blog_count, "actual_count": row.actual_count} for row in rows]
+
+    def fix_counts(self, db: Session) -> int:
+        """纠正与实际不一致的标签计数，返回纠正的标签数"""
+        stick_to_primary(db)
+        drifted = self.get_count_drift(db)
+        for row in drifted:
+            # 只在计数未被并发修改时写入，否则留给下一次核对
+            db.execute(
+                update(BlogTag)
+                .where(BlogTag.id == row["id"], BlogTag.blog_count == row["blog_count"])
+                .values(blog_count=row["actual_count"])
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        if drifted:
+            invalidate_tags(*self.cache_tags)
+            logger.info(f"Corrected blog counts of {len(drifted)} blog tags")
+        return len(drifted)
 
 
 # 创建CRUD实例
 crud_blog = CRUDBlog(Blog)
-crud_blog_tag = CRUDBlogTag(BlogTag)
\ No newline at end of file
+crud_blog_tag = CRUDBlogTag(BlogTag)
+
+
+def reconcile_tag_counts(db: Session) -> int:
+    """定时任务：按实际博客数纠正标签计数，返回纠正的标签数；多进程部署时通过Redis锁只由一个进程执行"""
+    with redis_lock.hold(RECONCILE_LOCK_KEY, RECONCILE_LOCK_TTL) as acquired:
+        if not acquired:
+            return 0
+        try:
+            return crud_blog_tag.fix_counts(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Blog tag count reconcile failed: {e}")
+            return 0
@@ -7,6 +7,14 @@ import uuid
 from app.models.course_resource import CourseResource
 from app.models.user import User
 from app.schemas.course_resource import CourseResourceCreate, CourseResourceUpdate
+from app.utils.pagination import paginate_keyset
+from app.utils.view_counter import merge_pending
+
+# 游标分页的排序键
+KEYSET_ORDER = (
+    (CourseResource.created_at, True),
+    (CourseResource.id, True)
+)
 
 
 def create_course_resource(db: Session, *, resource_in: CourseResourceCreate, creator_id: int) -> CourseResource:
@@ -36,17 +44,15 @@ def get_by_name_and_type(db: Session, *, name: str, resource_type: str) -> Optio
     ).first()
 
 
-def get_multi(
+def _multi_query(
     db: Session,
     *,
-    skip: int = 0,
-    limit: int = 10,
     name: Optional[str] = None,
     resource_type: Optional[str] = None,
     status: Optional[str] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None
-) -> Tuple[int, list[CourseResource]]:
+):
     query = db.query(CourseResource).filter(CourseResource.deleted_at.is_(None))
 
     filters = []
@@ -63,6 +69,21 @@ def get_multi(
 
     if filters:
         query = query.filter(and_(*filters))
+    return query
+
+
+def get_multi(
+    db: Session,
+    *,
+    skip: int = 0,
+    limit: int = 10,
+    name: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    status: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[int, list[CourseResource]]:
+    query = _multi_query(db, name=name, resource_type=resource_type, status=status, start_time=start_time, end_time=end_time)
 
     total = query.count()
     items = query.order_by(CourseResource.created_at.desc()).offset(skip).limit(limit).all()
@@ -70,6 +91,22 @@ def get_multi(
     return total, items
 
 
+def get_multi_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    name: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    status: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[CourseResource]]:
+    """get_multi 的游标分页版本，返回 (next_cursor, items)"""
+    query = _multi_query(db, name=name, resource_type=resource_type, status=status, start_time=start_time, end_time=end_time)
+    return paginate_keyset(query, KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
 def get_published(
     db: Session,
     *,
@@ -93,6 +130,29 @@ def get_published(
     )
 
 
+def get_published_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    name: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[CourseResource]]:
+    """获取已发布的课程资源（普通用户访问）（游标分页）"""
+    return get_multi_by_cursor(
+        db,
+        cursor=cursor,
+        limit=limit,
+        name=name,
+        resource_type=resource_type,
+        status="published",
+        start_time=start_time,
+        end_time=end_time
+    )
+
+
 def update_course_resource(db: Session, *, db_obj: CourseResource, obj_in: CourseResourceUpdate) -> CourseResource:
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -135,6 +195,7 @@ def get_course_resource_detail_by_uuid(db: Session, *, uuid: str, status_filter:
         return None
     
     resource, user = result
+    merge_pending("course_resource", [resource])
     
     return {
         'uuid': resource.uuid,
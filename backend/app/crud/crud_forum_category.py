@@ -1,17 +1,36 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, select, update
+from typing import List, Optional, Tuple
 from datetime import datetime
+import logging
 import uuid
 
+from app.config.mysql_config import stick_to_primary
 from app.models.forum_category import ForumCategory
+from app.models.forum_post import ForumPost
 from app.schemas.forum_category import ForumCategoryCreate, ForumCategoryUpdate
+from app.utils import redis_lock
+from app.utils.cache import invalidate_tags
+from app.utils.pagination import paginate_keyset
+
+logger = logging.getLogger("app")
+
+RECONCILE_LOCK_KEY = "forum:category:post_count:reconcile:lock"
+RECONCILE_LOCK_TTL = 60
+
+# 游标分页的排序键
+KEYSET_ORDER = (
+    (ForumCategory.sort_order, False),
+    (ForumCategory.id, False)
+)
 
 
 def create_forum_category(db: Session, *, category_in: ForumCategoryCreate) -> ForumCategory:
     db_obj = ForumCategory(**category_in.dict(exclude={"uuid"}), uuid=str(uuid.uuid4()))
     db.add(db_obj)
     db.commit()
+    invalidate_tags("forum_category")
     db.refresh(db_obj)
     return db_obj
 
@@ -23,6 +42,13 @@ def get_forum_category_by_uuid(db: Session, *, uuid: str) -> Optional[ForumCateg
     ).first()
 
 
+async def get_forum_category_by_uuid_async(db: AsyncSession, *, uuid: str) -> Optional[ForumCategory]:
+    return await db.scalar(select(ForumCategory).where(
+        ForumCategory.uuid == uuid,
+        ForumCategory.deleted_at.is_(None)
+    ))
+
+
 def get_forum_category_by_id(db: Session, *, category_id: int) -> Optional[ForumCategory]:
     return db.query(ForumCategory).filter(
         ForumCategory.id == category_id, 
@@ -37,15 +63,13 @@ def get_by_name(db: Session, *, name: str) -> Optional[ForumCategory]:
     ).first()
 
 
-def get_multi(
+def _multi_query(
     db: Session,
     *,
-    skip: int = 0,
-    limit: int = 20,
     name: Optional[str] = None,
     is_active: Optional[bool] = None,
     include_inactive: bool = False
-) -> Tuple[int, list[ForumCategory]]:
+):
     query = db.query(ForumCategory).filter(ForumCategory.deleted_at.is_(None))
 
     filters = []
@@ -58,6 +82,19 @@ def get_multi(
 
     if filters:
         query = query.filter(and_(*filters))
+    return query
+
+
+def get_multi(
+    db: Session,
+    *,
+    skip: int = 0,
+    limit: int = 20,
+    name: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    include_inactive: bool = False
+) -> Tuple[int, list[ForumCategory]]:
+    query = _multi_query(db, name=name, is_active=is_active, include_inactive=include_inactive)
 
     total = query.count()
     items = query.order_by(ForumCategory.sort_order.asc(), ForumCategory.id.asc()).offset(skip).limit(limit).all()
@@ -65,6 +102,20 @@ def get_multi(
     return total, items
 
 
+def get_multi_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    name: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    include_inactive: bool = False
+) -> Tuple[Optional[str], list[ForumCategory]]:
+    """get_multi 的游标分页版本，返回 (next_cursor, items)"""
+    query = _multi_query(db, name=name, is_active=is_active, include_inactive=include_inactive)
+    return paginate_keyset(query, KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
 def get_active_categories(db: Session) -> list[ForumCategory]:
     """获取所有激活的分类，按排序顺序"""
     return db.query(ForumCategory).filter(
@@ -80,34 +131,102 @@ def update_forum_category(db: Session, *, db_obj: ForumCategory, obj_in: ForumCa
 
     db.add(db_obj)
     db.commit()
+    invalidate_tags("forum_category")
     db.refresh(db_obj)
     return db_obj
 
 
-def update_post_count(db: Session, *, category_id: int) -> Optional[ForumCategory]:
-    """更新分类的帖子数量统计"""
-    from app.models.forum_post import ForumPost
-    
-    category = get_forum_category_by_id(db, category_id=category_id)
-    if not category:
-        return None
-    
-    post_count = db.query(func.count(ForumPost.id)).filter(
-        ForumPost.category_id == category_id,
+def adjust_post_count(db: Session, *, category_id: int, delta: int) -> None:
+    """
+    在数据库中原子地增减分类的帖子数，不提交事务
+
+    与帖子的写入在同一事务中提交，计数随帖子一起生效或回滚；调用方提交后需清除 forum_category 缓存。
+    """
+    if delta >= 0:
+        post_count = ForumCategory.post_count + delta
+    else:
+        # 列为无符号整数，先判断再减
+        post_count = case((ForumCategory.post_count > -delta, ForumCategory.post_count + delta), else_=0)
+    db.execute(
+        update(ForumCategory)
+        .where(ForumCategory.id == category_id)
+        .values(post_count=post_count)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def get_post_count_drift(db: Session) -> List[dict]:
+    """按实际帖子数核对各分类的计数，返回不一致的分类"""
+    actual = select(
+        ForumPost.category_id,
+        func.count(ForumPost.id).label("post_count")
+    ).where(
         ForumPost.is_deleted == False,
         ForumPost.deleted_at.is_(None)
-    ).scalar()
-    
-    category.post_count = post_count or 0
-    db.add(category)
+    ).group_by(ForumPost.category_id).subquery()
+    actual_count = func.coalesce(actual.c.post_count, 0)
+
+    rows = db.execute(
+        select(
+            ForumCategory.id,
+            ForumCategory.uuid,
+            ForumCategory.name,
+            ForumCategory.post_count,
+            actual_count.label("actual_count")
+        )
+        .outerjoin(actual, actual.c.category_id == ForumCategory.id)
+        .where(ForumCategory.post_count != actual_count)
+        .order_by(ForumCategory.id)
+    )
+    return [
+        {
+            "id": row.id,
+            "uuid": row.uuid,
+            "name": row.name,
+            "post_count": row.post_count,
+            "actual_count": row.actual_count,
+            "drift": row.post_count - row.actual_count
+        }
+        for row in rows
+    ]
+
+
+def fix_post_counts(db: Session) -> int:
+    """纠正与实际不一致的分类计数，返回纠正的分类数；只写入核对期间未被修改的计数，可与定时任务同时执行"""
+    stick_to_primary(db)
+    drifted = get_post_count_drift(db)
+    for row in drifted:
+        # 只在计数未被并发修改时写入，否则留给下一次核对
+        db.execute(
+            update(ForumCategory)
+            .where(ForumCategory.id == row["id"], ForumCategory.post_count == row["post_count"])
+            .values(post_count=row["actual_count"])
+            .execution_options(synchronize_session=False)
+        )
     db.commit()
-    db.refresh(category)
-    return category
+    if drifted:
+        invalidate_tags("forum_category")
+        logger.info(f"Corrected post counts of {len(drifted)} forum categories")
+    return len(drifted)
+
+
+def reconcile_post_counts(db: Session) -> int:
+    """定时任务：按实际帖子数纠正分类计数，返回纠正的分类数；多进程部署时通过Redis锁只由一个进程执行"""
+    with redis_lock.hold(RECONCILE_LOCK_KEY, RECONCILE_LOCK_TTL) as acquired:
+        if not acquired:
+            return 0
+        try:
+            return fix_post_counts(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Forum category post count reconcile failed: {e}")
+            return 0
 
 
 def remove_forum_category(db: Session, *, db_obj: ForumCategory) -> ForumCategory:
     db_obj.deleted_at = datetime.utcnow()
     db.add(db_obj)
     db.commit()
+    invalidate_tags("forum_category")
     db.refresh(db_obj)
     return db_obj
\ No newline at end of file
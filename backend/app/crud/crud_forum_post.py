@@ -1,11 +1,25 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, desc, select, update
 from typing import Optional, Tuple
 from datetime import datetime
 import uuid
 
 from app.models.forum_post import ForumPost
 from app.schemas.forum_post import ForumPostCreate, ForumPostUpdate
+from app.crud import crud_forum_category
+from app.crud.crud_search import sync_document
+from app.services import hot_ranking
+from app.utils.cache import invalidate_tags
+from app.utils.pagination import (
+    TotalMode,
+    count_cache_key,
+    count_total,
+    count_total_async,
+    paginate_keyset,
+    paginate_keyset_async,
+    split_page,
+)
 
 
 def create_forum_post(db: Session, *, post_in: ForumPostCreate, user_id: int) -> ForumPost:
@@ -15,13 +29,13 @@ def create_forum_post(db: Session, *, post_in: ForumPostCreate, user_id: int) ->
         user_id=user_id
     )
     db.add(db_obj)
+    sync_document(db, db_obj)
+    # 分类的帖子计数与帖子在同一事务中提交
+    crud_forum_category.adjust_post_count(db, category_id=db_obj.category_id, delta=1)
     db.commit()
+    invalidate_tags("forum_post", "forum_category")
     db.refresh(db_obj)
-    
-    # 更新分类的帖子计数
-    from app.crud.crud_forum_category import update_post_count
-    update_post_count(db, category_id=db_obj.category_id)
-    
+    hot_ranking.record_post(db_obj)
     return db_obj
 
 
@@ -58,11 +72,8 @@ def get_by_title(db: Session, *, title: str, category_id: Optional[int] = None)
     return query.first()
 
 
-def get_multi(
-    db: Session,
+def _list_filters(
     *,
-    skip: int = 0,
-    limit: int = 20,
     category_id: Optional[int] = None,
     user_id: Optional[int] = None,
     title: Optional[str] = None,
@@ -70,17 +81,12 @@ def get_multi(
     is_locked: Optional[bool] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None
-) -> Tuple[int, list[ForumPost]]:
-    query = db.query(ForumPost).options(
-        joinedload(ForumPost.author),
-        joinedload(ForumPost.category),
-        joinedload(ForumPost.last_reply_user)
-    ).filter(
+) -> list:
+    """帖子列表的筛选条件，同步与异步查询共用"""
+    filters = [
         ForumPost.is_deleted == False,
         ForumPost.deleted_at.is_(None)
-    )
-
-    filters = []
+    ]
     if category_id:
         filters.append(ForumPost.category_id == category_id)
     if user_id:
@@ -95,40 +101,164 @@ def get_multi(
         filters.append(ForumPost.created_at >= start_time)
     if end_time:
         filters.append(ForumPost.created_at <= end_time)
+    return filters
 
-    if filters:
-        query = query.filter(and_(*filters))
 
-    total = query.count()
-    
-    # 置顶帖在前，然后按最后回复时间排序
-    items = query.order_by(
-        desc(ForumPost.is_pinned),
-        desc(ForumPost.last_reply_at),
-        desc(ForumPost.created_at)
-    ).offset(skip).limit(limit).all()
+# 置顶帖在前，然后按最后回复时间排序
+LIST_ORDER = (
+    desc(ForumPost.is_pinned),
+    desc(ForumPost.last_reply_at),
+    desc(ForumPost.created_at)
+)
 
-    return total, items
+# 游标分页的排序键，与 LIST_ORDER 一致，以id兜底保证唯一
+KEYSET_ORDER = (
+    (ForumPost.is_pinned, True),
+    (ForumPost.last_reply_at, True),
+    (ForumPost.created_at, True),
+    (ForumPost.id, True)
+)
 
+LIST_OPTIONS = (
+    joinedload(ForumPost.author),
+    joinedload(ForumPost.category),
+    joinedload(ForumPost.last_reply_user)
+)
 
-def get_hot_posts(db: Session, *, limit: int = 10, days: int = 7) -> list[ForumPost]:
-    """获取热门帖子（按回复数和浏览数排序）"""
-    from datetime import datetime, timedelta
-    
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
-    
-    return db.query(ForumPost).options(
-        joinedload(ForumPost.author),
-        joinedload(ForumPost.category),
-        joinedload(ForumPost.last_reply_user)
-    ).filter(
-        ForumPost.is_deleted == False,
-        ForumPost.deleted_at.is_(None),
-        ForumPost.created_at >= cutoff_date
-    ).order_by(
-        desc(ForumPost.reply_count),
-        desc(ForumPost.view_count)
-    ).limit(limit).all()
+
+def get_multi(
+    db: Session,
+    *,
+    skip: int = 0,
+    limit: int = 20,
+    category_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    title: Optional[str] = None,
+    is_pinned: Optional[bool] = None,
+    is_locked: Optional[bool] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    total_mode: TotalMode = TotalMode.exact
+) -> Tuple[Optional[int], bool, list[ForumPost]]:
+    """
+    获取帖子列表
+
+    Returns:
+        (total, has_more, items)，total按total_mode计算，none时为None
+    """
+    filters = _list_filters(
+        category_id=category_id,
+        user_id=user_id,
+        title=title,
+        is_pinned=is_pinned,
+        is_locked=is_locked,
+        start_time=start_time,
+        end_time=end_time
+    )
+    statement = select(ForumPost).where(*filters)
+    total = count_total(db, statement, mode=total_mode, key=count_cache_key("forum_post", statement))
+
+    items = db.query(ForumPost).options(*LIST_OPTIONS).filter(and_(*filters)).order_by(
+        *LIST_ORDER
+    ).offset(skip).limit(limit + 1).all()
+    has_more, items = split_page(items, limit)
+
+    return total, has_more, items
+
+
+def get_multi_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    category_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    title: Optional[str] = None,
+    is_pinned: Optional[bool] = None,
+    is_locked: Optional[bool] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[ForumPost]]:
+    """get_multi 的游标分页版本，返回 (next_cursor, items)"""
+    filters = _list_filters(
+        category_id=category_id,
+        user_id=user_id,
+        title=title,
+        is_pinned=is_pinned,
+        is_locked=is_locked,
+        start_time=start_time,
+        end_time=end_time
+    )
+    query = db.query(ForumPost).options(*LIST_OPTIONS).filter(and_(*filters))
+    return paginate_keyset(query, KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
+async def get_multi_async(
+    db: AsyncSession,
+    *,
+    skip: int = 0,
+    limit: int = 20,
+    category_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    title: Optional[str] = None,
+    is_pinned: Optional[bool] = None,
+    is_locked: Optional[bool] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    total_mode: TotalMode = TotalMode.exact
+) -> Tuple[Optional[int], bool, list[ForumPost]]:
+    """get_multi 的异步版本"""
+    filters = _list_filters(
+        category_id=category_id,
+        user_id=user_id,
+        title=title,
+        is_pinned=is_pinned,
+        is_locked=is_locked,
+        start_time=start_time,
+        end_time=end_time
+    )
+
+    statement = select(ForumPost).where(*filters)
+    total = await count_total_async(db, statement, mode=total_mode, key=count_cache_key("forum_post", statement))
+
+    result = await db.execute(
+        statement.options(*LIST_OPTIONS).order_by(*LIST_ORDER).offset(skip).limit(limit + 1)
+    )
+    has_more, items = split_page(list(result.unique().scalars().all()), limit)
+
+    return total, has_more, items
+
+
+async def get_multi_by_cursor_async(
+    db: AsyncSession,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    category_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    title: Optional[str] = None,
+    is_pinned: Optional[bool] = None,
+    is_locked: Optional[bool] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[ForumPost]]:
+    """get_multi_by_cursor 的异步版本"""
+    filters = _list_filters(
+        category_id=category_id,
+        user_id=user_id,
+        title=title,
+        is_pinned=is_pinned,
+        is_locked=is_locked,
+        start_time=start_time,
+        end_time=end_time
+    )
+    statement = select(ForumPost).options(*LIST_OPTIONS).where(*filters)
+    return await paginate_keyset_async(db, statement, KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
+def get_hot_posts(db: Session, *, limit: int = 10, days: int = 7, category_id: Optional[int] = None) -> list[ForumPost]:
+    """获取热门帖子（按时间衰减的热度排序）"""
+    return hot_ranking.get_hot_posts(db, limit=limit, days=days, category_id=category_id)
 
 
 def update_forum_post(db: Session, *, db_obj: ForumPost, obj_in: ForumPostUpdate) -> ForumPost:
@@ -139,45 +269,57 @@ def update_forum_post(db: Session, *, db_obj: ForumPost, obj_in: ForumPostUpdate
         setattr(db_obj, field, value)
 
     db.add(db_obj)
+    sync_document(db, db_obj)
+    category_changed = old_category_id != db_obj.category_id
+    # 如果分类发生变化，在同一事务中转移帖子计数
+    if category_changed:
+        crud_forum_category.adjust_post_count(db, category_id=old_category_id, delta=-1)
+        crud_forum_category.adjust_post_count(db, category_id=db_obj.category_id, delta=1)
     db.commit()
+    invalidate_tags("forum_post", "forum_category")
     db.refresh(db_obj)
-    
-    # 如果分类发生变化，更新相关分类的帖子计数
-    if old_category_id != db_obj.category_id:
-        from app.crud.crud_forum_category import update_post_count
-        update_post_count(db, category_id=old_category_id)
-        update_post_count(db, category_id=db_obj.category_id)
-    
+    if category_changed:
+        hot_ranking.move_post(db_obj, old_category_id)
     return db_obj
 
 
-def increment_view_count(db: Session, *, db_obj: ForumPost) -> ForumPost:
-    """增加浏览数"""
-    db_obj.view_count += 1
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
-    return db_obj
-
+def allocate_reply_floor(db: Session, *, post_id: int, user_id: int) -> Optional[int]:
+    """
+    为新回复分配楼层号并更新帖子的回复统计，不提交事务，帖子不存在时返回None
 
-def update_reply_info(db: Session, *, post_id: int, user_id: int, increment: bool = True) -> Optional[ForumPost]:
-    """更新帖子回复信息"""
-    post = get_forum_post_by_id(db, post_id=post_id)
-    if not post:
+    楼层号取自帖子的 floor_seq 计数器：UPDATE 锁住帖子行直到事务提交，并发回复依次取号，
+    调用方应在同一事务中插入回复后再提交。楼层号只增不减，删除回复后不会被重复使用。
+    """
+    result = db.execute(
+        update(ForumPost)
+        .where(ForumPost.id == post_id)
+        .values(
+            floor_seq=ForumPost.floor_seq + 1,
+            reply_count=ForumPost.reply_count + 1,
+            last_reply_at=datetime.utcnow(),
+            last_reply_user_id=user_id
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
         return None
-    
+    # 同一事务内读到的是本次UPDATE后的值
+    return db.execute(select(ForumPost.floor_seq).where(ForumPost.id == post_id)).scalar()
+
+
+def update_reply_info(db: Session, *, post_id: int, user_id: int, increment: bool = True) -> None:
+    """在数据库中原子地更新帖子回复信息，不提交事务"""
     if increment:
-        post.reply_count += 1
+        reply_count = ForumPost.reply_count + 1
     else:
-        post.reply_count = max(0, post.reply_count - 1)
-    
-    post.last_reply_at = datetime.utcnow()
-    post.last_reply_user_id = user_id
-    
-    db.add(post)
-    db.commit()
-    db.refresh(post)
-    return post
+        # 列为无符号整数，先判断再减
+        reply_count = case((ForumPost.reply_count > 0, ForumPost.reply_count - 1), else_=0)
+    db.execute(
+        update(ForumPost)
+        .where(ForumPost.id == post_id)
+        .values(reply_count=reply_count, last_reply_at=datetime.utcnow(), last_reply_user_id=user_id)
+        .execution_options(synchronize_session=False)
+    )
 
 
 def pin_post(db: Session, *, db_obj: ForumPost, pinned: bool = True) -> ForumPost:
@@ -185,6 +327,7 @@ def pin_post(db: Session, *, db_obj: ForumPost, pinned: bool = True) -> ForumPos
     db_obj.is_pinned = pinned
     db.add(db_obj)
     db.commit()
+    invalidate_tags("forum_post")
     db.refresh(db_obj)
     return db_obj
 
@@ -194,6 +337,7 @@ def lock_post(db: Session, *, db_obj: ForumPost, locked: bool = True) -> ForumPo
     db_obj.is_locked = locked
     db.add(db_obj)
     db.commit()
+    invalidate_tags("forum_post")
     db.refresh(db_obj)
     return db_obj
 
@@ -203,11 +347,10 @@ def remove_forum_post(db: Session, *, db_obj: ForumPost) -> ForumPost:
     db_obj.is_deleted = True
     db_obj.deleted_at = datetime.utcnow()
     db.add(db_obj)
+    sync_document(db, db_obj)
+    crud_forum_category.adjust_post_count(db, category_id=db_obj.category_id, delta=-1)
     db.commit()
+    invalidate_tags("forum_post", "forum_category")
     db.refresh(db_obj)
-    
-    # 更新分类的帖子计数
-    from app.crud.crud_forum_category import update_post_count
-    update_post_count(db, category_id=db_obj.category_id)
-    
+    hot_ranking.remove_post(db_obj)
     return db_obj
\ No newline at end of file
@@ -1,16 +1,68 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func, desc
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import and_, desc, func, select
 from typing import Optional, Tuple, List
 from datetime import datetime
 import uuid
 
 from app.models.forum_reply import ForumReply
+from app.models.user import User
 from app.schemas.forum_reply import ForumReplyCreate, ForumReplyUpdate
+from app.utils.pagination import paginate_keyset
 
+# 路径中每级楼层号的宽度，path列最多容纳 MAX_REPLY_DEPTH + 1 级
+PATH_SEGMENT_WIDTH = 8
+MAX_REPLY_DEPTH = 30
 
-def create_forum_reply(db: Session, *, reply_in: ForumReplyCreate, user_id: int) -> ForumReply:
-    # 计算楼层号
-    floor_number = get_next_floor_number(db, post_id=reply_in.post_id)
+# 游标分页的排序键：帖子内按楼层，用户回复按时间倒序
+POST_REPLIES_KEYSET_ORDER = (
+    (ForumReply.floor_number, False),
+    (ForumReply.id, False)
+)
+USER_REPLIES_KEYSET_ORDER = (
+    (ForumReply.created_at, True),
+    (ForumReply.id, True)
+)
+# 同一顶级回复下的子回复按树的先序遍历，path在帖子内唯一
+THREAD_CHILDREN_KEYSET_ORDER = (
+    (ForumReply.path, False),
+    (ForumReply.id, False)
+)
+
+_Author = aliased(User)
+_ReplyToUser = aliased(User)
+
+# 直接查询列而不加载ORM对象，作者信息通过连接取得
+_THREAD_COLUMNS = (
+    ForumReply.id,
+    ForumReply.uuid,
+    ForumReply.content,
+    ForumReply.post_id,
+    ForumReply.user_id,
+    ForumReply.parent_id,
+    ForumReply.reply_to_user_id,
+    ForumReply.is_deleted,
+    ForumReply.floor_number,
+    ForumReply.root_id,
+    ForumReply.depth,
+    ForumReply.created_at,
+    ForumReply.updated_at,
+)
+_USER_FIELDS = ("username", "real_name", "avatar_url")
+
+
+def _path_segment(floor_number: Optional[int]) -> str:
+    return str(floor_number or 0).zfill(PATH_SEGMENT_WIDTH)
+
+
+def create_forum_reply(
+    db: Session, *, reply_in: ForumReplyCreate, user_id: int, parent: Optional[ForumReply] = None
+) -> ForumReply:
+    # 分配楼层号并更新帖子回复信息，与插入回复在同一事务中提交
+    from app.crud.crud_forum_post import allocate_reply_floor
+    floor_number = allocate_reply_floor(db, post_id=reply_in.post_id, user_id=user_id)
+    
+    if reply_in.parent_id and parent is None:
+        parent = get_forum_reply_by_id(db, reply_id=reply_in.parent_id)
     
     db_obj = ForumReply(
         **reply_in.dict(exclude={"uuid"}), 
@@ -18,14 +70,21 @@ def create_forum_reply(db: Session, *, reply_in: ForumReplyCreate, user_id: int)
         user_id=user_id,
         floor_number=floor_number
     )
+    if parent is not None:
+        db_obj.root_id = parent.root_id or parent.id
+        db_obj.depth = parent.depth + 1
+        db_obj.path = (parent.path or _path_segment(parent.floor_number)) + _path_segment(floor_number)
+    else:
+        db_obj.depth = 0
+        db_obj.path = _path_segment(floor_number)
     db.add(db_obj)
+    if parent is None:
+        # 顶级回复的root_id为自身id，插入后才知道
+        db.flush()
+        db_obj.root_id = db_obj.id
     db.commit()
     db.refresh(db_obj)
     
-    # 更新帖子回复信息
-    from app.crud.crud_forum_post import update_reply_info
-    update_reply_info(db, post_id=db_obj.post_id, user_id=user_id, increment=True)
-    
     return db_obj
 
 
@@ -48,17 +107,6 @@ def get_forum_reply_by_id(db: Session, *, reply_id: int) -> Optional[ForumReply]
     ).first()
 
 
-def get_next_floor_number(db: Session, *, post_id: int) -> int:
-    """获取下一个楼层号"""
-    max_floor = db.query(func.max(ForumReply.floor_number)).filter(
-        ForumReply.post_id == post_id,
-        ForumReply.is_deleted == False,
-        ForumReply.deleted_at.is_(None)
-    ).scalar()
-    
-    return (max_floor or 0) + 1
-
-
 def get_replies_by_post(
     db: Session,
     *,
@@ -89,31 +137,150 @@ def get_replies_by_post(
     return total, items
 
 
-def get_replies_tree(db: Session, *, post_id: int) -> List[ForumReply]:
-    """获取帖子的回复树结构"""
-    # 获取所有回复
-    all_replies = db.query(ForumReply).options(
+def get_replies_by_post_by_cursor(
+    db: Session,
+    *,
+    post_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    parent_id: Optional[int] = None
+) -> Tuple[Optional[str], List[ForumReply]]:
+    """游标分页获取帖子的回复列表，返回 (next_cursor, items)"""
+    query = db.query(ForumReply).options(
         joinedload(ForumReply.author),
         joinedload(ForumReply.reply_to_user)
     ).filter(
         ForumReply.post_id == post_id,
         ForumReply.is_deleted == False,
         ForumReply.deleted_at.is_(None)
-    ).order_by(ForumReply.floor_number.asc()).all()
+    )
     
-    # 构建树结构
-    reply_dict = {reply.id: reply for reply in all_replies}
-    root_replies = []
+    if parent_id is not None:
+        query = query.filter(ForumReply.parent_id == parent_id)
+    else:
+        # 只获取顶级回复（没有父回复的）
+        query = query.filter(ForumReply.parent_id.is_(None))
+    
+    return paginate_keyset(query, POST_REPLIES_KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
+def _alive():
+    return and_(ForumReply.is_deleted == False, ForumReply.deleted_at.is_(None))
+
+
+def _with_users(rows, columns):
+    """在回复列的查询上连接作者和被回复用户"""
+    return select(
+        *columns,
+        *[getattr(_Author, field).label(f"author_{field}") for field in _USER_FIELDS],
+        *[getattr(_ReplyToUser, field).label(f"reply_to_{field}") for field in _USER_FIELDS],
+    ).select_from(rows).outerjoin(
+        _Author, _Author.id == rows.c.user_id
+    ).outerjoin(
+        _ReplyToUser, _ReplyToUser.id == rows.c.reply_to_user_id
+    )
+
+
+def _user(row: dict, prefix: str) -> Optional[dict]:
+    if row[f"{prefix}username"] is None:
+        return None
+    return {field: row[f"{prefix}{field}"] for field in _USER_FIELDS}
+
+
+def _serialize(row) -> dict:
+    """查询结果行 -> 与 ForumReplyResponse 相同结构的字典"""
+    row = dict(row._mapping)
+    item = {column.key: row[column.key] for column in _THREAD_COLUMNS}
+    item["author"] = _user(row, "author_")
+    item["reply_to_user"] = _user(row, "reply_to_")
+    return item
+
+
+def get_thread_page(
+    db: Session,
+    *,
+    post_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    children_limit: int = 3
+) -> List[dict]:
+    """
+    一次查询取得一页顶级回复及每个顶级回复下按先序排列的前 children_limit 条子回复
+
+    返回顶级回复字典列表，每项带 children（含depth，可据此缩进）和 child_count（子回复总数），
+    子回复未取全时客户端用 get_thread_children 继续加载。
+    """
+    page = select(ForumReply.id).where(
+        ForumReply.post_id == post_id,
+        ForumReply.parent_id.is_(None),
+        _alive()
+    ).order_by(ForumReply.floor_number.asc(), ForumReply.id.asc()).offset(skip).limit(limit).cte("page")
+    
+    ranked = select(
+        *_THREAD_COLUMNS,
+        ForumReply.path,
+        func.row_number().over(partition_by=ForumReply.root_id, order_by=ForumReply.path).label("rn"),
+        func.count().over(partition_by=ForumReply.root_id).label("thread_size"),
+    ).join(page, ForumReply.root_id == page.c.id).where(_alive()).subquery("ranked")
+    
+    # 顶级回复的path是其子回复path的前缀，排在各自分组的第一位
+    query = _with_users(ranked, [ranked.c[column.key] for column in _THREAD_COLUMNS] + [ranked.c.thread_size]).where(
+        ranked.c.rn <= children_limit + 1
+    ).order_by(ranked.c.path)
     
-    for reply in all_replies:
-        if reply.parent_id is None:
-            root_replies.append(reply)
+    threads = []
+    for row in db.execute(query):
+        item = _serialize(row)
+        if item["parent_id"] is None:
+            item["child_count"] = row.thread_size - 1
+            item["children"] = []
+            threads.append(item)
+        elif threads and threads[-1]["id"] == item["root_id"]:
+            threads[-1]["children"].append(item)
+    return threads
+
+
+def get_thread_children(
+    db: Session,
+    *,
+    root_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 20
+) -> Tuple[Optional[str], List[ForumReply]]:
+    """游标分页获取顶级回复下的全部子回复（先序），返回 (next_cursor, items)"""
+    query = db.query(ForumReply).options(
+        joinedload(ForumReply.author),
+        joinedload(ForumReply.reply_to_user)
+    ).filter(
+        ForumReply.root_id == root_id,
+        ForumReply.id != root_id,
+        _alive()
+    )
+    
+    return paginate_keyset(query, THREAD_CHILDREN_KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
+def get_replies_tree(db: Session, *, post_id: int) -> List[dict]:
+    """获取帖子的回复树结构，返回带 children 的顶级回复字典列表"""
+    rows = select(*_THREAD_COLUMNS, ForumReply.path).where(
+        ForumReply.post_id == post_id,
+        _alive()
+    ).subquery("replies")
+    query = _with_users(rows, [rows.c[column.key] for column in _THREAD_COLUMNS]).order_by(rows.c.path)
+    
+    # 按先序遍历，父回复总在子回复之前
+    reply_dict = {}
+    root_replies = []
+    for row in db.execute(query):
+        item = _serialize(row)
+        item["children"] = []
+        reply_dict[item["id"]] = item
+        if item["parent_id"] is None:
+            root_replies.append(item)
         else:
-            parent = reply_dict.get(reply.parent_id)
+            parent = reply_dict.get(item["parent_id"])
             if parent:
-                if not hasattr(parent, 'children'):
-                    parent.children = []
-                parent.children.append(reply)
+                parent["children"].append(item)
     
     return root_replies
 
@@ -138,6 +305,23 @@ def get_user_replies(
     return total, items
 
 
+def get_user_replies_by_cursor(
+    db: Session,
+    *,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 20
+) -> Tuple[Optional[str], List[ForumReply]]:
+    """游标分页获取用户的回复列表，返回 (next_cursor, items)"""
+    query = db.query(ForumReply).filter(
+        ForumReply.user_id == user_id,
+        ForumReply.is_deleted == False,
+        ForumReply.deleted_at.is_(None)
+    )
+    
+    return paginate_keyset(query, USER_REPLIES_KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
 def update_forum_reply(db: Session, *, db_obj: ForumReply, obj_in: ForumReplyUpdate) -> ForumReply:
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -154,13 +338,13 @@ def remove_forum_reply(db: Session, *, db_obj: ForumReply) -> ForumReply:
     db_obj.is_deleted = True
     db_obj.deleted_at = datetime.utcnow()
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
     
-    # 更新帖子回复信息
+    # 更新帖子回复信息，与删除在同一事务中提交
     from app.crud.crud_forum_post import update_reply_info
     update_reply_info(db, post_id=db_obj.post_id, user_id=db_obj.user_id, increment=False)
     
+    db.commit()
+    db.refresh(db_obj)
     return db_obj
 
 
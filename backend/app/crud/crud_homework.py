@@ -7,6 +7,10 @@ import uuid
 from app.models.homework import Homework
 from app.models.user import User
 from app.schemas.homework import HomeworkCreate, HomeworkUpdate
+from app.utils.pagination import paginate_keyset
+
+# 游标分页的排序键，与列表默认的主键顺序一致
+KEYSET_ORDER = ((Homework.id, False),)
 
 
 def create_homework(db: Session, *, homework_in: HomeworkCreate, creator_id: int) -> Homework:
@@ -69,16 +73,14 @@ def get_by_name(db: Session, *, name: str) -> Optional[Homework]:
     return db.query(Homework).filter(Homework.name == name, Homework.deleted_at.is_(None)).first()
 
 
-def get_multi(
+def _multi_query(
     db: Session,
     *,
-    skip: int = 0,
-    limit: int = 10,
     name: Optional[str] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
     status: Optional[str] = None
-) -> Tuple[int, list[Homework]]:
+):
     query = db.query(Homework).filter(Homework.deleted_at.is_(None))
 
     filters = []
@@ -93,6 +95,20 @@ def get_multi(
 
     if filters:
         query = query.filter(and_(*filters))
+    return query
+
+
+def get_multi(
+    db: Session,
+    *,
+    skip: int = 0,
+    limit: int = 10,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    status: Optional[str] = None
+) -> Tuple[int, list[Homework]]:
+    query = _multi_query(db, name=name, start_time=start_time, end_time=end_time, status=status)
 
     total = query.count()
     items = query.offset(skip).limit(limit).all()
@@ -100,6 +116,21 @@ def get_multi(
     return total, items
 
 
+def get_multi_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    status: Optional[str] = None
+) -> Tuple[Optional[str], list[Homework]]:
+    """get_multi 的游标分页版本，返回 (next_cursor, items)"""
+    query = _multi_query(db, name=name, start_time=start_time, end_time=end_time, status=status)
+    return paginate_keyset(query, KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
 def update_homework(db: Session, *, db_obj: Homework, obj_in: HomeworkUpdate) -> Homework:
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -1,165 +1,259 @@
+import logging
 import uuid
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import case, delete, func, insert, select, tuple_, update
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from redis.exceptions import RedisError, ResponseError
 
+from app.config.mysql_config import stick_to_primary
+from app.config.redis_config import redis_client
 from app.models.showcase_like import ShowcaseLike
 from app.models.showcase_comment_like import ShowcaseCommentLike
 from app.models.showcase_comment_reply_like import ShowcaseCommentReplyLike
 from app.models.showcase import Showcase
 from app.models.showcase_comment import ShowcaseComment
 from app.models.showcase_comment_reply import ShowcaseCommentReply
-from app.schemas.like import ShowcaseLikeCreate, ShowcaseCommentLikeCreate, ShowcaseCommentReplyLikeCreate
+from app.models.stale_like import StaleLike
+from app.utils import redis_lock
 
+logger = logging.getLogger("app")
 
-class CRUDShowcaseLike:
-    
-    def create_showcase_like(self, db: Session, *, like_in: ShowcaseLikeCreate, user_id: int, showcase_id: int) -> ShowcaseLike:
-        """创建作品点赞"""
-        db_obj = ShowcaseLike(
-            uuid=str(uuid.uuid4()),
-            showcase_id=showcase_id,
-            user_id=user_id
-        )
-        db.add(db_obj)
-        
+# 点赞集合 likes:{kind}:{id} 保存点赞用户id，并固定包含哨兵成员0：
+# 集合存在即表示已从MySQL加载，点赞数为 SCARD - 1
+SENTINEL = 0
+SET_TTL = 7 * 24 * 3600
+RECONCILE_LOCK_KEY = "likes:reconcile:lock"
+RECONCILE_LOCK_TTL = 60
+
+# KEYS[1]=点赞集合 KEYS[2]=待写回hash；ARGV[1]=用户id ARGV[2]=hash字段 ARGV[3]=集合TTL
+# 返回 {是否已点赞, 点赞数}，集合未加载时返回 {-1, 0}
+TOGGLE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1, 0}
+end
+local liked = 1
+if redis.call('SREM', KEYS[1], ARGV[1]) == 1 then
+    liked = 0
+else
+    redis.call('SADD', KEYS[1], ARGV[1])
+end
+redis.call('HSET', KEYS[2], ARGV[2], liked)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {liked, redis.call('SCARD', KEYS[1]) - 1}
+"""
+
+# 仅在集合不存在时加载，避免覆盖并发切换的结果；ARGV[1]=TTL ARGV[2..]=成员
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+for i = 2, #ARGV, 1000 do
+    redis.call('SADD', KEYS[1], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+_toggle_script = redis_client.register_script(TOGGLE_SCRIPT)
+_load_script = redis_client.register_script(LOAD_SCRIPT)
+
+
+class CRUDLike:
+    """
+    点赞的读写以Redis为准：切换点赞是一次Lua调用，最终状态记入 likes:pending:{kind}，
+    由 reconcile 定时批量写回点赞表并按点赞表重算 likes_count。Redis不可用时直接读写MySQL，
+    同时在 stale_likes 表中记录，Redis恢复后由任一进程据此删除受影响对象的点赞集合和待写回记录，
+    避免旧状态被读取或写回。
+    """
+
+    def __init__(self, kind: str, model, target_column, target_model):
+        self.kind = kind
+        self.model = model
+        self.target_column = target_column
+        self.target_model = target_model
+
+    def _set_key(self, target_id: int) -> str:
+        return f"likes:{self.kind}:{target_id}"
+
+    @property
+    def _pending_key(self) -> str:
+        return f"likes:pending:{self.kind}"
+
+    @property
+    def _flushing_key(self) -> str:
+        return f"likes:flushing:{self.kind}"
+
+    def _clear_stale(self, db: Session, target_ids: Optional[list] = None) -> None:
+        """
+        删除直接写过MySQL的对象的点赞集合（下次从MySQL重新加载）及其待写回记录，再删除 stale_likes 中的记录
+
+        传入target_ids时只处理这些对象。Redis仍不可用时抛出RedisError，记录保留到下次清除。
+        """
+        query = db.query(StaleLike.id, StaleLike.target_id, StaleLike.user_id).filter(StaleLike.kind == self.kind)
+        if target_ids is not None:
+            query = query.filter(StaleLike.target_id.in_(target_ids))
+        stale = query.all()
+        if not stale:
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        for _, target_id, user_id in stale:
+            pipe.delete(self._set_key(target_id))
+            pipe.hdel(self._pending_key, f"{target_id}:{user_id}")
+            pipe.hdel(self._flushing_key, f"{target_id}:{user_id}")
+        pipe.execute()
+        db.execute(delete(StaleLike).where(StaleLike.id.in_([stale_id for stale_id, _, _ in stale])))
+        db.commit()
+
+    def _ensure_loaded(self, db: Session, target_ids: list) -> None:
+        """把尚未加载的点赞集合从MySQL加载到Redis，所有对象共用一次查询"""
+        self._clear_stale(db, target_ids)
+        pipe = redis_client.pipeline(transaction=False)
+        for target_id in target_ids:
+            pipe.exists(self._set_key(target_id))
+        missing = [target_id for target_id, exists in zip(target_ids, pipe.execute()) if not exists]
+        if not missing:
+            return
+
+        members = {target_id: [SENTINEL] for target_id in missing}
+        # 从库延迟时会加载到旧的点赞状态，并在集合过期前一直以它为准
+        stick_to_primary(db)
+        rows = db.query(self.target_column, self.model.user_id).filter(self.target_column.in_(missing)).all()
+        for target_id, user_id in rows:
+            members[target_id].append(user_id)
+
+        pipe = redis_client.pipeline(transaction=False)
+        for target_id, user_ids in members.items():
+            _load_script(keys=[self._set_key(target_id)], args=[SET_TTL, *user_ids], client=pipe)
+        pipe.execute()
+
+    def toggle(self, db: Session, *, target_id: int, user_id: int) -> Tuple[bool, int]:
+        """切换点赞状态，返回 (是否已点赞, 点赞数)"""
         try:
-            db.commit()
-            # 更新作品点赞数
-            db.query(Showcase).filter(Showcase.id == showcase_id).update(
-                {Showcase.likes_count: Showcase.likes_count + 1}
-            )
-            db.commit()
-            db.refresh(db_obj)
-            return db_obj
-        except IntegrityError:
-            db.rollback()
-            raise ValueError("Already liked")
-    
-    def remove_showcase_like(self, db: Session, *, user_id: int, showcase_id: int) -> bool:
-        """删除作品点赞"""
-        like_obj = db.query(ShowcaseLike).filter(
-            ShowcaseLike.user_id == user_id,
-            ShowcaseLike.showcase_id == showcase_id
-        ).first()
-        
-        if like_obj:
-            db.delete(like_obj)
-            # 更新作品点赞数
-            db.query(Showcase).filter(Showcase.id == showcase_id).update(
-                {Showcase.likes_count: Showcase.likes_count - 1}
-            )
-            db.commit()
-            return True
-        return False
-    
-    def get_showcase_like(self, db: Session, *, user_id: int, showcase_id: int) -> Optional[ShowcaseLike]:
-        """获取用户对作品的点赞"""
-        return db.query(ShowcaseLike).filter(
-            ShowcaseLike.user_id == user_id,
-            ShowcaseLike.showcase_id == showcase_id
-        ).first()
-
-
-class CRUDShowcaseCommentLike:
-    
-    def create_comment_like(self, db: Session, *, like_in: ShowcaseCommentLikeCreate, user_id: int, comment_id: int) -> ShowcaseCommentLike:
-        """创建评论点赞"""
-        db_obj = ShowcaseCommentLike(
-            uuid=str(uuid.uuid4()),
-            comment_id=comment_id,
-            user_id=user_id
+            # 直接写MySQL的记录必须读主库，否则从库延迟时会按旧的点赞集合切换
+            stick_to_primary(db)
+            self._clear_stale(db, [target_id])
+            for _ in range(2):
+                liked, count = _toggle_script(
+                    keys=[self._set_key(target_id), self._pending_key],
+                    args=[user_id, f"{target_id}:{user_id}", SET_TTL]
+                )
+                if liked >= 0:
+                    return bool(liked), count
+                self._ensure_loaded(db, [target_id])
+        except RedisError as e:
+            logger.warning(f"Like toggle via Redis failed, writing through: {e}")
+        return self._toggle_db(db, target_id=target_id, user_id=user_id)
+
+    def _toggle_db(self, db: Session, *, target_id: int, user_id: int) -> Tuple[bool, int]:
+        target_key = self.target_column.key
+        removed = db.execute(
+            delete(self.model).where(self.target_column == target_id, self.model.user_id == user_id)
+        ).rowcount
+        if not removed:
+            db.add(self.model(uuid=str(uuid.uuid4()), user_id=user_id, **{target_key: target_id}))
+        likes_count = self.target_model.likes_count
+        db.execute(
+            update(self.target_model).where(self.target_model.id == target_id).values(
+                # likes_count 为无符号列，取消点赞时不减到0以下
+                likes_count=case((likes_count > 0, likes_count - 1), else_=0) if removed else likes_count + 1
+            ),
+            execution_options={"synchronize_session": False}
         )
-        db.add(db_obj)
-        
+        db.add(StaleLike(kind=self.kind, target_id=target_id, user_id=user_id))
+        db.commit()
         try:
-            db.commit()
-            # 更新评论点赞数
-            db.query(ShowcaseComment).filter(ShowcaseComment.id == comment_id).update(
-                {ShowcaseComment.likes_count: ShowcaseComment.likes_count + 1}
-            )
-            db.commit()
-            db.refresh(db_obj)
-            return db_obj
-        except IntegrityError:
-            db.rollback()
-            raise ValueError("Already liked")
-    
-    def remove_comment_like(self, db: Session, *, user_id: int, comment_id: int) -> bool:
-        """删除评论点赞"""
-        like_obj = db.query(ShowcaseCommentLike).filter(
-            ShowcaseCommentLike.user_id == user_id,
-            ShowcaseCommentLike.comment_id == comment_id
-        ).first()
-        
-        if like_obj:
-            db.delete(like_obj)
-            # 更新评论点赞数
-            db.query(ShowcaseComment).filter(ShowcaseComment.id == comment_id).update(
-                {ShowcaseComment.likes_count: ShowcaseComment.likes_count - 1}
-            )
-            db.commit()
-            return True
-        return False
-    
-    def get_comment_like(self, db: Session, *, user_id: int, comment_id: int) -> Optional[ShowcaseCommentLike]:
-        """获取用户对评论的点赞"""
-        return db.query(ShowcaseCommentLike).filter(
-            ShowcaseCommentLike.user_id == user_id,
-            ShowcaseCommentLike.comment_id == comment_id
-        ).first()
-
-
-class CRUDShowcaseCommentReplyLike:
-    
-    def create_reply_like(self, db: Session, *, like_in: ShowcaseCommentReplyLikeCreate, user_id: int, reply_id: int) -> ShowcaseCommentReplyLike:
-        """创建回复点赞"""
-        db_obj = ShowcaseCommentReplyLike(
-            uuid=str(uuid.uuid4()),
-            reply_id=reply_id,
-            user_id=user_id
-        )
-        db.add(db_obj)
-        
+            self._clear_stale(db, [target_id])
+        except RedisError as e:
+            logger.warning(f"Clearing like state in Redis failed, will retry: {e}")
+        count = db.scalar(select(self.target_model.likes_count).where(self.target_model.id == target_id))
+        return not removed, count or 0
+
+    def is_liked(self, db: Session, *, target_id: int, user_id: int) -> bool:
+        return target_id in self.get_liked_ids(db, target_ids=[target_id], user_id=user_id)
+
+    def get_liked_ids(self, db: Session, *, target_ids: Iterable[int], user_id: int) -> Set[int]:
+        """批量查询用户点赞过其中哪些对象"""
+        target_ids = list(set(target_ids))
+        if not target_ids:
+            return set()
         try:
-            db.commit()
-            # 更新回复点赞数
-            db.query(ShowcaseCommentReply).filter(ShowcaseCommentReply.id == reply_id).update(
-                {ShowcaseCommentReply.likes_count: ShowcaseCommentReply.likes_count + 1}
+            self._ensure_loaded(db, target_ids)
+            pipe = redis_client.pipeline(transaction=False)
+            for target_id in target_ids:
+                pipe.sismember(self._set_key(target_id), user_id)
+            return {target_id for target_id, liked in zip(target_ids, pipe.execute()) if liked}
+        except RedisError as e:
+            logger.warning(f"Like lookup via Redis failed, reading MySQL: {e}")
+        rows = db.query(self.target_column).filter(
+            self.model.user_id == user_id,
+            self.target_column.in_(target_ids)
+        ).all()
+        return {row[0] for row in rows}
+
+    def get_liked_status_by_uuids(self, db: Session, *, uuids: List[str], user_id: int) -> Dict[str, bool]:
+        """按uuid批量查询点赞状态，不存在或已删除的对象不出现在结果中"""
+        if not uuids:
+            return {}
+        rows = db.query(self.target_model.uuid, self.target_model.id).filter(
+            self.target_model.uuid.in_(set(uuids)),
+            self.target_model.deleted_at.is_(None)
+        ).all()
+        liked_ids = self.get_liked_ids(db, target_ids=[target_id for _, target_id in rows], user_id=user_id)
+        return {target_uuid: target_id in liked_ids for target_uuid, target_id in rows}
+
+    def reconcile(self, db: Session) -> int:
+        """把待写回的点赞状态批量写入点赞表，并重算受影响对象的likes_count，返回写回的操作数"""
+        # 先清除已直接写入MySQL的状态，否则旧的待写回记录会覆盖它
+        stick_to_primary(db)
+        self._clear_stale(db)
+        if not redis_client.exists(self._flushing_key):
+            try:
+                redis_client.renamenx(self._pending_key, self._flushing_key)
+            except ResponseError:
+                # 没有待写回的点赞
+                return 0
+        ops = redis_client.hgetall(self._flushing_key)
+        adds, removes = [], []
+        for field, state in ops.items():
+            target_id, user_id = (int(part) for part in field.split(b":"))
+            (adds if int(state) else removes).append((target_id, user_id))
+
+        if removes:
+            db.execute(delete(self.model).where(tuple_(self.target_column, self.model.user_id).in_(removes)))
+        if adds:
+            target_key = self.target_column.key
+            db.execute(
+                insert(self.model).prefix_with("IGNORE"),
+                [{"uuid": str(uuid.uuid4()), target_key: target_id, "user_id": user_id} for target_id, user_id in adds]
             )
-            db.commit()
-            db.refresh(db_obj)
-            return db_obj
-        except IntegrityError:
-            db.rollback()
-            raise ValueError("Already liked")
-    
-    def remove_reply_like(self, db: Session, *, user_id: int, reply_id: int) -> bool:
-        """删除回复点赞"""
-        like_obj = db.query(ShowcaseCommentReplyLike).filter(
-            ShowcaseCommentReplyLike.user_id == user_id,
-            ShowcaseCommentReplyLike.reply_id == reply_id
-        ).first()
-        
-        if like_obj:
-            db.delete(like_obj)
-            # 更新回复点赞数
-            db.query(ShowcaseCommentReply).filter(ShowcaseCommentReply.id == reply_id).update(
-                {ShowcaseCommentReply.likes_count: ShowcaseCommentReply.likes_count - 1}
+        targets = {target_id for target_id, _ in adds + removes}
+        if targets:
+            count = select(func.count()).where(self.target_column == self.target_model.id).scalar_subquery()
+            db.execute(
+                update(self.target_model).where(self.target_model.id.in_(targets)).values(likes_count=count),
+                execution_options={"synchronize_session": False}
             )
-            db.commit()
-            return True
-        return False
-    
-    def get_reply_like(self, db: Session, *, user_id: int, reply_id: int) -> Optional[ShowcaseCommentReplyLike]:
-        """获取用户对回复的点赞"""
-        return db.query(ShowcaseCommentReplyLike).filter(
-            ShowcaseCommentReplyLike.user_id == user_id,
-            ShowcaseCommentReplyLike.reply_id == reply_id
-        ).first()
+        db.commit()
+        redis_client.delete(self._flushing_key)
+        return len(ops)
 
 
 # 实例化CRUD对象
-crud_showcase_like = CRUDShowcaseLike()
-crud_showcase_comment_like = CRUDShowcaseCommentLike()
-crud_showcase_comment_reply_like = CRUDShowcaseCommentReplyLike()
\ No newline at end of file
+crud_showcase_like = CRUDLike("showcase", ShowcaseLike, ShowcaseLike.showcase_id, Showcase)
+crud_showcase_comment_like = CRUDLike("comment", ShowcaseCommentLike, ShowcaseCommentLike.comment_id, ShowcaseComment)
+crud_showcase_comment_reply_like = CRUDLike("reply", ShowcaseCommentReplyLike, ShowcaseCommentReplyLike.reply_id, ShowcaseCommentReply)
+
+
+def reconcile_likes(db: Session) -> int:
+    """定时任务：写回所有类型的点赞，多进程部署时通过Redis锁保证同一时刻只有一个进程在写回"""
+    total = 0
+    with redis_lock.hold(RECONCILE_LOCK_KEY, RECONCILE_LOCK_TTL) as acquired:
+        if not acquired:
+            return 0
+        for crud in (crud_showcase_like, crud_showcase_comment_like, crud_showcase_comment_reply_like):
+            try:
+                total += crud.reconcile(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Like reconcile failed for {crud.kind}: {e}")
+    return total
@@ -1,15 +1,128 @@
+import logging
 import uuid
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, insert, literal, or_, select, union_all, update
+from starlette.concurrency import run_in_threadpool
+from redis.exceptions import RedisError
 
-from app.models.notification import Notification
+from app.config.mysql_config import stick_to_primary
+from app.config.redis_config import redis_client
+from app.config.settings import settings
+from app.models.notification import BroadcastNotification, BroadcastNotificationRead, Notification
 from app.models.user import User
-from app.schemas.notification import NotificationCreate, NotificationUpdate
+from app.schemas.notification import NotificationBroadcast, NotificationCreate, NotificationUpdate
+from app.utils import redis_bus, redis_lock
+from app.utils.pagination import (
+    TotalMode,
+    get_cached_count,
+    invalidate_count,
+    paginate_keyset,
+    paginate_keyset_async,
+    set_cached_count,
+    split_page,
+)
+
+# 个人通知与广播通知合并成一个流，source区分来源
+PERSONAL = 0
+BROADCAST = 1
+
+# 每次发布广播时递增，计数缓存键带上该版本，广播后所有用户的缓存自然失效
+BROADCAST_VERSION_KEY = "notification:broadcast:version"
+
+# 用户未读数hash：field为用户id。通知变更时增减，缺失时按数据库重算，定时任务纠正漂移
+UNREAD_KEY = "notification:unread"
+# 用户未读数的代数hash：未读数缺失时的增减会使其递增，按数据库重算的结果只在代数未变时写入
+UNREAD_GENERATION_KEY = "notification:unread:generation"
+RECONCILE_LOCK_KEY = "notification:unread:reconcile:lock"
+RECONCILE_LOCK_TTL = 60
+RECONCILE_BATCH_SIZE = 500
+
+# KEYS[1]=未读数hash KEYS[2]=代数hash；ARGV[1]=用户id ARGV[2]=增量。结果不小于0
+# 用户不在hash中时只递增其代数并返回-1：正在重算的读取可能没有包含这次变更，其结果不能再写入
+ADJUST_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+    return -1
+end
+local n = redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+if n < 0 then
+    redis.call('HSET', KEYS[1], ARGV[1], 0)
+    n = 0
+end
+return n
+"""
+
+# KEYS[1]=未读数hash KEYS[2]=代数hash KEYS[3]=广播版本；ARGV[1]=用户id ARGV[2]=未读数 ARGV[3..4]=重算前读到的代数和广播版本
+# 重算期间有增减或发布了广播时不写入，否则仅在未读数仍缺失时写入
+SEED_SCRIPT = """
+if (redis.call('HGET', KEYS[2], ARGV[1]) or '') ~= ARGV[3] or (redis.call('GET', KEYS[3]) or '') ~= ARGV[4] then
+    return 0
+end
+return redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2])
+"""
+
+# KEYS[1]=未读数hash；ARGV为 (用户id, 核对时读到的值, 新值) 三元组。只覆盖核对期间未被修改的值，返回写入数
+CORRECT_SCRIPT = """
+local n = 0
+for i = 1, #ARGV, 3 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 2])
+        n = n + 1
+    end
+end
+return n
+"""
+
+_adjust_script = redis_client.register_script(ADJUST_SCRIPT)
+_seed_script = redis_client.register_script(SEED_SCRIPT)
+_correct_script = redis_client.register_script(CORRECT_SCRIPT)
+
+logger = logging.getLogger("app")
+
+# 推送频道：个人通知按用户分频道，广播通知共用一个频道
+BROADCAST_CHANNEL = "notification:broadcast"
+
+
+def user_channel(user_id: int) -> str:
+    return f"notification:user:{user_id}"
+
+
+def _event_payload(obj: Union[Notification, BroadcastNotification]) -> dict:
+    """推送给客户端的通知内容，只取本表字段，不触发关系加载"""
+    return {
+        "uuid": obj.uuid,
+        "type": obj.type,
+        "title": obj.title,
+        "content": obj.content,
+        "related_id": obj.related_id,
+        "related_uuid": obj.related_uuid,
+        "is_read": False,
+        "created_at": obj.created_at,
+    }
+
+
+def count_cache_key(user_id: int) -> str:
+    """用户通知总数/未读数的缓存键，个人通知变更时清除，发布广播时整体换代"""
+    try:
+        version = int(redis_client.get(BROADCAST_VERSION_KEY) or 0)
+    except RedisError:
+        version = 0
+    return f"count:notification:{user_id}:{version}"
+
+
+def _stream_order(stream):
+    """合并流的排序键，游标分页与offset分页共用"""
+    return (
+        (stream.c.created_at, True),
+        (stream.c.source, True),
+        (stream.c.id, True)
+    )
 
 
 class CRUDNotification:
-    
+
     def create_notification(self, db: Session, *, notification_in: NotificationCreate) -> Notification:
         """创建通知"""
         db_obj = Notification(
@@ -25,87 +138,436 @@ class CRUDNotification:
         )
         db.add(db_obj)
         db.commit()
+        invalidate_count(count_cache_key(db_obj.recipient_id))
+        unread_count = self._adjust_unread(db_obj.recipient_id, 1, push=False)
+        db.refresh(db_obj)
+        redis_bus.publish(user_channel(db_obj.recipient_id), {
+            "event": "notification",
+            "notification": _event_payload(db_obj),
+            "unread_count": unread_count
+        })
+        return db_obj
+
+    def create_broadcast(
+        self, db: Session, *, notification_in: NotificationBroadcast, target_role: Optional[str] = None
+    ) -> BroadcastNotification:
+        """发布广播通知，无论用户数多少都只写一行"""
+        db_obj = BroadcastNotification(
+            **notification_in.model_dump(mode="json", exclude={"sender_id"}),
+            uuid=str(uuid.uuid4()),
+            target_role=target_role
+        )
+        db.add(db_obj)
+        db.commit()
+        try:
+            # 广播影响的用户可能很多，直接丢弃所有未读数，读取时重算
+            pipe = redis_client.pipeline()
+            pipe.incr(BROADCAST_VERSION_KEY)
+            # 广播版本已变，正在进行的重算不会再写入，代数可以一并丢弃
+            pipe.unlink(UNREAD_KEY, UNREAD_GENERATION_KEY)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Broadcast cache invalidation failed: {e}")
         db.refresh(db_obj)
+        redis_bus.publish(BROADCAST_CHANNEL, {
+            "event": "notification",
+            "notification": _event_payload(db_obj),
+            "target_role": target_role
+        })
         return db_obj
-    
+
     def get_notification_by_uuid(self, db: Session, *, uuid: str) -> Optional[Notification]:
         """根据UUID获取通知"""
         return db.query(Notification).options(
             joinedload(Notification.sender),
             joinedload(Notification.admin)
         ).filter(Notification.uuid == uuid).first()
-    
-    def get_user_notifications(self, db: Session, *, user_id: int, skip: int = 0, limit: int = 20) -> Tuple[int, int, List[Notification]]:
-        """获取用户的通知列表"""
-        query = db.query(Notification).options(
+
+    # ---- 广播可见性 ----
+
+    def _broadcast_read(self, user_id: int):
+        return and_(
+            BroadcastNotificationRead.broadcast_id == BroadcastNotification.id,
+            BroadcastNotificationRead.user_id == user_id
+        )
+
+    def _visible_to_user(self):
+        """广播对User可见：账号有效（与原先逐人发送时的接收者范围一致）、发布时已注册、角色匹配"""
+        return and_(
+            User.is_active == True,
+            User.deleted_at.is_(None),
+            or_(BroadcastNotification.target_role.is_(None), BroadcastNotification.target_role == User.role),
+            BroadcastNotification.created_at >= User.created_at
+        )
+
+    def _visible_broadcasts(self, columns: list, user_id: int):
+        """用户可见且未删除的广播；外连接已读标记，未读时标记列为NULL"""
+        return select(*columns).select_from(BroadcastNotification).join(
+            User, User.id == user_id
+        ).outerjoin(
+            BroadcastNotificationRead, self._broadcast_read(user_id)
+        ).where(
+            self._visible_to_user(),
+            BroadcastNotificationRead.deleted_at.is_(None)
+        )
+
+    def get_broadcast_for_user(self, db: Session, *, uuid: str, user_id: int) -> Optional[BroadcastNotification]:
+        """按UUID获取对该用户可见的广播，并填充已读状态"""
+        row = db.execute(
+            self._visible_broadcasts([BroadcastNotification, BroadcastNotificationRead.read_at], user_id).options(
+                joinedload(BroadcastNotification.admin)
+            ).where(BroadcastNotification.uuid == uuid)
+        ).first()
+        if not row:
+            return None
+        return self._as_notification(row[0], row[1], user_id)
+
+    def _as_notification(self, broadcast: BroadcastNotification, read_at, user_id: int) -> BroadcastNotification:
+        broadcast.recipient_id = user_id
+        broadcast.is_read = read_at is not None
+        broadcast.read_at = read_at
+        return broadcast
+
+    # ---- 合并流 ----
+
+    def _stream(self, user_id: int):
+        personal = select(
+            literal(PERSONAL).label("source"),
+            Notification.id.label("id"),
+            Notification.created_at.label("created_at")
+        ).where(Notification.recipient_id == user_id)
+        broadcast = self._visible_broadcasts([
+            literal(BROADCAST).label("source"),
+            BroadcastNotification.id.label("id"),
+            BroadcastNotification.created_at.label("created_at")
+        ], user_id)
+        return union_all(personal, broadcast).subquery("stream")
+
+    def _page_statement(self, user_id: int, skip: int, limit: int):
+        stream = self._stream(user_id)
+        order = _stream_order(stream)
+        return select(stream).order_by(
+            *[column.desc() for column, _ in order]
+        ).offset(skip).limit(limit)
+
+    def _items_statements(self, rows, user_id: int):
+        personal_ids = [row.id for row in rows if row.source == PERSONAL]
+        broadcast_ids = [row.id for row in rows if row.source == BROADCAST]
+        personal = select(Notification).options(
             joinedload(Notification.sender),
             joinedload(Notification.admin)
-        ).filter(Notification.recipient_id == user_id)
-        
-        total = query.count()
-        unread_count = query.filter(Notification.is_read == False).count()
-        
-        notifications = query.order_by(desc(Notification.created_at)).offset(skip).limit(limit).all()
-        
-        return total, unread_count, notifications
-    
+        ).where(Notification.id.in_(personal_ids)) if personal_ids else None
+        broadcast = select(BroadcastNotification, BroadcastNotificationRead.read_at).options(
+            joinedload(BroadcastNotification.admin)
+        ).outerjoin(
+            BroadcastNotificationRead, self._broadcast_read(user_id)
+        ).where(BroadcastNotification.id.in_(broadcast_ids)) if broadcast_ids else None
+        return personal, broadcast
+
+    def _assemble(self, rows, personal, broadcast, user_id: int) -> List[Union[Notification, BroadcastNotification]]:
+        """按合并流的顺序组装个人通知与广播通知"""
+        items = {(PERSONAL, n.id): n for n in personal}
+        items.update({(BROADCAST, b.id): self._as_notification(b, read_at, user_id) for b, read_at in broadcast})
+        return [items[(row.source, row.id)] for row in rows if (row.source, row.id) in items]
+
+    def _load_items(self, db: Session, rows, user_id: int) -> list:
+        personal, broadcast = self._items_statements(rows, user_id)
+        return self._assemble(
+            rows,
+            db.scalars(personal).unique().all() if personal is not None else [],
+            db.execute(broadcast).unique().all() if broadcast is not None else [],
+            user_id
+        )
+
+    async def _load_items_async(self, db: AsyncSession, rows, user_id: int) -> list:
+        personal, broadcast = self._items_statements(rows, user_id)
+        return self._assemble(
+            rows,
+            (await db.scalars(personal)).unique().all() if personal is not None else [],
+            (await db.execute(broadcast)).unique().all() if broadcast is not None else [],
+            user_id
+        )
+
+    # ---- 计数 ----
+
+    def _counts_statement(self, user_id: int):
+        # 个人通知与广播各一次聚合，同时得到总数与未读数
+        personal = select(
+            func.count(Notification.id).label("total"),
+            func.coalesce(func.sum(case((Notification.is_read == False, 1), else_=0)), 0).label("unread")
+        ).where(Notification.recipient_id == user_id).subquery()
+        broadcast = self._visible_broadcasts([
+            func.count(BroadcastNotification.id).label("total"),
+            func.coalesce(func.sum(case((BroadcastNotificationRead.broadcast_id.is_(None), 1), else_=0)), 0).label("unread")
+        ], user_id).subquery()
+        return select(
+            personal.c.total + broadcast.c.total,
+            personal.c.unread + broadcast.c.unread
+        ).select_from(personal.join(broadcast, literal(True)))
+
+    def _unread_statement(self, user_id: int):
+        personal = select(func.count(Notification.id)).where(
+            Notification.recipient_id == user_id,
+            Notification.is_read == False
+        ).scalar_subquery()
+        broadcast = self._visible_broadcasts(
+            [func.count(BroadcastNotification.id)], user_id
+        ).where(BroadcastNotificationRead.broadcast_id.is_(None)).scalar_subquery()
+        return select(personal + broadcast)
+
+    def _get_cached_counts(self, user_id: int, total_mode: TotalMode) -> Tuple[str, Optional[list]]:
+        key = count_cache_key(user_id)
+        max_age = settings.COUNT_CACHE_TTL if total_mode == TotalMode.exact else settings.COUNT_ESTIMATE_TTL
+        return key, get_cached_count(key, max_age)
+
+    def get_user_notifications(
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 20, total_mode: TotalMode = TotalMode.exact
+    ) -> Tuple[Optional[int], int, bool, List[Notification]]:
+        """
+        获取用户的通知列表（个人通知与可见广播合并，按时间倒序）
+
+        Returns:
+            (total, unread_count, has_more, items)，total_mode为none时total为None
+        """
+        if total_mode == TotalMode.none:
+            total, unread_count = None, db.scalar(self._unread_statement(user_id)) or 0
+        else:
+            key, counts = self._get_cached_counts(user_id, total_mode)
+            if counts is None:
+                counts = [int(v or 0) for v in db.execute(self._counts_statement(user_id)).one()]
+                set_cached_count(key, counts)
+            total, unread_count = counts
+
+        rows = db.execute(self._page_statement(user_id, skip, limit + 1)).all()
+        has_more, rows = split_page(rows, limit)
+
+        return total, unread_count, has_more, self._load_items(db, rows, user_id)
+
+    async def get_user_notifications_async(
+        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 20, total_mode: TotalMode = TotalMode.exact
+    ) -> Tuple[Optional[int], int, bool, List[Notification]]:
+        """获取用户的通知列表（异步）"""
+        if total_mode == TotalMode.none:
+            total, unread_count = None, await db.scalar(self._unread_statement(user_id)) or 0
+        else:
+            key, counts = await run_in_threadpool(self._get_cached_counts, user_id, total_mode)
+            if counts is None:
+                counts = [int(v or 0) for v in (await db.execute(self._counts_statement(user_id))).one()]
+                await run_in_threadpool(set_cached_count, key, counts)
+            total, unread_count = counts
+
+        rows = (await db.execute(self._page_statement(user_id, skip, limit + 1))).all()
+        has_more, rows = split_page(rows, limit)
+
+        return total, unread_count, has_more, await self._load_items_async(db, rows, user_id)
+
+    def get_user_notifications_by_cursor(self, db: Session, *, user_id: int, cursor: Optional[str] = None, limit: int = 20) -> Tuple[Optional[str], List[Notification]]:
+        """游标分页获取用户的通知列表，返回 (next_cursor, items)，不统计总数"""
+        stream = self._stream(user_id)
+        next_cursor, rows = paginate_keyset(db.query(stream), _stream_order(stream), cursor=cursor, limit=limit)
+        return next_cursor, self._load_items(db, rows, user_id)
+
+    async def get_user_notifications_by_cursor_async(self, db: AsyncSession, *, user_id: int, cursor: Optional[str] = None, limit: int = 20) -> Tuple[Optional[str], List[Notification]]:
+        """游标分页获取用户的通知列表（异步）"""
+        stream = self._stream(user_id)
+        next_cursor, rows = await paginate_keyset_async(
+            db, select(stream), _stream_order(stream), cursor=cursor, limit=limit, scalars=False
+        )
+        return next_cursor, await self._load_items_async(db, rows, user_id)
+
     def update_notification(self, db: Session, *, db_obj: Notification, obj_in: NotificationUpdate) -> Notification:
         """更新通知"""
         update_data = obj_in.model_dump(exclude_unset=True)
-        
+        was_read = db_obj.is_read
+
         if update_data.get("is_read") is True and not db_obj.is_read:
             # 设置阅读时间
             update_data["read_at"] = func.now()
-        
+
         for field, value in update_data.items():
             setattr(db_obj, field, value)
-        
+
         db.add(db_obj)
         db.commit()
+        invalidate_count(count_cache_key(db_obj.recipient_id))
+        if "is_read" in update_data and update_data["is_read"] != was_read:
+            self._adjust_unread(db_obj.recipient_id, 1 if was_read else -1)
         db.refresh(db_obj)
         return db_obj
-    
-    def mark_notification_as_read(self, db: Session, *, notification_uuid: str, user_id: int) -> Optional[Notification]:
-        """标记通知为已读"""
+
+    def _mark_broadcast(self, db: Session, *, broadcast_id: int, user_id: int, deleted: bool = False) -> None:
+        """写入广播的已读（或删除）标记，已存在时只补删除时间"""
+        marker = db.get(BroadcastNotificationRead, (broadcast_id, user_id))
+        if marker is None:
+            marker = BroadcastNotificationRead(broadcast_id=broadcast_id, user_id=user_id)
+            db.add(marker)
+        if deleted:
+            marker.deleted_at = func.now()
+        db.commit()
+        invalidate_count(count_cache_key(user_id))
+
+    def mark_notification_as_read(self, db: Session, *, notification_uuid: str, user_id: int) -> Optional[Union[Notification, BroadcastNotification]]:
+        """标记通知为已读，支持个人通知与广播通知"""
         notification = db.query(Notification).filter(
             Notification.uuid == notification_uuid,
             Notification.recipient_id == user_id
         ).first()
-        
-        if notification and not notification.is_read:
+
+        if notification is None:
+            broadcast = self.get_broadcast_for_user(db, uuid=notification_uuid, user_id=user_id)
+            if broadcast and not broadcast.is_read:
+                self._mark_broadcast(db, broadcast_id=broadcast.id, user_id=user_id)
+                self._adjust_unread(user_id, -1)
+                broadcast = self.get_broadcast_for_user(db, uuid=notification_uuid, user_id=user_id)
+            return broadcast
+
+        if not notification.is_read:
             notification.is_read = True
             notification.read_at = func.now()
             db.add(notification)
             db.commit()
+            invalidate_count(count_cache_key(user_id))
+            self._adjust_unread(user_id, -1)
             db.refresh(notification)
-        
+
         return notification
-    
+
     def mark_all_notifications_as_read(self, db: Session, *, user_id: int) -> int:
-        """标记用户所有通知为已读"""
-        count = db.query(Notification).filter(
-            Notification.recipient_id == user_id,
-            Notification.is_read == False
-        ).update({
-            Notification.is_read: True,
-            Notification.read_at: func.now()
-        })
+        """标记用户所有通知（含可见广播）为已读"""
+        count = db.execute(
+            update(Notification).where(
+                Notification.recipient_id == user_id,
+                Notification.is_read == False
+            ).values(is_read=True, read_at=func.now()),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        # 未读广播没有标记行，一条 INSERT ... SELECT 全部补上
+        count += db.execute(
+            insert(BroadcastNotificationRead).from_select(
+                ["broadcast_id", "user_id"],
+                self._visible_broadcasts(
+                    [BroadcastNotification.id, literal(user_id)], user_id
+                ).where(BroadcastNotificationRead.broadcast_id.is_(None))
+            )
+        ).rowcount
         db.commit()
+        invalidate_count(count_cache_key(user_id))
+        try:
+            redis_client.hset(UNREAD_KEY, user_id, 0)
+        except RedisError as e:
+            logger.warning(f"Unread counter reset failed: {e}")
+        redis_bus.publish(user_channel(user_id), {"event": "unread_count", "unread_count": 0})
         return count
-    
-    def delete_notification(self, db: Session, *, db_obj: Notification) -> Notification:
-        """删除通知"""
-        db.delete(db_obj)
-        db.commit()
+
+    def delete_notification(self, db: Session, *, db_obj: Union[Notification, BroadcastNotification]) -> Union[Notification, BroadcastNotification]:
+        """删除通知；广播通知只对当前用户隐藏"""
+        if isinstance(db_obj, BroadcastNotification):
+            self._mark_broadcast(db, broadcast_id=db_obj.id, user_id=db_obj.recipient_id, deleted=True)
+        else:
+            db.delete(db_obj)
+            db.commit()
+            invalidate_count(count_cache_key(db_obj.recipient_id))
+        if not db_obj.is_read:
+            self._adjust_unread(db_obj.recipient_id, -1)
         return db_obj
-    
+
+    # ---- 未读数 ----
+
+    def _adjust_unread(self, user_id: int, delta: int, *, push: bool = True) -> Optional[int]:
+        """增减未读数并返回新值，用户未缓存或Redis不可用时返回None；push为True时把新值推送给用户"""
+        try:
+            count = _adjust_script(keys=[UNREAD_KEY, UNREAD_GENERATION_KEY], args=[user_id, delta])
+        except RedisError as e:
+            # 计数不准由定时任务纠正
+            logger.warning(f"Unread counter update failed: {e}")
+            return None
+        count = count if count >= 0 else None
+        if push:
+            redis_bus.publish(user_channel(user_id), {"event": "unread_count", "unread_count": count})
+        return count
+
     def get_unread_count(self, db: Session, *, user_id: int) -> int:
-        """获取用户未读通知数量"""
-        return db.query(Notification).filter(
-            Notification.recipient_id == user_id,
-            Notification.is_read == False
-        ).count()
+        """获取用户未读通知数量（含未读广播），命中Redis时不查询数据库"""
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hget(UNREAD_KEY, user_id)
+            pipe.hget(UNREAD_GENERATION_KEY, user_id)
+            pipe.get(BROADCAST_VERSION_KEY)
+            count, generation, version = pipe.execute()
+            if count is not None:
+                return int(count)
+        except RedisError as e:
+            logger.warning(f"Unread counter read failed: {e}")
+            return db.scalar(self._unread_statement(user_id)) or 0
+        # 重算结果要写入缓存，必须读主库，否则从库延迟时会缓存旧的未读数
+        stick_to_primary(db)
+        count = db.scalar(self._unread_statement(user_id)) or 0
+        try:
+            _seed_script(
+                keys=[UNREAD_KEY, UNREAD_GENERATION_KEY, BROADCAST_VERSION_KEY],
+                args=[user_id, count, generation or b"", version or b""]
+            )
+        except RedisError:
+            pass
+        return count
+
+    def _unread_by_users(self, db: Session, user_ids: List[int]) -> dict:
+        """批量计算多个用户的未读数，个人通知与广播各一次分组查询"""
+        counts = dict.fromkeys(user_ids, 0)
+        personal = db.execute(
+            select(Notification.recipient_id, func.count(Notification.id)).where(
+                Notification.recipient_id.in_(user_ids),
+                Notification.is_read == False
+            ).group_by(Notification.recipient_id)
+        ).all()
+        # 未读且未删除的广播没有标记行
+        broadcast = db.execute(
+            select(User.id, func.count(BroadcastNotification.id)).select_from(User).join(
+                BroadcastNotification, self._visible_to_user()
+            ).outerjoin(
+                BroadcastNotificationRead, self._broadcast_read(User.id)
+            ).where(
+                User.id.in_(user_ids),
+                BroadcastNotificationRead.broadcast_id.is_(None)
+            ).group_by(User.id)
+        ).all()
+        for user_id, count in personal + broadcast:
+            counts[user_id] += count
+        return counts
+
+    def reconcile_unread_counts(self, db: Session) -> int:
+        """按数据库重算Redis中所有用户的未读数，返回纠正的用户数"""
+        # 从库延迟时重算结果偏旧，会把正确的未读数改错
+        stick_to_primary(db)
+        corrected = 0
+        cursor = 0
+        while True:
+            cursor, cached = redis_client.hscan(UNREAD_KEY, cursor, count=RECONCILE_BATCH_SIZE)
+            if cached:
+                actual = self._unread_by_users(db, [int(user_id) for user_id in cached])
+                args = []
+                for user_id, count in actual.items():
+                    seen = cached[str(user_id).encode()]
+                    if int(seen) != count:
+                        args.extend([user_id, seen, count])
+                if args:
+                    corrected += _correct_script(keys=[UNREAD_KEY], args=args)
+            if cursor == 0:
+                return corrected
 
 
 # 实例化CRUD对象
-crud_notification = CRUDNotification()
\ No newline at end of file
+crud_notification = CRUDNotification()
+
+
+def reconcile_unread_counts(db: Session) -> int:
+    """定时任务：纠正未读数漂移，多进程部署时通过Redis锁保证同一时刻只有一个进程在执行"""
+    with redis_lock.hold(RECONCILE_LOCK_KEY, RECONCILE_LOCK_TTL) as acquired:
+        if not acquired:
+            return 0
+        try:
+            return crud_notification.reconcile_unread_counts(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Unread counter reconcile failed: {e}")
+            return 0
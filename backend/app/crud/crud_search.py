@@ -0,0 +1,195 @@
+"""
+全文检索
+
+公开可见的博客、论坛帖子、作品展示各在 search_documents 中对应一行（标题 + 去除标记后的正文），
+上面建有 ngram 分词的 FULLTEXT 索引。各内容的crud在创建、修改、删除、审核时调用 sync_document，
+与内容本身在同一事务中提交；内容不再可见时删除对应文档。
+"""
+import html
+import re
+from typing import List, Optional
+
+from sqlalchemy import desc, insert, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+
+from app.config.mysql_config import stick_to_primary
+from app.models.blog import Blog, BlogStatus
+from app.models.forum_post import ForumPost
+from app.models.search_document import SearchDocument
+from app.models.showcase import Showcase
+from app.models.user import User
+
+CONTENT_TYPES = ("blog", "forum_post", "showcase")
+
+# 摘要长度（字符）及关键词前保留的上下文长度
+SNIPPET_LENGTH = 120
+SNIPPET_CONTEXT = 30
+# 标题命中的得分权重
+TITLE_WEIGHT = 2.0
+REINDEX_BATCH_SIZE = 500
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_MARKDOWN_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)|[#*_`>~|]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _plain_text(*parts: Optional[str]) -> str:
+    """去除HTML标签和常见Markdown标记，合并空白"""
+    text = " ".join(part for part in parts if part)
+    text = _TAG_RE.sub(" ", text)
+    text = _MARKDOWN_RE.sub(lambda m: m.group(1) or " ", text)
+    return _SPACE_RE.sub(" ", html.unescape(text)).strip()
+
+
+def _blog_document(blog: Blog) -> Optional[dict]:
+    if blog.is_deleted or blog.status != BlogStatus.published:
+        return None
+    return {"title": blog.title, "body": _plain_text(blog.summary, blog.content), "author_id": blog.author_id}
+
+
+def _forum_post_document(post: ForumPost) -> Optional[dict]:
+    if post.is_deleted or post.deleted_at is not None:
+        return None
+    return {"title": post.title, "body": _plain_text(post.content), "author_id": post.user_id}
+
+
+def _showcase_document(showcase: Showcase) -> Optional[dict]:
+    if showcase.deleted_at is not None or showcase.status not in ("published", "excellent"):
+        return None
+    tags = " ".join(str(tag) for tag in showcase.tags or [])
+    return {
+        "title": showcase.name,
+        "body": _plain_text(showcase.summary, showcase.detailed_introduction, tags),
+        "author_id": showcase.author_id
+    }
+
+
+_DOCUMENT_BUILDERS = {
+    Blog: ("blog", _blog_document),
+    ForumPost: ("forum_post", _forum_post_document),
+    Showcase: ("showcase", _showcase_document),
+}
+
+
+def sync_document(db: Session, obj) -> None:
+    """
+    按内容当前状态更新检索文档，不提交事务
+
+    在内容写入后、提交前调用；新建的内容会先flush以取得id。
+    查找已有文档必须读主库：从库延迟时会查不到刚创建的文档，导致重复插入或漏删。
+    """
+    content_type, build = _DOCUMENT_BUILDERS[type(obj)]
+    stick_to_primary(db)
+    if obj.id is None:
+        db.flush()
+    document = db.query(SearchDocument).filter(
+        SearchDocument.content_type == content_type,
+        SearchDocument.content_id == obj.id
+    ).first()
+    fields = build(obj)
+    if fields is None:
+        if document is not None:
+            db.delete(document)
+        return
+    if document is None:
+        document = SearchDocument(content_type=content_type, content_id=obj.id)
+        db.add(document)
+    document.content_uuid = obj.uuid
+    document.title = fields["title"]
+    document.body = fields["body"]
+    document.author_id = fields["author_id"]
+
+
+def reindex_all(db: Session) -> int:
+    """重建全部检索文档（如执行迁移后初始化），返回索引的文档数"""
+    stick_to_primary(db)
+    db.query(SearchDocument).delete(synchronize_session=False)
+    total = 0
+    for model, (content_type, build) in _DOCUMENT_BUILDERS.items():
+        last_id = 0
+        while True:
+            batch = db.query(model).filter(model.id > last_id).order_by(model.id).limit(REINDEX_BATCH_SIZE).all()
+            if not batch:
+                break
+            # 已清空全部文档，直接按批多行插入
+            rows = []
+            for obj in batch:
+                fields = build(obj)
+                if fields is not None:
+                    rows.append({"content_type": content_type, "content_id": obj.id, "content_uuid": obj.uuid, **fields})
+            if rows:
+                db.execute(insert(SearchDocument), rows)
+                total += len(rows)
+            last_id = batch[-1].id
+            db.expunge_all()
+    db.commit()
+    return total
+
+
+def _query_terms(keyword: str) -> List[str]:
+    """用于高亮的词：按空白切分，中文词再拆成二元组（与ngram分词一致），长词在前"""
+    terms = set()
+    for word in keyword.split():
+        terms.add(word.lower())
+        if len(word) > 2 and not word.isascii():
+            terms.update(word[i:i + 2].lower() for i in range(len(word) - 1))
+    return sorted(terms, key=len, reverse=True)
+
+
+def highlight(text: str, keyword: str) -> str:
+    """HTML转义后用<em>包裹命中的词"""
+    terms = _query_terms(keyword)
+    escaped = html.escape(text)
+    if not terms:
+        return escaped
+    pattern = re.compile("|".join(re.escape(html.escape(term)) for term in terms), re.IGNORECASE)
+    return pattern.sub(lambda m: f"<em>{m.group(0)}</em>", escaped)
+
+
+def make_snippet(text: str, keyword: str) -> str:
+    """截取第一个命中处附近的一段文字并高亮"""
+    lowered = text.lower()
+    positions = [position for position in (lowered.find(term) for term in _query_terms(keyword)) if position >= 0]
+    start = max(0, min(positions) - SNIPPET_CONTEXT) if positions else 0
+    end = start + SNIPPET_LENGTH
+    return ("…" if start > 0 else "") + highlight(text[start:end], keyword) + ("…" if end < len(text) else "")
+
+
+def search(
+    db: Session,
+    *,
+    keyword: str,
+    content_type: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20
+) -> List[dict]:
+    """按相关度检索，标题命中加权，返回带高亮摘要的结果"""
+    title_score = match(SearchDocument.title, against=keyword).in_natural_language_mode()
+    score = match(SearchDocument.title, SearchDocument.body, against=keyword).in_natural_language_mode()
+    rank = (title_score * TITLE_WEIGHT + score).label("score")
+
+    query = select(
+        SearchDocument.content_type,
+        SearchDocument.content_uuid,
+        SearchDocument.title,
+        SearchDocument.body,
+        User.username,
+        User.avatar_url,
+        rank
+    ).outerjoin(User, User.id == SearchDocument.author_id).where(score > 0)
+    if content_type:
+        query = query.where(SearchDocument.content_type == content_type)
+    query = query.order_by(desc("score"), SearchDocument.id.desc()).offset(skip).limit(limit)
+
+    results = []
+    for row in db.execute(query):
+        results.append({
+            "type": row.content_type,
+            "uuid": row.content_uuid,
+            "title": highlight(row.title, keyword),
+            "snippet": make_snippet(row.body, keyword),
+            "score": round(float(row.score), 4),
+            "author": {"username": row.username, "avatar_url": row.avatar_url} if row.username else None,
+        })
+    return results
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, select
 from typing import Optional, Tuple
 from datetime import datetime
 import uuid
@@ -7,12 +8,32 @@ import uuid
 from app.models.showcase import Showcase
 from app.models.user import User
 from app.schemas.showcase import ShowcaseCreate, ShowcaseUpdate
+from app.crud.crud_search import sync_document
+from app.utils.cache import invalidate_tags
+from app.utils.pagination import (
+    TotalMode,
+    count_cache_key,
+    count_total,
+    count_total_async,
+    paginate_keyset,
+    paginate_keyset_async,
+    split_page,
+)
+
+# 游标分页的排序键：管理列表按主键顺序，前端展示按创建时间倒序
+KEYSET_ORDER = ((Showcase.id, False),)
+FRONTEND_KEYSET_ORDER = (
+    (Showcase.created_at, True),
+    (Showcase.id, True)
+)
 
 
 def create_showcase(db: Session, *, showcase_in: ShowcaseCreate, author_id: int) -> Showcase:
     db_obj = Showcase(**showcase_in.dict(), uuid=str(uuid.uuid4()), author_id=author_id)
     db.add(db_obj)
+    sync_document(db, db_obj)
     db.commit()
+    invalidate_tags("showcase")
     db.refresh(db_obj)
     return db_obj
 
@@ -25,16 +46,14 @@ def get_by_name(db: Session, *, name: str) -> Optional[Showcase]:
     return db.query(Showcase).filter(Showcase.name == name, Showcase.deleted_at.is_(None)).first()
 
 
-def get_multi(
+def _multi_query(
     db: Session,
     *,
-    skip: int = 0,
-    limit: int = 10,
     name: Optional[str] = None,
     status: Optional[str] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None
-) -> Tuple[int, list[Showcase]]:
+):
     query = db.query(Showcase).options(joinedload(Showcase.author)).filter(Showcase.deleted_at.is_(None))
 
     filters = []
@@ -49,6 +68,20 @@ def get_multi(
 
     if filters:
         query = query.filter(and_(*filters))
+    return query
+
+
+def get_multi(
+    db: Session,
+    *,
+    skip: int = 0,
+    limit: int = 10,
+    name: Optional[str] = None,
+    status: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[int, list[Showcase]]:
+    query = _multi_query(db, name=name, status=status, start_time=start_time, end_time=end_time)
 
     total = query.count()
     items = query.offset(skip).limit(limit).all()
@@ -56,13 +89,30 @@ def get_multi(
     return total, items
 
 
+def get_multi_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    name: Optional[str] = None,
+    status: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[Showcase]]:
+    """get_multi 的游标分页版本，按主键顺序，返回 (next_cursor, items)"""
+    query = _multi_query(db, name=name, status=status, start_time=start_time, end_time=end_time)
+    return paginate_keyset(query, KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
 def update_showcase(db: Session, *, db_obj: Showcase, obj_in: ShowcaseUpdate) -> Showcase:
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_obj, field, value)
 
     db.add(db_obj)
+    sync_document(db, db_obj)
     db.commit()
+    invalidate_tags("showcase")
     db.refresh(db_obj)
     return db_obj
 
@@ -70,7 +120,9 @@ def update_showcase(db: Session, *, db_obj: Showcase, obj_in: ShowcaseUpdate) ->
 def remove_showcase(db: Session, *, db_obj: Showcase) -> Showcase:
     db_obj.deleted_at = datetime.utcnow()
     db.add(db_obj)
+    sync_document(db, db_obj)
     db.commit()
+    invalidate_tags("showcase")
     db.refresh(db_obj)
     return db_obj
 
@@ -82,7 +134,9 @@ def approve_showcase(db: Session, *, db_obj: Showcase, reviewer_id: int, review_
     db_obj.review_comment = review_comment
     db_obj.reviewed_at = datetime.utcnow()
     db.add(db_obj)
+    sync_document(db, db_obj)
     db.commit()
+    invalidate_tags("showcase")
     db.refresh(db_obj)
     return db_obj
 
@@ -94,7 +148,9 @@ def reject_showcase(db: Session, *, db_obj: Showcase, reviewer_id: int, review_c
     db_obj.review_comment = review_comment
     db_obj.reviewed_at = datetime.utcnow()
     db.add(db_obj)
+    sync_document(db, db_obj)
     db.commit()
+    invalidate_tags("showcase")
     db.refresh(db_obj)
     return db_obj
 
@@ -106,7 +162,9 @@ def promote_to_excellent(db: Session, *, db_obj: Showcase, reviewer_id: int, rev
     db_obj.review_comment = review_comment
     db_obj.reviewed_at = datetime.utcnow()
     db.add(db_obj)
+    sync_document(db, db_obj)
     db.commit()
+    invalidate_tags("showcase")
     db.refresh(db_obj)
     return db_obj
 
@@ -117,7 +175,9 @@ def archive_showcase(db: Session, *, db_obj: Showcase) -> Showcase:
         db_obj.previous_status = db_obj.status
         db_obj.status = 'draft'
         db.add(db_obj)
+        sync_document(db, db_obj)
         db.commit()
+        invalidate_tags("showcase")
         db.refresh(db_obj)
     return db_obj
 
@@ -128,40 +188,106 @@ def restore_showcase(db: Session, *, db_obj: Showcase) -> Showcase:
         db_obj.status = db_obj.previous_status
         db_obj.previous_status = None
         db.add(db_obj)
+        sync_document(db, db_obj)
         db.commit()
+        invalidate_tags("showcase")
         db.refresh(db_obj)
     return db_obj
 
 
-def get_showcases_for_frontend(
-    db: Session,
+def _frontend_filters(
     *,
-    skip: int = 0,
-    limit: int = 10,
     name: Optional[str] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None
-) -> Tuple[int, list[Showcase]]:
-    """获取前端展示的作品 - 只显示优秀作品"""
-    query = db.query(Showcase).options(joinedload(Showcase.author)).filter(
+) -> list:
+    """前端展示作品的筛选条件 - 只显示优秀作品"""
+    filters = [
         Showcase.deleted_at.is_(None),
         Showcase.status == 'excellent'
-    )
-
-    filters = []
+    ]
     if name:
         filters.append(Showcase.name.ilike(f"%{name}%"))
     if start_time:
         filters.append(Showcase.created_at >= start_time)
     if end_time:
         filters.append(Showcase.created_at <= end_time)
+    return filters
 
-    if filters:
-        query = query.filter(and_(*filters))
 
-    total = query.count()
-    items = query.order_by(
+def get_showcases_for_frontend(
+    db: Session,
+    *,
+    skip: int = 0,
+    limit: int = 10,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    total_mode: TotalMode = TotalMode.exact
+) -> Tuple[Optional[int], bool, list[Showcase]]:
+    """获取前端展示的作品 - 只显示优秀作品，返回 (total, has_more, items)"""
+    filters = _frontend_filters(name=name, start_time=start_time, end_time=end_time)
+    statement = select(Showcase).where(*filters)
+    total = count_total(db, statement, mode=total_mode, key=count_cache_key("showcase_frontend", statement))
+
+    items = db.query(Showcase).options(joinedload(Showcase.author)).filter(and_(*filters)).order_by(
         Showcase.created_at.desc()
-    ).offset(skip).limit(limit).all()
+    ).offset(skip).limit(limit + 1).all()
+    has_more, items = split_page(items, limit)
 
-    return total, items
+    return total, has_more, items
+
+
+async def get_showcases_for_frontend_async(
+    db: AsyncSession,
+    *,
+    skip: int = 0,
+    limit: int = 10,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    total_mode: TotalMode = TotalMode.exact
+) -> Tuple[Optional[int], bool, list[Showcase]]:
+    """get_showcases_for_frontend 的异步版本"""
+    filters = _frontend_filters(name=name, start_time=start_time, end_time=end_time)
+    statement = select(Showcase).where(*filters)
+    total = await count_total_async(db, statement, mode=total_mode, key=count_cache_key("showcase_frontend", statement))
+
+    result = await db.execute(
+        statement.options(joinedload(Showcase.author)).order_by(
+            Showcase.created_at.desc()
+        ).offset(skip).limit(limit + 1)
+    )
+    has_more, items = split_page(list(result.unique().scalars().all()), limit)
+
+    return total, has_more, items
+
+
+def get_showcases_for_frontend_by_cursor(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[Showcase]]:
+    """get_showcases_for_frontend 的游标分页版本"""
+    filters = _frontend_filters(name=name, start_time=start_time, end_time=end_time)
+    query = db.query(Showcase).options(joinedload(Showcase.author)).filter(and_(*filters))
+    return paginate_keyset(query, FRONTEND_KEYSET_ORDER, cursor=cursor, limit=limit)
+
+
+async def get_showcases_for_frontend_by_cursor_async(
+    db: AsyncSession,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None
+) -> Tuple[Optional[str], list[Showcase]]:
+    """get_showcases_for_frontend_by_cursor 的异步版本"""
+    filters = _frontend_filters(name=name, start_time=start_time, end_time=end_time)
+    statement = select(Showcase).options(joinedload(Showcase.author)).where(*filters)
+    return await paginate_keyset_async(db, statement, FRONTEND_KEYSET_ORDER, cursor=cursor, limit=limit)
@@ -6,6 +6,7 @@ import uuid
 
 from app.models.showcase_comment import ShowcaseComment
 from app.schemas.showcase_comment import ShowcaseCommentCreate, ShowcaseCommentUpdate
+from app.utils.pagination import paginate_keyset
 
 
 def create_showcase_comment(db: Session, *, comment_in: ShowcaseCommentCreate, user_id: int, showcase_id: int) -> ShowcaseComment:
@@ -49,6 +50,24 @@ def get_multi_by_showcase_id(
     return total, items
 
 
+def get_multi_by_showcase_id_by_cursor(
+    db: Session,
+    *,
+    showcase_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    sort_by: str = "created_at",
+    sort_order: str = "desc"
+) -> Tuple[Optional[str], list[ShowcaseComment]]:
+    """get_multi_by_showcase_id 的游标分页版本，返回 (next_cursor, items)"""
+    query = db.query(ShowcaseComment).options(joinedload(ShowcaseComment.user)).filter(ShowcaseComment.showcase_id == showcase_id, ShowcaseComment.deleted_at.is_(None))
+
+    column = ShowcaseComment.likes_count if sort_by == "likes_count" else ShowcaseComment.created_at
+    descending = sort_order == "desc"
+    order = ((column, descending), (ShowcaseComment.id, descending))
+    return paginate_keyset(query, order, cursor=cursor, limit=limit)
+
+
 def update_showcase_comment(db: Session, *, db_obj: ShowcaseComment, obj_in: ShowcaseCommentUpdate) -> ShowcaseComment:
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
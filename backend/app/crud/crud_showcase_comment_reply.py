@@ -6,6 +6,7 @@ import uuid
 
 from app.models.showcase_comment_reply import ShowcaseCommentReply
 from app.schemas.showcase_comment_reply import ShowcaseCommentReplyCreate, ShowcaseCommentReplyUpdate
+from app.utils.pagination import paginate_keyset
 
 
 class CRUDShowcaseCommentReply:
@@ -69,6 +70,18 @@ def get_multi_by_comment_id(
     return total, items
 
 
+def get_multi_by_comment_id_by_cursor(
+    db: Session,
+    *,
+    comment_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 10
+) -> Tuple[Optional[str], list[ShowcaseCommentReply]]:
+    """get_multi_by_comment_id 的游标分页版本，按主键顺序，返回 (next_cursor, items)"""
+    query = db.query(ShowcaseCommentReply).options(joinedload(ShowcaseCommentReply.user)).filter(ShowcaseCommentReply.comment_id == comment_id, ShowcaseCommentReply.deleted_at.is_(None))
+    return paginate_keyset(query, ((ShowcaseCommentReply.id, False),), cursor=cursor, limit=limit)
+
+
 def update_showcase_comment_reply(db: Session, *, db_obj: ShowcaseCommentReply, obj_in: ShowcaseCommentReplyUpdate) -> ShowcaseCommentReply:
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -1,11 +1,20 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy import or_, and_
 from app.models.user import User
 from app.schemas.user import UserUpdate, UserSearchRequest
 from app.utils.security import hash_password
-from typing import Tuple, List, Optional
+from app.utils.pagination import paginate_keyset
+from app.utils import principal
+from typing import Dict, Iterator, NamedTuple, Tuple, List, Optional
 import uuid
 
+# Max values per IN (...) when looking up users in bulk
+LOOKUP_CHUNK_SIZE = 1000
+
+def _chunks(values: list, size: int) -> Iterator[list]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
 def get_user_by_uuid(db: Session, uuid: str) -> User:
     return db.query(User).filter(User.uuid == uuid).first()
 
@@ -59,17 +68,12 @@ def update_user_password(db: Session, user_id: int, new_password: str):
     if user:
         user.hashed_password = hash_password(new_password)
         db.commit()
+        principal.invalidate(user.uuid)
         db.refresh(user)
     return user
 
 # Admin user management functions
-def get_users_with_pagination(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 20,
-    search_params: Optional[UserSearchRequest] = None
-) -> Tuple[int, List[User]]:
-    """Get users with pagination and optional search/filter"""
+def _users_query(db: Session, search_params: Optional[UserSearchRequest] = None):
     query = db.query(User).filter(User.deleted_at.is_(None))
     
     if search_params:
@@ -93,11 +97,32 @@ def get_users_with_pagination(
         if search_params.school:
             query = query.filter(User.school.like(f"%{search_params.school}%"))
     
+    return query
+
+def get_users_with_pagination(
+    db: Session, 
+    skip: int = 0, 
+    limit: int = 20,
+    search_params: Optional[UserSearchRequest] = None
+) -> Tuple[int, List[User]]:
+    """Get users with pagination and optional search/filter"""
+    query = _users_query(db, search_params)
+    
     total = query.count()
     users = query.offset(skip).limit(limit).all()
     
     return total, users
 
+def get_users_by_cursor(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    search_params: Optional[UserSearchRequest] = None
+) -> Tuple[Optional[str], List[User]]:
+    """Keyset variant of get_users_with_pagination, ordered by id. Returns (next_cursor, users)"""
+    query = _users_query(db, search_params)
+    return paginate_keyset(query, ((User.id, False),), cursor=cursor, limit=limit)
+
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     """Get user by ID"""
     return db.query(User).filter(
@@ -115,6 +140,7 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
         setattr(user, field, value)
     
     db.commit()
+    principal.invalidate(user.uuid)
     db.refresh(user)
     return user
 
@@ -128,6 +154,7 @@ def ban_user(db: Session, user_id: int) -> Optional[User]:
     user.is_active = False
     db.add(user)  # 显式添加到会话
     db.commit()
+    principal.invalidate(user.uuid)
     db.refresh(user)
     print(f"封禁用户后: user_id={user_id}, is_active={user.is_active}")
     return user
@@ -142,6 +169,7 @@ def unban_user(db: Session, user_id: int) -> Optional[User]:
     user.is_active = True
     db.add(user)  # 显式添加到会话
     db.commit()
+    principal.invalidate(user.uuid)
     db.refresh(user)
     print(f"解封用户后: user_id={user_id}, is_active={user.is_active}")
     return user
@@ -155,6 +183,7 @@ def soft_delete_user(db: Session, user_id: int) -> Optional[User]:
     from datetime import datetime
     user.deleted_at = datetime.utcnow()
     db.commit()
+    principal.invalidate(user.uuid)
     db.refresh(user)
     return user
 
@@ -164,106 +193,70 @@ def get_user_by_student_id(db: Session, student_id: str) -> Optional[User]:
         and_(User.student_id == student_id, User.deleted_at.is_(None))
     ).first()
 
+# Enough to describe a conflict and to delete/invalidate the user on overwrite
+_EXISTING_USER_COLUMNS = (User.id, User.uuid, User.username, User.real_name, User.avatar_url, User.student_id)
+
+class ExistingUsers(NamedTuple):
+    by_student_id: Dict[str, User]
+    by_username: Dict[str, User]
+
+def find_existing_users(db: Session, student_ids: List[str], usernames: List[str]) -> ExistingUsers:
+    """Look up existing users by student ID (not deleted) and username with chunked IN queries"""
+    query = db.query(User).options(load_only(*_EXISTING_USER_COLUMNS))
+    by_student_id = {}
+    for chunk in _chunks(sorted({s for s in student_ids if s}), LOOKUP_CHUNK_SIZE):
+        for user in query.filter(User.student_id.in_(chunk), User.deleted_at.is_(None)):
+            by_student_id.setdefault(user.student_id, user)
+    by_username = {}
+    for chunk in _chunks(sorted({u for u in usernames if u}), LOOKUP_CHUNK_SIZE):
+        for user in query.filter(User.username.in_(chunk)):
+            by_username[user.username] = user
+    return ExistingUsers(by_student_id=by_student_id, by_username=by_username)
+
+def _conflict(index: int, user_data: dict, conflict_type: str, existing_user: Optional[User] = None) -> dict:
+    return {
+        "row_index": index,
+        "student_id": user_data.get("student_id"),
+        "real_name": user_data.get("real_name"),
+        "student_class": user_data.get("student_class", ""),
+        "conflict_type": conflict_type,
+        "existing_user": {
+            "username": existing_user.username,
+            "real_name": existing_user.real_name,
+            "avatar_url": existing_user.avatar_url
+        } if existing_user else None
+    }
+
 def check_batch_import_conflicts(db: Session, users_data: List[dict]) -> List[dict]:
-    """Check for conflicts in batch import data"""
+    """
+    Check for conflicts in batch import data.
+    Rows clash with existing users by student ID or username (= real name), or repeat
+    a student ID / name already used by an earlier row of the same file.
+    """
+    existing = find_existing_users(
+        db,
+        student_ids=[user_data.get("student_id") for user_data in users_data],
+        usernames=[user_data.get("real_name") for user_data in users_data]
+    )
     conflicts = []
-    
+    seen_student_ids = set()
+    seen_names = set()
     for index, user_data in enumerate(users_data):
         student_id = user_data.get("student_id")
-        real_name = user_data.get("real_name")
-        username = real_name  # Username is same as real_name in batch import
+        real_name = user_data.get("real_name")  # Username is same as real_name in batch import
         
-        # Check for student_id conflict
-        if student_id and get_user_by_student_id(db, student_id):
-            existing_user = get_user_by_student_id(db, student_id)
-            conflicts.append({
-                "row_index": index,
-                "student_id": student_id,
-                "real_name": real_name,
-                "student_class": user_data.get("student_class", ""),
-                "conflict_type": "student_id",
-                "existing_user": {
-                    "username": existing_user.username,
-                    "real_name": existing_user.real_name,
-                    "avatar_url": existing_user.avatar_url
-                }
-            })
-            continue
-            
-        # Check for real_name conflict (as username)
-        if real_name and get_user_by_username(db, real_name):
-            existing_user = get_user_by_username(db, real_name)
-            conflicts.append({
-                "row_index": index,
-                "student_id": student_id,
-                "real_name": real_name,
-                "student_class": user_data.get("student_class", ""),
-                "conflict_type": "username",
-                "existing_user": {
-                    "username": existing_user.username,
-                    "real_name": existing_user.real_name,
-                    "avatar_url": existing_user.avatar_url
-                }
-            })
+        if student_id and student_id in existing.by_student_id:
+            conflicts.append(_conflict(index, user_data, "student_id", existing.by_student_id[student_id]))
+        elif real_name and real_name in existing.by_username:
+            conflicts.append(_conflict(index, user_data, "username", existing.by_username[real_name]))
+        elif student_id and student_id in seen_student_ids:
+            conflicts.append(_conflict(index, user_data, "duplicate_student_id"))
+        elif real_name and real_name in seen_names:
+            conflicts.append(_conflict(index, user_data, "duplicate_username"))
+        
+        if student_id:
+            seen_student_ids.add(student_id)
+        if real_name:
+            seen_names.add(real_name)
     
     return conflicts
-
-def batch_create_users(db: Session, users_data: List[dict], conflict_resolution: str = "cancel") -> dict:
-    """Batch create users with conflict resolution"""
-    created_users = []
-    errors = []
-    
-    try:
-        for index, user_data in enumerate(users_data):
-            try:
-                # Handle conflicts based on resolution strategy
-                if conflict_resolution == "overwrite":
-                    # Delete existing user if exists
-                    existing_user = None
-                    if user_data.get("student_id"):
-                        existing_user = get_user_by_student_id(db, user_data["student_id"])
-                    if not existing_user and user_data.get("real_name"):
-                        existing_user = get_user_by_username(db, user_data["real_name"])
-                    
-                    if existing_user:
-                        db.delete(existing_user)
-                        db.flush()
-                
-                # Create new user
-                username = user_data["real_name"]
-                password = user_data["real_name"]  # Password same as real_name
-                # Generate temporary email with valid domain
-                import time
-                email = f"{username}_{int(time.time())}@example.com"
-                
-                new_user_data = {
-                    "username": username,
-                    "email": email,
-                    "password": password,
-                    "real_name": user_data["real_name"],
-                    "phone_number": "",
-                    "school": "",
-                    "student_id": user_data.get("student_id"),
-                    "student_class": user_data.get("student_class"),
-                    "role": "user"
-                }
-                
-                user = admin_create_user(db, new_user_data)
-                created_users.append(user)
-                
-            except Exception as e:
-                errors.append(f"Row {index + 1}: {str(e)}")
-                continue
-        
-        db.commit()
-        
-        return {
-            "success_count": len(created_users),
-            "error_count": len(errors),
-            "errors": errors,
-            "created_users": created_users
-        }
-        
-    except Exception as e:
-        db.rollback()
-        raise e
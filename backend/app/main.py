@@ -1,9 +1,17 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import auth, course_resource, homework, showcase, showcase_comment, showcase_comment_reply, user_management, qiniu, announcement, forum_category, forum_post, forum_reply, like, notification, blog, batch_import
+from app.api.endpoints import auth, course_resource, homework, showcase, showcase_comment, showcase_comment_reply, user_management, qiniu, announcement, forum_category, forum_post, forum_reply, like, notification, blog, batch_import, monitor, search
 from app.config.settings import settings
 from app.config.logging_config import setup_logging
 from app.middleware.logging_middleware import LoggingMiddleware
+from app.crud.crud_blog import reconcile_tag_counts
+from app.crud.crud_forum_category import reconcile_post_counts
+from app.crud.crud_like import reconcile_likes
+from app.crud.crud_notification import reconcile_unread_counts
+from app.services import hot_ranking, scheduler
+from app.utils import password_hasher, redis_bus, token_blacklist
+from app.utils.response import ServiceUnavailable
+from app.utils import view_counter
 
 # 初始化日志配置
 setup_logging(
@@ -15,6 +23,33 @@ setup_logging(
 
 app = FastAPI(title="FastAPI Project Template")
 
+# 定时任务：浏览计数、点赞状态批量写回，未读通知数纠正，token黑名单过滤器重建，论坛热度重算，分类帖子数与标签博客数纠正
+scheduler.add_job("view_counter_flush", settings.VIEW_COUNT_FLUSH_INTERVAL, view_counter.flush, run_on_shutdown=True)
+scheduler.add_job("like_reconcile", settings.LIKE_RECONCILE_INTERVAL, reconcile_likes, run_on_shutdown=True)
+scheduler.add_job("notification_unread_reconcile", settings.NOTIFICATION_UNREAD_RECONCILE_INTERVAL, reconcile_unread_counts)
+scheduler.add_job("token_blacklist_rebuild", token_blacklist.CHECK_INTERVAL, token_blacklist.rebuild)
+scheduler.add_job("forum_hot_recompute", settings.FORUM_HOT_RECOMPUTE_INTERVAL, hot_ranking.recompute)
+scheduler.add_job("forum_category_count_reconcile", settings.FORUM_CATEGORY_COUNT_RECONCILE_INTERVAL, reconcile_post_counts)
+scheduler.add_job("blog_tag_count_reconcile", settings.BLOG_TAG_COUNT_RECONCILE_INTERVAL, reconcile_tag_counts)
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    await redis_bus.start()
+    await scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
+    await redis_bus.stop()
+    password_hasher.shutdown()
+
+
+@app.exception_handler(password_hasher.PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: password_hasher.PasswordHasherBusy):
+    return ServiceUnavailable(message="Server is busy, please try again shortly")
+
 # CORS Middleware
 origins = [
     "http://localhost:5173",  # Allow your frontend origin
@@ -60,6 +95,9 @@ api_router.include_router(notification.router, prefix="/notifications", tags=["N
 api_router.include_router(notification.admin_router, prefix="/admin/notifications", tags=["Admin Notifications"])
 api_router.include_router(blog.router, prefix="/blogs", tags=["Blogs"])
 api_router.include_router(batch_import.router, prefix="/batch-import", tags=["Batch Import"])
+api_router.include_router(monitor.admin_router, prefix="/admin/monitor", tags=["Admin Monitor"])
+api_router.include_router(search.router, prefix="/search", tags=["Search"])
+api_router.include_router(search.admin_router, prefix="/admin/search", tags=["Admin Search"])
 
 app.include_router(api_router)
 
@@ -10,5 +10,8 @@ from .showcase_comment_reply import ShowcaseCommentReply
 from .showcase_like import ShowcaseLike
 from .showcase_comment_like import ShowcaseCommentLike
 from .showcase_comment_reply_like import ShowcaseCommentReplyLike
-from .notification import Notification
+from .notification import Notification, BroadcastNotification, BroadcastNotificationRead
 from .blog import Blog, BlogTag, BlogTagRelation
+from .search_document import SearchDocument
+from .counter_flush_batch import CounterFlushBatch
+from .stale_like import StaleLike
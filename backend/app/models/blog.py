@@ -59,6 +59,8 @@ class BlogTag(Base):
     name = Column(String(50), unique=True, nullable=False, comment="标签名称")
     color = Column(String(7), default="#2196F3", comment="标签颜色(HEX)")
     description = Column(Text, comment="标签描述")
+    # 由 crud_blog 在博客创建、修改（标签或状态）、删除时增量维护，并由定时任务核对纠正
+    blog_count = Column(INTEGER(unsigned=True), nullable=False, server_default='0', comment="使用此标签的已发布博客数")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # 关系
@@ -67,14 +69,10 @@ class BlogTag(Base):
     # 索引
     __table_args__ = (
         Index('idx_blog_tag_name', 'name'),
+        Index('idx_blog_tag_count', 'blog_count'),
         {'comment': 'Blog标签表'}
     )
 
-    @property
-    def blog_count(self):
-        """获取使用此标签的博客数量"""
-        return len([relation for relation in self.blog_relations if relation.blog and not relation.blog.is_deleted])
-
 
 class BlogTagRelation(Base):
     __tablename__ = "blog_tag_relations"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, TIMESTAMP, Index
+from sqlalchemy.sql import func
+
+from app.config.database import Base
+
+
+class CounterFlushBatch(Base):
+    """已写回数据库的浏览计数批次，与计数更新在同一事务中插入，重复写回同一批次时据此跳过"""
+    __tablename__ = "counter_flush_batches"
+
+    batch_id = Column(String(36), primary_key=True)
+    kind = Column(String(32), nullable=False)
+    applied_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_counter_flush_batches_applied_at", "applied_at"),
+    )
@@ -20,6 +20,8 @@ class ForumPost(Base):
     is_deleted = Column(Boolean, nullable=False, server_default='0', index=True)
     view_count = Column(INTEGER(unsigned=True), nullable=False, server_default='0')
     reply_count = Column(INTEGER(unsigned=True), nullable=False, server_default='0')
+    # 已分配的最大楼层号，删除回复后不回退
+    floor_seq = Column(INTEGER(unsigned=True), nullable=False, server_default='0')
     last_reply_at = Column(TIMESTAMP, nullable=True, index=True)
     last_reply_user_id = Column(INTEGER(unsigned=True), ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     created_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), index=True)
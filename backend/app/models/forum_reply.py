@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, TIMESTAMP, Boolean, ForeignKey
+from sqlalchemy import Column, String, TIMESTAMP, Boolean, ForeignKey, Index
 from sqlalchemy.dialects.mysql import INTEGER, LONGTEXT
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -18,6 +18,11 @@ class ForumReply(Base):
     reply_to_user_id = Column(INTEGER(unsigned=True), ForeignKey('users.id', ondelete='SET NULL'), nullable=True, index=True)
     is_deleted = Column(Boolean, nullable=False, server_default='0', index=True)
     floor_number = Column(INTEGER(unsigned=True), nullable=True, index=True)
+    # 楼中楼：所属顶级回复id（顶级回复为自身）、嵌套深度（顶级为0）、
+    # 由各级楼层号（定长）拼接的路径，同一顶级回复下按path排序即为树的先序遍历
+    root_id = Column(INTEGER(unsigned=True), nullable=True)
+    depth = Column(INTEGER(unsigned=True), nullable=False, server_default='0')
+    path = Column(String(255), nullable=True)
     created_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), index=True)
     updated_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), onupdate=func.now())
     deleted_at = Column(TIMESTAMP, nullable=True, index=True)
@@ -26,4 +31,8 @@ class ForumReply(Base):
     post = relationship("ForumPost", backref="replies")
     author = relationship("User", foreign_keys=[user_id], backref="forum_replies")
     parent_reply = relationship("ForumReply", remote_side=[id], backref="child_replies")
-    reply_to_user = relationship("User", foreign_keys=[reply_to_user_id])
\ No newline at end of file
+    reply_to_user = relationship("User", foreign_keys=[reply_to_user_id])
+
+    __table_args__ = (
+        Index("idx_forum_replies_root_path", "root_id", "path"),
+    )
\ No newline at end of file
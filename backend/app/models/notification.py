@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, TIMESTAMP, TEXT, Boolean, ForeignKey
+from sqlalchemy import Column, String, TIMESTAMP, TEXT, Boolean, ForeignKey, Index
 from sqlalchemy.dialects.mysql import INTEGER
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -37,4 +37,49 @@ class Notification(Base):
     # 关系
     recipient = relationship("User", foreign_keys=[recipient_id], back_populates="notifications_received")
     sender = relationship("User", foreign_keys=[sender_id], back_populates="notifications_sent")
-    admin = relationship("User", foreign_keys=[admin_id])
\ No newline at end of file
+    admin = relationship("User", foreign_keys=[admin_id])
+
+
+class BroadcastNotification(Base):
+    """
+    广播通知，每次广播只写一行，读取时与个人通知合并
+
+    可见范围：广播发布时已注册、且角色与 target_role 匹配（为空则不限）的用户
+    """
+    __tablename__ = "broadcast_notifications"
+
+    id = Column(INTEGER(unsigned=True), primary_key=True, autoincrement=True)
+    uuid = Column(String(36), unique=True, nullable=False, index=True)
+    admin_id = Column(INTEGER(unsigned=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True, comment="发布广播的管理员")
+    type = Column(String(50), nullable=False, comment="通知类型")
+    title = Column(String(255), nullable=False, comment="通知标题")
+    content = Column(TEXT, nullable=True, comment="通知内容")
+    related_id = Column(INTEGER(unsigned=True), nullable=True, comment="相关对象ID")
+    related_uuid = Column(String(36), nullable=True, comment="相关对象UUID")
+    target_role = Column(String(50), nullable=True, comment="只对该角色可见，为空时对所有用户可见")
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), index=True)
+
+    # 关系
+    admin = relationship("User", foreign_keys=[admin_id])
+
+    # 与 Notification 对齐的非持久化字段，按当前用户填充后可直接用 NotificationResponse 序列化
+    sender = None
+    sender_id = None
+    recipient_id = None
+    is_read = False
+    read_at = None
+
+
+class BroadcastNotificationRead(Base):
+    """用户对广播通知的已读/删除标记，没有记录表示未读"""
+    __tablename__ = "broadcast_notification_reads"
+
+    broadcast_id = Column(INTEGER(unsigned=True), ForeignKey("broadcast_notifications.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(INTEGER(unsigned=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    read_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), comment="阅读时间")
+    deleted_at = Column(TIMESTAMP, nullable=True, comment="用户删除该广播的时间")
+
+    __table_args__ = (
+        Index("idx_broadcast_reads_user", "user_id", "broadcast_id"),
+    )
+
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, TIMESTAMP, Index, UniqueConstraint
+from sqlalchemy.dialects.mysql import INTEGER, MEDIUMTEXT
+from sqlalchemy.sql import func
+
+from app.config.database import Base
+
+
+class SearchDocument(Base):
+    """全文检索文档：博客、论坛帖子、作品展示中公开可见的内容各一行，由crud在写入时同步"""
+    __tablename__ = "search_documents"
+
+    id = Column(INTEGER(unsigned=True), primary_key=True, autoincrement=True)
+    content_type = Column(String(20), nullable=False)  # blog, forum_post, showcase
+    content_id = Column(INTEGER(unsigned=True), nullable=False)
+    content_uuid = Column(String(36), nullable=False)
+    author_id = Column(INTEGER(unsigned=True), nullable=True)
+    title = Column(String(255), nullable=False)
+    body = Column(MEDIUMTEXT, nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("content_type", "content_id", name="uk_search_documents_content"),
+        # ngram分词器支持中文，MySQL以外的数据库上为普通索引
+        Index("ft_search_documents_title", "title", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index("ft_search_documents_title_body", "title", "body", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
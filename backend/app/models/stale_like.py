@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, TIMESTAMP, Index
+from sqlalchemy.dialects.mysql import INTEGER
+from sqlalchemy.sql import func
+
+from app.config.database import Base
+
+
+class StaleLike(Base):
+    """Redis不可用时直接写入MySQL的点赞，与点赞表的修改在同一事务中插入；Redis恢复后据此清除对应的点赞集合和待写回记录"""
+    __tablename__ = "stale_likes"
+
+    id = Column(INTEGER(unsigned=True), primary_key=True, autoincrement=True)
+    kind = Column(String(32), nullable=False)
+    target_id = Column(INTEGER(unsigned=True), nullable=False)
+    user_id = Column(INTEGER(unsigned=True), nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_stale_likes_kind_target", "kind", "target_id"),
+    )
@@ -47,5 +47,6 @@ class AnnouncementResponse(BaseModel):
         from_attributes = True
 
 class PaginatedAnnouncementResponse(BaseModel):
-    total: int
-    items: list[AnnouncementResponse]
\ No newline at end of file
+    total: Optional[int] = None
+    items: list[AnnouncementResponse]
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -63,8 +63,9 @@ class CourseResourceResponse(BaseModel):
         from_attributes = True
 
 class PaginatedCourseResourceResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[CourseResourceResponse]
+    next_cursor: Optional[str] = None
 
 class CourseResourceDetailResponse(BaseModel):
     uuid: str
@@ -52,5 +52,6 @@ class ForumCategoryResponse(BaseModel):
 
 
 class PaginatedForumCategoryResponse(BaseModel):
-    total: int
-    items: List[ForumCategoryResponse]
\ No newline at end of file
+    total: Optional[int] = None
+    items: List[ForumCategoryResponse]
+    next_cursor: Optional[str] = None
\ No newline at end of file
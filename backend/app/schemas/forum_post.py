@@ -95,5 +95,7 @@ class ForumPostListResponse(BaseModel):
 
 
 class PaginatedForumPostResponse(BaseModel):
-    total: int
-    items: List[ForumPostListResponse]
\ No newline at end of file
+    total: Optional[int] = None
+    items: List[ForumPostListResponse]
+    next_cursor: Optional[str] = None
+    has_more: Optional[bool] = None
\ No newline at end of file
@@ -46,6 +46,8 @@ class ForumReplyResponse(BaseModel):
     reply_to_user: Optional[UserSimpleResponse] = None
     is_deleted: bool
     floor_number: Optional[int]
+    root_id: Optional[int] = None
+    depth: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -59,8 +61,15 @@ class ForumReplyWithChildren(ForumReplyResponse):
 
 
 class PaginatedForumReplyResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[ForumReplyResponse]
+    next_cursor: Optional[str] = None
+
+
+class ForumThreadResponse(ForumReplyResponse):
+    """楼层页中的顶级回复，children为先序排列的前若干条子回复"""
+    child_count: int = 0
+    children: List[ForumReplyResponse] = []
 
 
 # 更新模型以支持递归引用
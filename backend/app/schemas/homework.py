@@ -74,8 +74,9 @@ class HomeworkDetailResponse(BaseModel):
         from_attributes = True
 
 class PaginatedHomeworkResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[HomeworkResponse]
+    next_cursor: Optional[str] = None
 
 class HomeworkStatusUpdate(BaseModel):
     status: HomeworkStatus
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List
 
 
 # Showcase likes
@@ -56,4 +57,11 @@ class ShowcaseCommentReplyLikeResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# 批量查询点赞状态，每类最多200个
+class LikeStatusBatchRequest(BaseModel):
+    showcase_uuids: List[str] = Field(default_factory=list, max_length=200)
+    comment_uuids: List[str] = Field(default_factory=list, max_length=200)
+    reply_uuids: List[str] = Field(default_factory=list, max_length=200)
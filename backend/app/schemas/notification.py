@@ -30,6 +30,12 @@ class NotificationCreate(NotificationBase):
     admin_id: Optional[int] = None
 
 
+class NotificationBroadcast(NotificationBase):
+    """广播通知的内容"""
+    sender_id: Optional[int] = None
+    admin_id: Optional[int] = None
+
+
 class NotificationUpdate(BaseModel):
     is_read: Optional[bool] = None
 
@@ -66,9 +72,11 @@ class NotificationResponse(BaseModel):
 
 
 class PaginatedNotificationResponse(BaseModel):
-    total: int
-    unread_count: int
+    total: Optional[int] = None
+    unread_count: Optional[int] = None
     items: List[NotificationResponse]
+    next_cursor: Optional[str] = None
+    has_more: Optional[bool] = None
 
 
 class NotificationMarkAllReadRequest(BaseModel):
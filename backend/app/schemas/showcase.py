@@ -95,8 +95,10 @@ class ShowcaseReviewRequest(BaseModel):
         return self
 
 class PaginatedShowcaseResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[ShowcaseResponse]
+    next_cursor: Optional[str] = None
+    has_more: Optional[bool] = None
 
 
 class ShowcasePromotionRequest(BaseModel):
@@ -40,5 +40,6 @@ class ShowcaseCommentResponse(BaseModel):
         from_attributes = True
 
 class PaginatedShowcaseCommentResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[ShowcaseCommentResponse]
+    next_cursor: Optional[str] = None
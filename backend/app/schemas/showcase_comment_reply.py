@@ -42,5 +42,6 @@ class ShowcaseCommentReplyResponse(BaseModel):
         from_attributes = True
 
 class PaginatedShowcaseCommentReplyResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[ShowcaseCommentReplyResponse]
+    next_cursor: Optional[str] = None
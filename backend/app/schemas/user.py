@@ -103,8 +103,9 @@ class UserSearchRequest(BaseModel):
 
 # Paginated user response
 class PaginatedUserResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: List[UserResponse]
+    next_cursor: Optional[str] = None
 
 # Batch import related schemas
 class BatchImportUserData(BaseModel):
@@ -121,7 +122,7 @@ class ConflictUser(BaseModel):
     student_id: str
     real_name: str
     student_class: str
-    conflict_type: str  # student_id, real_name, username
+    conflict_type: str  # student_id, username (existing user); duplicate_student_id, duplicate_username (earlier row in the file)
     existing_user: Optional[UserSimpleResponse] = None
 
 class BatchImportPreviewResponse(BaseModel):
@@ -136,6 +137,17 @@ class BatchImportResult(BaseModel):
     errors: List[str]
     created_users: List[UserResponse]
 
+class BatchImportJob(BaseModel):
+    job_id: str
+    status: str  # pending, running, done, failed
+    stage: Optional[str] = None  # hashing, deleting, inserting, done
+    total: int
+    processed: int
+    success_count: Optional[int] = None
+    error_count: Optional[int] = None
+    errors: List[str] = []
+    error: Optional[str] = None
+
 # Schema for admin resetting user password
 class AdminPasswordResetRequest(BaseModel):
     new_password: str
@@ -5,8 +5,9 @@ from typing import Optional
 from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
 from redis import Redis
+from starlette.concurrency import run_in_threadpool
 from app import crud, models, schemas
-from app.utils import security
+from app.utils import password_hasher, security
 from . import mail_service
 
 # --- Registration Logic ---
@@ -89,29 +90,38 @@ def finalize_registration(db: Session, redis_client: Redis, user_create: schemas
 
 # --- Login Logic ---
 
-def authenticate_user(db: Session, identifier: str, password: str) -> Optional[models.User]:
+def _get_user_by_identifier(db: Session, identifier: str) -> Optional[models.User]:
     """
-    Authenticates a user by username, email, or student ID.
+    Looks up a user by username, email, or student ID.
     Automatically detects identifier type based on format.
     """
-    user = None
-    
     # 1. Email detection (contains @)
     if '@' in identifier:
-        user = crud.crud_user.get_user_by_email(db, email=identifier)
+        return crud.crud_user.get_user_by_email(db, email=identifier)
     # 2. Student ID detection (pure digits)
-    elif identifier.isdigit():
-        user = crud.crud_user.get_user_by_student_id(db, student_id=identifier)
+    if identifier.isdigit():
+        return crud.crud_user.get_user_by_student_id(db, student_id=identifier)
     # 3. Username (other cases)
-    else:
-        user = crud.crud_user.get_user_by_username(db, username=identifier)
-    
+    return crud.crud_user.get_user_by_username(db, username=identifier)
+
+async def authenticate_user(db: Session, identifier: str, password: str) -> Optional[models.User]:
+    """
+    Authenticates a user by username, email, or student ID.
+    bcrypt is awaited on the hasher pool, so no event loop or threadpool thread is held
+    while it runs; the synchronous session is only used from the threadpool.
+    """
+    user = await run_in_threadpool(_get_user_by_identifier, db, identifier)
     if not user:
         return None # User not found
-        
-    if not security.verify_password(password, user.hashed_password):
+
+    if not await password_hasher.verify_password_async(password, user.hashed_password):
         return None # Invalid password
-        
+
+    # Transparently upgrade hashes made with a different bcrypt cost
+    if password_hasher.needs_rehash(user.hashed_password):
+        user.hashed_password = await password_hasher.hash_password_async(password)
+        await run_in_threadpool(db.commit)
+
     return user
 
 def generate_tokens(user: models.User) -> schemas.Token:
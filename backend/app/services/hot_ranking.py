@@ -0,0 +1,252 @@
+"""
+论坛热门帖子排行
+
+热度随时间指数衰减：每个事件（发帖、回复、浏览）贡献 weight * 2^((t - now) / 半衰期)。
+所有帖子同时按相同比例衰减，排序只需比较 sum(weight * 2^((t - epoch) / 半衰期))，
+因此事件发生时直接在Redis有序集合上 ZINCRBY 即可增量维护，无需重新计算其他帖子。
+
+有序集合 forum:hot:all 和 forum:hot:category:{id} 保存帖子id与分数，epoch 保存在 forum:hot:epoch。
+定时任务按数据库全量重算窗口期内的帖子，纠正删帖、删回复、改分类等未增量处理的偏差，
+并把epoch前移到当前时间，避免分数无限增长。
+"""
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import desc
+from sqlalchemy.orm import Session
+
+from app.config.redis_config import redis_client
+from app.config.settings import settings
+from app.models.forum_post import ForumPost
+from app.models.forum_reply import ForumReply
+from app.utils import redis_lock
+
+logger = logging.getLogger("app")
+
+EPOCH_KEY = "forum:hot:epoch"
+GLOBAL_KEY = "forum:hot:all"
+CATEGORY_PREFIX = "forum:hot:category:"
+RECOMPUTE_LOCK_KEY = "forum:hot:recompute:lock"
+RECOMPUTE_LOCK_TTL = 300
+
+# 各类事件的权重
+POST_WEIGHT = 1.0
+REPLY_WEIGHT = 3.0
+VIEW_WEIGHT = 0.1
+
+# 全量重算只统计最近这么多天的帖子（超过约14个半衰期的贡献可以忽略），每个集合最多保留的帖子数
+WINDOW_DAYS = 14
+MAX_MEMBERS = 1000
+# 读取时多取的候选数，弥补已删除或超出天数的帖子
+HYDRATE_SLACK = 20
+
+# KEYS[1]=epoch KEYS[2..]=有序集合；ARGV[1]=帖子id ARGV[2]=权重 ARGV[3]=事件时间 ARGV[4]=半衰期
+# epoch不存在时以本次事件时间为epoch
+RECORD_SCRIPT = """
+local epoch = tonumber(redis.call('GET', KEYS[1]))
+if not epoch then
+    epoch = tonumber(ARGV[3])
+    redis.call('SET', KEYS[1], ARGV[3])
+end
+local increment = tonumber(ARGV[2]) * math.pow(2, (tonumber(ARGV[3]) - epoch) / tonumber(ARGV[4]))
+for i = 2, #KEYS do
+    redis.call('ZINCRBY', KEYS[i], increment, ARGV[1])
+end
+return tostring(increment)
+"""
+
+_record_script = redis_client.register_script(RECORD_SCRIPT)
+
+
+def _category_key(category_id: int) -> str:
+    return f"{CATEGORY_PREFIX}{category_id}"
+
+
+def _timestamp(value: datetime) -> float:
+    # 数据库中的时间为不带时区的UTC时间
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _record(post: ForumPost, weight: float) -> None:
+    try:
+        _record_script(
+            keys=[EPOCH_KEY, GLOBAL_KEY, _category_key(post.category_id)],
+            args=[post.id, weight, time.time(), settings.FORUM_HOT_HALF_LIFE]
+        )
+    except RedisError as e:
+        # 漏记的事件由下一次全量重算补上
+        logger.warning(f"Hot ranking update failed: {e}")
+
+
+def record_post(post: ForumPost) -> None:
+    _record(post, POST_WEIGHT)
+
+
+def record_reply(post: ForumPost) -> None:
+    _record(post, REPLY_WEIGHT)
+
+
+def record_view(post: ForumPost) -> None:
+    _record(post, VIEW_WEIGHT)
+
+
+def remove_post(post: ForumPost) -> None:
+    """帖子删除后从排行中移除"""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zrem(GLOBAL_KEY, post.id)
+        pipe.zrem(_category_key(post.category_id), post.id)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Hot ranking removal failed: {e}")
+
+
+def move_post(post: ForumPost, old_category_id: int) -> None:
+    """帖子改分类后把分数从原分类的排行移到新分类"""
+    try:
+        score = redis_client.zscore(GLOBAL_KEY, post.id)
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.zrem(_category_key(old_category_id), post.id)
+        if score is not None:
+            pipe.zadd(_category_key(post.category_id), {post.id: score})
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Hot ranking move failed: {e}")
+
+
+def _hot_posts_from_db(db: Session, *, limit: int, days: int, category_id: Optional[int]) -> List[ForumPost]:
+    from app.crud.crud_forum_post import LIST_OPTIONS
+    query = db.query(ForumPost).options(*LIST_OPTIONS).filter(
+        ForumPost.is_deleted == False,
+        ForumPost.deleted_at.is_(None),
+        ForumPost.created_at >= datetime.utcnow() - timedelta(days=days)
+    )
+    if category_id is not None:
+        query = query.filter(ForumPost.category_id == category_id)
+    return query.order_by(desc(ForumPost.reply_count), desc(ForumPost.view_count)).limit(limit).all()
+
+
+def get_hot_posts(db: Session, *, limit: int = 10, days: int = 7, category_id: Optional[int] = None) -> List[ForumPost]:
+    """
+    按热度取帖子：分批 ZREVRANGE 取候选id，按批加载帖子并按热度顺序返回，只保留 days 天内发布的帖子
+
+    days 较小时靠前的候选大多超出天数，继续向后读取直到凑满 limit 或读完排行；
+    排行中的帖子不足时（集合只保留前 MAX_MEMBERS 个）用数据库中按回复数和浏览数排序的帖子补足。
+    Redis不可用或排行尚未建立时全部从数据库查询。排行只覆盖 WINDOW_DAYS 天，days 更大时也直接查询数据库。
+    """
+    if days > WINDOW_DAYS:
+        return _hot_posts_from_db(db, limit=limit, days=days, category_id=category_id)
+    from app.crud.crud_forum_post import LIST_OPTIONS
+    key = GLOBAL_KEY if category_id is None else _category_key(category_id)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    posts: List[ForumPost] = []
+    start = 0
+    batch = limit + HYDRATE_SLACK
+    while len(posts) < limit:
+        try:
+            ids = [int(post_id) for post_id in redis_client.zrevrange(key, start, start + batch - 1)]
+        except RedisError as e:
+            logger.warning(f"Hot ranking read failed: {e}")
+            ids = []
+        if not ids:
+            break
+        found = {
+            post.id: post
+            for post in db.query(ForumPost).options(*LIST_OPTIONS).filter(
+                ForumPost.id.in_(ids),
+                ForumPost.is_deleted == False,
+                ForumPost.deleted_at.is_(None),
+                ForumPost.created_at >= cutoff
+            )
+        }
+        posts.extend(found[post_id] for post_id in ids if post_id in found)
+        if len(ids) < batch:
+            break
+        start += batch
+        # 命中率低时下一批多取一些
+        batch = min(batch * 2, MAX_MEMBERS)
+
+    if len(posts) < limit:
+        seen = {post.id for post in posts}
+        posts.extend(
+            post for post in _hot_posts_from_db(db, limit=limit + len(seen), days=days, category_id=category_id)
+            if post.id not in seen
+        )
+    return posts[:limit]
+
+
+def _scores(db: Session, epoch: float) -> Dict[int, list]:
+    """按数据库计算窗口期内每个帖子的 (分类id, 分数)"""
+    half_life = settings.FORUM_HOT_HALF_LIFE
+    cutoff = datetime.utcnow() - timedelta(days=WINDOW_DAYS)
+
+    def decay(value: datetime) -> float:
+        return 2 ** ((_timestamp(value) - epoch) / half_life)
+
+    scores = {}
+    posts = db.query(
+        ForumPost.id, ForumPost.category_id, ForumPost.created_at, ForumPost.last_reply_at, ForumPost.view_count
+    ).filter(
+        ForumPost.is_deleted == False,
+        ForumPost.deleted_at.is_(None),
+        ForumPost.created_at >= cutoff
+    )
+    for post_id, category_id, created_at, last_reply_at, view_count in posts:
+        # 浏览没有逐条记录时间，按最后活跃时间计
+        last_active = max(created_at, last_reply_at or created_at)
+        scores[post_id] = [category_id, POST_WEIGHT * decay(created_at) + VIEW_WEIGHT * (view_count or 0) * decay(last_active)]
+
+    # 窗口期内帖子的回复都晚于cutoff
+    replies = db.query(ForumReply.post_id, ForumReply.created_at).filter(
+        ForumReply.created_at >= cutoff,
+        ForumReply.is_deleted == False,
+        ForumReply.deleted_at.is_(None)
+    ).yield_per(1000)
+    for post_id, created_at in replies:
+        if post_id in scores:
+            scores[post_id][1] += REPLY_WEIGHT * decay(created_at)
+    return scores
+
+
+def recompute(db: Session) -> int:
+    """定时任务：按数据库全量重算排行并前移epoch，返回入榜帖子数；多进程部署时通过Redis锁只由一个进程执行"""
+    with redis_lock.hold(RECOMPUTE_LOCK_KEY, RECOMPUTE_LOCK_TTL) as acquired:
+        if not acquired:
+            return 0
+        try:
+            epoch = time.time()
+            scores = _scores(db, epoch)
+            by_category = defaultdict(dict)
+            for post_id, (category_id, score) in scores.items():
+                by_category[_category_key(category_id)][post_id] = score
+
+            # 先写入临时键，再在一个事务中替换，读取方不会看到写了一半的排行
+            pipe = redis_client.pipeline(transaction=False)
+            targets = {GLOBAL_KEY: {post_id: score for post_id, (_, score) in scores.items()}, **by_category}
+            for key, members in targets.items():
+                pipe.delete(key + ":next")
+                if members:
+                    pipe.zadd(key + ":next", members)
+                    pipe.zremrangebyrank(key + ":next", 0, -MAX_MEMBERS - 1)
+            pipe.execute()
+
+            stale = [key.decode() for key in redis_client.scan_iter(match=CATEGORY_PREFIX + "*", count=1000)]
+            pipe = redis_client.pipeline(transaction=True)
+            for key in stale:
+                if not key.endswith(":next") and key not in targets:
+                    pipe.delete(key)
+            for key, members in targets.items():
+                if members:
+                    pipe.rename(key + ":next", key)
+                else:
+                    pipe.delete(key)
+            pipe.set(EPOCH_KEY, epoch)
+            pipe.execute()
+            return len(scores)
+        except RedisError as e:
+            logger.warning(f"Hot ranking recompute failed: {e}")
+            return 0
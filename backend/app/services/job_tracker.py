@@ -0,0 +1,74 @@
+"""
+后台任务进度跟踪
+
+任务状态保存在Redis hash job:{job_id} 中，任何worker都可以查询，完成后保留 JOB_TTL 秒。
+"""
+import json
+import time
+import uuid
+from typing import Optional
+
+from app.config.redis_config import redis_client
+
+JOB_PREFIX = "job:"
+JOB_TTL = 24 * 3600
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# 数值字段，读取时转换为int；列表/字典字段以JSON保存
+_INT_FIELDS = {"total", "processed", "success_count", "error_count", "created_at", "updated_at"}
+_JSON_FIELDS = {"errors", "result"}
+
+
+def _key(job_id: str) -> str:
+    return JOB_PREFIX + job_id
+
+
+def _encode(fields: dict) -> dict:
+    return {
+        name: json.dumps(value, default=str) if name in _JSON_FIELDS else value
+        for name, value in fields.items() if value is not None
+    }
+
+
+def create_job(kind: str, **fields) -> str:
+    """创建任务记录并返回任务id"""
+    job_id = str(uuid.uuid4())
+    now = int(time.time())
+    mapping = {"kind": kind, "status": PENDING, "processed": 0, "created_at": now, "updated_at": now}
+    mapping.update(_encode(fields))
+    pipe = redis_client.pipeline()
+    pipe.hset(_key(job_id), mapping=mapping)
+    pipe.expire(_key(job_id), JOB_TTL)
+    pipe.execute()
+    return job_id
+
+
+def update_job(job_id: str, **fields) -> None:
+    fields["updated_at"] = int(time.time())
+    redis_client.hset(_key(job_id), mapping=_encode(fields))
+
+
+def add_progress(job_id: str, processed: int) -> None:
+    pipe = redis_client.pipeline()
+    pipe.hincrby(_key(job_id), "processed", processed)
+    pipe.hset(_key(job_id), "updated_at", int(time.time()))
+    pipe.execute()
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    raw = redis_client.hgetall(_key(job_id))
+    if not raw:
+        return None
+    job = {"job_id": job_id}
+    for name, value in raw.items():
+        name, value = name.decode(), value.decode()
+        if name in _INT_FIELDS:
+            value = int(value)
+        elif name in _JSON_FIELDS:
+            value = json.loads(value)
+        job[name] = value
+    return job
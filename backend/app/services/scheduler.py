@@ -0,0 +1,65 @@
+"""
+进程内定时任务
+
+任务在应用启动时开始按固定间隔运行，在线程池中执行并获得独立的数据库会话；
+应用关闭时取消循环，并对标记了 run_on_shutdown 的任务再执行一次。
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config.mysql_config import SessionLocal
+
+logger = logging.getLogger("app")
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float
+    func: Callable[[Session], object]
+    run_on_shutdown: bool = False
+
+
+_jobs: List[Job] = []
+_tasks: List[asyncio.Task] = []
+
+
+def add_job(name: str, interval: float, func: Callable[[Session], object], *, run_on_shutdown: bool = False) -> None:
+    """注册定时任务，func接收一个数据库会话，需在 start() 之前调用"""
+    _jobs.append(Job(name=name, interval=interval, func=func, run_on_shutdown=run_on_shutdown))
+
+
+def _run_once(job: Job) -> None:
+    db = SessionLocal()
+    try:
+        job.func(db)
+    except Exception as e:
+        logger.error(f"Scheduled job {job.name} failed: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+async def _loop(job: Job) -> None:
+    while True:
+        await asyncio.sleep(job.interval)
+        await run_in_threadpool(_run_once, job)
+
+
+async def start() -> None:
+    for job in _jobs:
+        _tasks.append(asyncio.create_task(_loop(job), name=job.name))
+
+
+async def stop() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    for job in _jobs:
+        if job.run_on_shutdown:
+            await run_in_threadpool(_run_once, job)
@@ -0,0 +1,270 @@
+"""
+批量导入用户
+
+parse_roster 解析上传的名单（xlsx/xls/csv），按块读取并对整列做规范化，行数超过 USER_IMPORT_MAX_ROWS 时拒绝。
+
+导入请求只创建任务并立即返回任务id，导入在后台进行，进度通过 job_tracker 查询：
+1. 用进程池并行计算所有密码哈希；
+2. 覆盖模式下批量查出并删除已存在的用户；
+3. 按块多行INSERT，整个导入在一个事务中，每块一个SAVEPOINT：
+   某块失败时回滚该块并逐行重试，只有出错的行被跳过并记录行号。
+"""
+import logging
+import uuid
+from itertools import islice
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config.mysql_config import SessionLocal
+from app.config.settings import settings
+from app.crud import crud_user
+from app.models.user import User
+from app.services import job_tracker
+from app.utils import password_hasher, principal
+
+logger = logging.getLogger("app")
+
+JOB_KIND = "user_import"
+
+# 返回给前端的错误条数上限，其余只计数
+MAX_REPORTED_ERRORS = 200
+
+# 解析时每次读取的行数
+PARSE_CHUNK_SIZE = 5000
+
+# 支持中文和英文列名
+COLUMN_SETS = (
+    {"学号": "student_id", "姓名": "real_name", "班级": "student_class"},
+    {"STUDENT_ID": "student_id", "STUDENT_NAME": "real_name", "STUDENT_CLASS": "student_class"},
+)
+
+# CSV可能由Excel以UTF-8（带BOM）或GBK导出
+CSV_ENCODINGS = ("utf-8-sig", "gbk")
+
+
+def _column_mapping(header: Iterable) -> dict:
+    """表头 -> 字段名的映射，缺少列时抛出ValueError"""
+    names = {str(name).strip(): name for name in header if name is not None}
+    for column_set in COLUMN_SETS:
+        if all(column in names for column in column_set):
+            return {names[column]: field for column, field in column_set.items()}
+    raise ValueError(
+        "Missing required columns. Expected either: "
+        + " or ".join(", ".join(column_set) for column_set in COLUMN_SETS)
+    )
+
+
+def _normalize(df: pd.DataFrame, mapping: dict) -> pd.DataFrame:
+    """按列规范化：重命名、转为去除首尾空白的字符串，丢弃学号或姓名为空的行"""
+    df = df[list(mapping)].rename(columns=mapping)
+    present = df.notna()
+    df = df.astype(str).apply(lambda column: column.str.strip())
+    df = df.where(present, "")
+    return df[(df["student_id"] != "") & (df["real_name"] != "")]
+
+
+def _read_xlsx(file: BinaryIO) -> Iterator[pd.DataFrame]:
+    # read_only模式按行流式读取工作表，不在内存中构建整个工作簿
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        mapping = _column_mapping(header)
+        positions = [index for index, name in enumerate(header) if name in mapping]
+        columns = [header[index] for index in positions]
+        while True:
+            chunk = [[row[index] if index < len(row) else None for index in positions] for row in islice(rows, PARSE_CHUNK_SIZE)]
+            if not chunk:
+                return
+            yield _normalize(pd.DataFrame(chunk, columns=columns, dtype=object), mapping)
+    finally:
+        workbook.close()
+
+
+def _read_xls(file: BinaryIO) -> Iterator[pd.DataFrame]:
+    # 旧格式没有流式读取方式，整表读入
+    df = pd.read_excel(file, dtype=str)
+    yield _normalize(df, _column_mapping(df.columns))
+
+
+def _read_csv(file: BinaryIO) -> Iterator[pd.DataFrame]:
+    start = file.tell()
+    for encoding in CSV_ENCODINGS:
+        file.seek(start)
+        mapping = None
+        try:
+            for df in pd.read_csv(file, dtype=str, encoding=encoding, chunksize=PARSE_CHUNK_SIZE, skipinitialspace=True):
+                mapping = mapping or _column_mapping(df.columns)
+                yield _normalize(df, mapping)
+            return
+        except UnicodeDecodeError:
+            # 只有在还没有产出数据时才能换编码重试
+            if mapping is not None:
+                raise
+        except pd.errors.EmptyDataError:
+            return
+    raise ValueError("Unsupported CSV encoding, please save the file as UTF-8")
+
+
+_READERS = {".xlsx": _read_xlsx, ".xls": _read_xls, ".csv": _read_csv}
+
+SUPPORTED_EXTENSIONS = tuple(_READERS)
+
+
+def parse_roster(file: BinaryIO, filename: str) -> List[dict]:
+    """
+    解析上传的名单文件，返回 [{"student_id", "real_name", "student_class"}]
+
+    file 可以是上传的临时文件（SpooledTemporaryFile），大文件已由框架写入磁盘，这里按块读取。
+    """
+    reader = _READERS.get(next((ext for ext in _READERS if filename.lower().endswith(ext)), None))
+    if reader is None:
+        raise ValueError(f"Only {', '.join(SUPPORTED_EXTENSIONS)} files are supported")
+    file.seek(0)
+    users_data = []
+    for df in reader(file):
+        if len(users_data) + len(df) > settings.USER_IMPORT_MAX_ROWS:
+            raise ValueError(f"Too many rows, at most {settings.USER_IMPORT_MAX_ROWS} users can be imported at once")
+        users_data.extend(df.to_dict("records"))
+    return users_data
+
+
+def _chunks(items: list, size: int) -> Iterator[Tuple[int, list]]:
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+def _error_message(e: Exception) -> str:
+    return str(getattr(e, "orig", e))
+
+
+def _run_chunked(
+    db: Session, items: list, chunk_size: int, apply: Callable[[list], None], on_chunk: Callable[[int], None]
+) -> List[Tuple[int, str]]:
+    """
+    按块执行apply，每块一个SAVEPOINT；某块失败时回滚该块并逐行执行，返回失败行的 (下标, 错误)
+    """
+    errors = []
+    for start, chunk in _chunks(items, chunk_size):
+        try:
+            with db.begin_nested():
+                apply(chunk)
+        except (IntegrityError, DBAPIError):
+            for offset, item in enumerate(chunk):
+                try:
+                    with db.begin_nested():
+                        apply([item])
+                except (IntegrityError, DBAPIError) as e:
+                    errors.append((start + offset, _error_message(e)))
+        on_chunk(len(chunk))
+    return errors
+
+
+def _build_row(user_data: dict, hashed_password: str) -> dict:
+    user_uuid = uuid.uuid4()
+    return {
+        "uuid": str(user_uuid),
+        "username": user_data["real_name"],
+        # 由uuid生成，不会重复
+        "email": f"import_{user_uuid.hex}@example.com",
+        "hashed_password": hashed_password,
+        "real_name": user_data["real_name"],
+        "phone_number": "",
+        "school": "",
+        "student_id": user_data.get("student_id"),
+        "student_class": user_data.get("student_class"),
+        "role": "user",
+        "is_active": True,
+    }
+
+
+def _delete_existing(db: Session, users_data: List[dict]) -> Tuple[List[Tuple[int, str]], List[str]]:
+    """覆盖模式：删除与导入行学号或用户名相同的已有用户，返回无法删除的行和被删除用户的uuid"""
+    existing = crud_user.find_existing_users(
+        db,
+        student_ids=[user_data.get("student_id") for user_data in users_data],
+        usernames=[user_data.get("real_name") for user_data in users_data]
+    )
+    # 每个导入行对应的已有用户：学号优先，其次用户名
+    targets = []
+    for index, user_data in enumerate(users_data):
+        user = existing.by_student_id.get(user_data.get("student_id")) or existing.by_username.get(user_data.get("real_name"))
+        if user is not None:
+            targets.append((index, user))
+
+    def apply(chunk: list) -> None:
+        db.execute(delete(User).where(User.id.in_({user.id for _, user in chunk})))
+
+    failed = _run_chunked(db, targets, settings.USER_IMPORT_CHUNK_SIZE, apply, lambda n: None)
+    failed_positions = {position for position, _ in failed}
+    deleted_uuids = {user.uuid for position, (_, user) in enumerate(targets) if position not in failed_positions}
+    return [(targets[position][0], error) for position, error in failed], list(deleted_uuids)
+
+
+def start_import(*, users_data: List[dict], conflict_resolution: str) -> str:
+    """创建导入任务，返回任务id，之后需调用 run_import 执行"""
+    return job_tracker.create_job(JOB_KIND, total=len(users_data), conflict_resolution=conflict_resolution)
+
+
+def run_import(job_id: str, *, users_data: List[dict], conflict_resolution: str) -> None:
+    """执行导入任务，使用独立的数据库会话，适合放在BackgroundTasks中运行"""
+    db = SessionLocal()
+    try:
+        job_tracker.update_job(job_id, status=job_tracker.RUNNING, stage="hashing")
+        # 初始密码与姓名相同
+        hashed_passwords = password_hasher.hash_many([user_data["real_name"] for user_data in users_data])
+
+        row_errors: List[Tuple[int, str]] = []
+        deleted_uuids: List[str] = []
+        if conflict_resolution == "overwrite":
+            job_tracker.update_job(job_id, stage="deleting")
+            row_errors, deleted_uuids = _delete_existing(db, users_data)
+        # 已有用户删除失败的行不再插入
+        skipped = {index for index, _ in row_errors}
+
+        job_tracker.update_job(job_id, stage="inserting")
+        pending = [
+            (index, _build_row(user_data, hashed_passwords[index]))
+            for index, user_data in enumerate(users_data) if index not in skipped
+        ]
+        job_tracker.add_progress(job_id, len(skipped))
+
+        def apply(chunk: list) -> None:
+            db.execute(insert(User), [row for _, row in chunk])
+
+        failed = _run_chunked(
+            db, pending, settings.USER_IMPORT_CHUNK_SIZE, apply, lambda n: job_tracker.add_progress(job_id, n)
+        )
+        db.commit()
+        principal.invalidate(*deleted_uuids)
+
+        row_errors += [(pending[position][0], error) for position, error in failed]
+        row_errors.sort()
+        job_tracker.update_job(
+            job_id,
+            status=job_tracker.DONE,
+            stage="done",
+            success_count=len(pending) - len(failed),
+            error_count=len(row_errors),
+            errors=[f"Row {index + 1}: {error}" for index, error in row_errors[:MAX_REPORTED_ERRORS]]
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"User import {job_id} failed: {e}", exc_info=True)
+        job_tracker.update_job(job_id, status=job_tracker.FAILED, error=str(e))
+    finally:
+        db.close()
+
+
+def get_import_job(job_id: str) -> Optional[dict]:
+    job = job_tracker.get_job(job_id)
+    if not job or job.get("kind") != JOB_KIND:
+        return None
+    return job
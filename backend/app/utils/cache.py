@@ -0,0 +1,236 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+from typing import Callable, Iterable, List, Optional
+
+from fastapi import Response
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from app.config.redis_config import redis_client
+from app.config.settings import settings
+
+logger = logging.getLogger("app")
+
+KEY_PREFIX = "cache:resp:"
+LOCK_PREFIX = "cache:lock:"
+TAG_PREFIX = "cache:tag:"
+GENERATION_PREFIX = "cache:gen:"
+INDEX_KEY = "cache:index"
+
+# 标签集合的过期时间（秒），需长于任何条目的TTL，每次写入条目时续期
+TAG_TTL = 24 * 3600
+
+# 未抢到重建锁的请求轮询等待缓存写入的间隔与上限（秒）
+LOCK_POLL_INTERVAL = 0.05
+LOCK_WAIT_TIMEOUT = 3.0
+
+# 不参与缓存键计算的端点参数（会话、当前用户等）
+IGNORED_PARAMS = {"db", "current_user"}
+
+# 写入条目前核对各标签的代数：回源期间标签被清除过（代数变化）时不写入，避免把失效前读到的旧数据缓存一个TTL
+# KEYS[1]=条目 KEYS[2]=索引 KEYS[3..n+2]=标签集合 KEYS[n+3..2n+2]=标签代数
+# ARGV[1]=响应体 ARGV[2]=TTL ARGV[3]=标签集合TTL ARGV[4]=写入时间 ARGV[5]=标签数n ARGV[6..]=回源前读到的代数
+# 返回写入后的条目总数，代数已变化时返回-1
+STORE_SCRIPT = """
+local n = tonumber(ARGV[5])
+for i = 1, n do
+    if (redis.call('GET', KEYS[n + 2 + i]) or '') ~= ARGV[5 + i] then
+        return -1
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 1, n do
+    redis.call('SADD', KEYS[2 + i], KEYS[1])
+    redis.call('EXPIRE', KEYS[2 + i], ARGV[3])
+end
+redis.call('ZADD', KEYS[2], ARGV[4], KEYS[1])
+return redis.call('ZCARD', KEYS[2])
+"""
+
+_store_script = redis_client.register_script(STORE_SCRIPT)
+
+
+def _build_key(namespace: str, params: dict) -> str:
+    items = sorted(
+        (name, value) for name, value in params.items() if name not in IGNORED_PARAMS
+    )
+    raw = json.dumps(items, default=str, ensure_ascii=False)
+    return KEY_PREFIX + namespace + ":" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _get(key: str) -> Optional[bytes]:
+    try:
+        return redis_client.get(key)
+    except RedisError as e:
+        logger.warning(f"Response cache get failed: {e}")
+        return None
+
+
+def _acquire_lock(key: str, ttl: int) -> bool:
+    try:
+        return bool(redis_client.set(LOCK_PREFIX + key, 1, nx=True, ex=ttl))
+    except RedisError as e:
+        logger.warning(f"Response cache lock failed: {e}")
+        # Redis不可用时直接回源
+        return True
+
+
+def _release_lock(key: str) -> None:
+    try:
+        redis_client.delete(LOCK_PREFIX + key)
+    except RedisError as e:
+        logger.warning(f"Response cache unlock failed: {e}")
+
+
+def _generations(tags: tuple) -> Optional[List[str]]:
+    """回源前读取各标签的代数，Redis不可用时返回None（之后不写入缓存）"""
+    if not tags:
+        return []
+    try:
+        return [(value or b"").decode() for value in redis_client.mget([GENERATION_PREFIX + tag for tag in tags])]
+    except RedisError as e:
+        logger.warning(f"Response cache generation read failed: {e}")
+        return None
+
+
+def _store(key: str, body: bytes, ttl: int, tags: tuple, generations: Optional[List[str]]) -> None:
+    if generations is None or len(body) > settings.CACHE_MAX_ENTRY_BYTES:
+        return
+    try:
+        size = _store_script(
+            keys=[key, INDEX_KEY, *(TAG_PREFIX + tag for tag in tags), *(GENERATION_PREFIX + tag for tag in tags)],
+            args=[body, ttl, TAG_TTL, time.time(), len(tags), *generations]
+        )
+        if size < 0:
+            return
+
+        # 超出条目上限时淘汰最早写入的条目
+        overflow = size - settings.CACHE_MAX_ENTRIES
+        if overflow > 0:
+            evicted = [k for k, _ in redis_client.zpopmin(INDEX_KEY, overflow)]
+            if evicted:
+                redis_client.delete(*evicted)
+    except RedisError as e:
+        logger.warning(f"Response cache set failed: {e}")
+
+
+def _cacheable(response) -> Optional[bytes]:
+    if isinstance(response, Response) and response.status_code == 200:
+        if response.media_type == "application/json":
+            return bytes(response.body)
+    return None
+
+
+def _cached_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+
+def cached(namespace: str, *, ttl: int = 60, tags: Iterable[str] = ()) -> Callable:
+    """
+    公共只读端点的响应缓存装饰器
+
+    以端点参数（忽略db等依赖）计算缓存键，缓存200的JSON响应体。
+    未命中时通过Redis锁只让一个请求回源，其余请求短暂等待缓存写入，
+    避免缓存失效瞬间大量请求同时打到数据库。相关数据变更时由crud层调用
+    invalidate_tags 清除对应标签下的所有条目。Redis不可用时直接回源。
+
+    Args:
+        namespace: 缓存键前缀，通常为端点名
+        ttl: 过期时间（秒）
+        tags: 实体标签，如 "showcase"、"forum_post"
+    """
+    tags = tuple(tags)
+    lock_ttl = max(int(LOCK_WAIT_TIMEOUT) * 2, 1)
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs) -> str:
+            bound = signature.bind_partial(*args, **kwargs)
+            return _build_key(namespace, bound.arguments)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not settings.CACHE_ENABLED:
+                    return await func(*args, **kwargs)
+                key = make_key(args, kwargs)
+                body = await run_in_threadpool(_get, key)
+                if body is not None:
+                    return _cached_response(body)
+
+                locked = await run_in_threadpool(_acquire_lock, key, lock_ttl)
+                if not locked:
+                    deadline = time.monotonic() + LOCK_WAIT_TIMEOUT
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(LOCK_POLL_INTERVAL)
+                        body = await run_in_threadpool(_get, key)
+                        if body is not None:
+                            return _cached_response(body)
+                try:
+                    generations = await run_in_threadpool(_generations, tags)
+                    response = await func(*args, **kwargs)
+                    body = _cacheable(response)
+                    if body is not None:
+                        await run_in_threadpool(_store, key, body, ttl, tags, generations)
+                    return response
+                finally:
+                    if locked:
+                        await run_in_threadpool(_release_lock, key)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return func(*args, **kwargs)
+            key = make_key(args, kwargs)
+            body = _get(key)
+            if body is not None:
+                return _cached_response(body)
+
+            locked = _acquire_lock(key, lock_ttl)
+            if not locked:
+                deadline = time.monotonic() + LOCK_WAIT_TIMEOUT
+                while time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    body = _get(key)
+                    if body is not None:
+                        return _cached_response(body)
+            try:
+                generations = _generations(tags)
+                response = func(*args, **kwargs)
+                body = _cacheable(response)
+                if body is not None:
+                    _store(key, body, ttl, tags, generations)
+                return response
+            finally:
+                if locked:
+                    _release_lock(key)
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_tags(*tags: str) -> None:
+    """清除指定标签下的所有缓存条目，Redis异常只记录日志不影响写操作"""
+    try:
+        for tag in tags:
+            tag_key = TAG_PREFIX + tag
+            # 先递增代数，正在回源的请求不会再写入失效前的结果
+            redis_client.incr(GENERATION_PREFIX + tag)
+            keys = redis_client.smembers(tag_key)
+            pipe = redis_client.pipeline()
+            if keys:
+                pipe.delete(*keys)
+                pipe.zrem(INDEX_KEY, *keys)
+            pipe.delete(tag_key)
+            pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Response cache invalidation failed for {tags}: {e}")
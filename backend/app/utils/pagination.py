@@ -0,0 +1,275 @@
+import base64
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional, Sequence, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import and_, false, func, literal, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config.redis_config import redis_client
+from app.config.settings import settings
+
+logger = logging.getLogger("app")
+
+# 排序键：(模型列, 是否降序)，最后一列必须唯一（通常为id），保证游标位置确定
+KeysetOrder = Sequence[Tuple[Any, bool]]
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析或与排序键不匹配"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    try:
+        return [_decode_value(v) for v in values]
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def _nullable(column) -> bool:
+    return getattr(getattr(column, "expression", column), "nullable", True)
+
+
+def _equals(column, value):
+    return column.is_(None) if value is None else column == literal(value, column.type)
+
+
+def _after(column, value, descending: bool):
+    """列值排在value之后的条件，返回None表示不可能"""
+    # MySQL中NULL视为最小值：升序时排在最前，降序时排在最后
+    if descending:
+        if value is None:
+            return None
+        condition = column < literal(value, column.type)
+        return or_(condition, column.is_(None)) if _nullable(column) else condition
+    if value is None:
+        return column.isnot(None)
+    return column > literal(value, column.type)
+
+
+def keyset_condition(order: KeysetOrder, values: Sequence[Any]):
+    """生成“排在游标之后”的条件，即按排序键做字典序比较"""
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        after = _after(column, values[i], descending)
+        if after is None:
+            continue
+        prefix = [_equals(col, val) for (col, _), val in zip(order[:i], values[:i])]
+        clauses.append(and_(*prefix, after))
+    return or_(*clauses) if clauses else false()
+
+
+def _apply(statement, order: KeysetOrder, cursor: Optional[str], limit: int):
+    if cursor:
+        values = decode_cursor(cursor, len(order))
+        statement = statement.where(keyset_condition(order, values))
+    return statement.order_by(
+        *[column.desc() if descending else column.asc() for column, descending in order]
+    ).limit(limit + 1)
+
+
+def _page(items: list, order: KeysetOrder, limit: int) -> Tuple[Optional[str], list]:
+    if len(items) <= limit:
+        return None, items
+    items = items[:limit]
+    last = items[-1]
+    return encode_cursor([getattr(last, column.key) for column, _ in order]), items
+
+
+def paginate_keyset(query, order: KeysetOrder, *, cursor: Optional[str], limit: int) -> Tuple[Optional[str], list]:
+    """
+    游标分页
+
+    按order排序取cursor之后的limit条记录，深翻页与第一页代价相同。
+    query不能已带order_by/offset/limit。cursor为None或空字符串表示第一页。
+
+    Returns:
+        (next_cursor, items)，没有下一页时next_cursor为None
+    """
+    items = _apply(query, order, cursor, limit).all()
+    return _page(items, order, limit)
+
+
+async def paginate_keyset_async(
+    db: AsyncSession, statement, order: KeysetOrder, *, cursor: Optional[str], limit: int, scalars: bool = True
+) -> Tuple[Optional[str], list]:
+    """paginate_keyset 的异步版本，statement为select()语句；scalars为False时返回行而不是ORM对象"""
+    result = await db.execute(_apply(statement, order, cursor, limit))
+    items = list(result.unique().scalars().all()) if scalars else list(result.all())
+    return _page(items, order, limit)
+
+
+class TotalMode(str, Enum):
+    """
+    分页总数的计算方式
+
+    exact: 精确总数（按筛选条件缓存 COUNT_CACHE_TTL 秒）
+    estimated: 估算总数，优先取缓存的精确值，否则取MySQL优化器的行数估计
+    none: 不计算总数，只返回 has_more
+    """
+    exact = "exact"
+    estimated = "estimated"
+    none = "none"
+
+
+COUNT_KEY_PREFIX = "count:"
+
+
+def count_cache_key(namespace: str, statement) -> str:
+    """按语句及其参数（即筛选条件）生成计数缓存键"""
+    compiled = statement.compile()
+    raw = str(compiled) + json.dumps(compiled.params, default=str, sort_keys=True)
+    return COUNT_KEY_PREFIX + namespace + ":" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def invalidate_count(*keys: str) -> None:
+    if not keys:
+        return
+    try:
+        redis_client.delete(*keys)
+    except RedisError as e:
+        logger.warning(f"Count cache invalidation failed: {e}")
+
+
+def _count_statement(statement):
+    # 直接 SELECT count(*) FROM ... WHERE ...，不包一层子查询
+    return statement.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)
+
+
+def get_cached_count(key: str, max_age: int) -> Optional[Any]:
+    try:
+        raw = redis_client.get(key)
+    except RedisError as e:
+        logger.warning(f"Count cache get failed: {e}")
+        return None
+    if raw is None:
+        return None
+    entry = json.loads(raw)
+    if time.time() - entry["at"] > max_age:
+        return None
+    return entry["value"]
+
+
+def set_cached_count(key: str, value: Any) -> None:
+    # 保留到估算模式可接受的时长，精确模式按写入时间判断是否过期
+    entry = json.dumps({"value": value, "at": time.time()})
+    try:
+        redis_client.set(key, entry, ex=max(settings.COUNT_ESTIMATE_TTL, settings.COUNT_CACHE_TTL))
+    except RedisError as e:
+        logger.warning(f"Count cache set failed: {e}")
+
+
+def _explain_params(compiled):
+    if compiled.positional:
+        return tuple(compiled.params[name] for name in compiled.positiontup)
+    return compiled.params
+
+
+def _estimate_from_plan(row) -> Optional[int]:
+    if row is None or row.get("rows") is None:
+        return None
+    filtered = row.get("filtered") or 100
+    return int(row["rows"] * float(filtered) / 100)
+
+
+def _explain_estimate(db: Session, statement) -> Optional[int]:
+    """取MySQL优化器对该查询的行数估计，非MySQL或失败时返回None"""
+    try:
+        connection = db.connection(bind_arguments={"clause": statement})
+        if connection.dialect.name != "mysql":
+            return None
+        compiled = statement.compile(dialect=connection.dialect)
+        row = connection.exec_driver_sql("EXPLAIN " + str(compiled), _explain_params(compiled)).mappings().first()
+        return _estimate_from_plan(row)
+    except SQLAlchemyError as e:
+        logger.warning(f"EXPLAIN estimate failed: {e}")
+        return None
+
+
+async def _explain_estimate_async(db: AsyncSession, statement) -> Optional[int]:
+    try:
+        connection = await db.connection(bind_arguments={"clause": statement})
+        if connection.dialect.name != "mysql":
+            return None
+        compiled = statement.compile(dialect=connection.dialect)
+        result = await connection.exec_driver_sql("EXPLAIN " + str(compiled), _explain_params(compiled))
+        return _estimate_from_plan(result.mappings().first())
+    except SQLAlchemyError as e:
+        logger.warning(f"EXPLAIN estimate failed: {e}")
+        return None
+
+
+def count_total(db: Session, statement, *, mode: TotalMode, key: str) -> Optional[int]:
+    """
+    按mode计算statement（select语句，只含筛选条件）的总数
+
+    Args:
+        key: 计数缓存键，一般由 count_cache_key 生成
+    """
+    if mode == TotalMode.none:
+        return None
+    max_age = settings.COUNT_CACHE_TTL if mode == TotalMode.exact else settings.COUNT_ESTIMATE_TTL
+    cached = get_cached_count(key, max_age)
+    if cached is not None:
+        return cached
+    if mode == TotalMode.estimated:
+        estimate = _explain_estimate(db, statement)
+        if estimate is not None:
+            return estimate
+    total = db.scalar(_count_statement(statement)) or 0
+    set_cached_count(key, total)
+    return total
+
+
+async def count_total_async(db: AsyncSession, statement, *, mode: TotalMode, key: str) -> Optional[int]:
+    """count_total 的异步版本"""
+    if mode == TotalMode.none:
+        return None
+    max_age = settings.COUNT_CACHE_TTL if mode == TotalMode.exact else settings.COUNT_ESTIMATE_TTL
+    cached = await run_in_threadpool(get_cached_count, key, max_age)
+    if cached is not None:
+        return cached
+    if mode == TotalMode.estimated:
+        estimate = await _explain_estimate_async(db, statement)
+        if estimate is not None:
+            return estimate
+    total = await db.scalar(_count_statement(statement)) or 0
+    await run_in_threadpool(set_cached_count, key, total)
+    return total
+
+
+def split_page(items: list, limit: int) -> Tuple[bool, list]:
+    """按 limit+1 取出的结果拆分为 (has_more, items)"""
+    return len(items) > limit, items[:limit]
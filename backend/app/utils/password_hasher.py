@@ -0,0 +1,176 @@
+"""
+bcrypt哈希/校验的进程池
+
+bcrypt每次计算约占用数百毫秒CPU，放在请求线程中会长时间占住GIL。这里交给独立的进程池执行，
+调用方只是等待结果；同时排队和执行的任务超过 PASSWORD_HASH_MAX_PENDING 时直接拒绝（PasswordHasherBusy），
+避免登录高峰时请求无限堆积。PASSWORD_HASH_WORKERS 为0时在当前线程中计算。
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional
+
+from passlib.context import CryptContext
+
+from app.config.settings import settings
+
+# 哈希成本由 BCRYPT_ROUNDS 决定，成本不同的旧哈希在登录成功后重新计算
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    """等待哈希的任务过多"""
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+class HasherMetrics:
+    """进程池运行统计，调用方线程和回调线程都会更新，写操作在锁内完成"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.max_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.seconds_sum = 0.0
+        self.seconds_max = 0.0
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+                self.rejected += 1
+                return False
+            self.pending += 1
+            self.submitted += 1
+            self.max_pending = max(self.max_pending, self.pending)
+            return True
+
+    def release(self, seconds: float, failed: bool) -> None:
+        with self._lock:
+            self.pending -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.seconds_sum += seconds
+            self.seconds_max = max(self.seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "workers": settings.PASSWORD_HASH_WORKERS,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "pending_limit": settings.PASSWORD_HASH_MAX_PENDING,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_seconds": round(self.seconds_sum / finished, 4) if finished else 0.0,
+                "max_seconds": round(self.seconds_max, 4),
+            }
+
+
+metrics = HasherMetrics()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn：不继承父进程的线程和连接
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _submit(func, *args) -> Future:
+    if not metrics.acquire():
+        raise PasswordHasherBusy()
+    started = time.monotonic()
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+    else:
+        try:
+            future = _get_pool().submit(func, *args)
+        except Exception:
+            metrics.release(time.monotonic() - started, failed=True)
+            raise
+    future.add_done_callback(
+        lambda f: metrics.release(time.monotonic() - started, failed=f.exception() is not None)
+    )
+    return future
+
+
+def hash_password(password: str) -> str:
+    return _submit(_hash, password).result()
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return _submit(_verify, password, hashed_password).result()
+
+
+def hash_many(passwords: List[str]) -> List[str]:
+    """批量哈希（如批量导入用户），并行使用所有进程，自身在途任务不超过进程数的两倍"""
+    window = max(1, settings.PASSWORD_HASH_WORKERS) * 2
+    results: List[Optional[str]] = [None] * len(passwords)
+    inflight = deque()
+    for index, password in enumerate(passwords):
+        while True:
+            if len(inflight) >= window:
+                done_index, future = inflight.popleft()
+                results[done_index] = future.result()
+            try:
+                inflight.append((index, _submit(_hash, password)))
+                break
+            except PasswordHasherBusy:
+                # 其他请求占满了队列：先等自己的任务完成再重试，没有在途任务时放弃
+                if not inflight:
+                    raise
+                done_index, future = inflight.popleft()
+                results[done_index] = future.result()
+    for done_index, future in inflight:
+        results[done_index] = future.result()
+    return results
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit(_hash, password))
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await asyncio.wrap_future(_submit(_verify, password, hashed_password))
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """哈希的算法或成本与当前配置不同，只解析哈希头部，不做bcrypt计算"""
+    return pwd_context.needs_update(hashed_password)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
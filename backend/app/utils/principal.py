@@ -0,0 +1,175 @@
+"""
+当前用户的轻量缓存
+
+大多数接口只需要当前用户的 id/username/role，不必每个请求都查询users表。
+按JWT中的uuid解析，依次查找：进程内LRU（PRINCIPAL_LOCAL_TTL秒）-> Redis（PRINCIPAL_CACHE_TTL秒）-> 数据库。
+
+用户信息变更后调用 invalidate 删除Redis缓存和本进程缓存，其他进程的本地缓存最多再保留 PRINCIPAL_LOCAL_TTL 秒。
+invalidate 同时递增该用户的代数，查询数据库前读到的代数已变化时不写入缓存，避免并发的查询把变更前的信息写回。
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config.mysql_config import stick_to_primary
+from app.config.redis_config import redis_client
+from app.config.settings import settings
+from app.models.user import User
+
+logger = logging.getLogger("app")
+
+KEY_PREFIX = "principal:"
+GENERATION_PREFIX = "principal:generation:"
+
+# KEYS[1]=缓存键 KEYS[2]=代数键；ARGV[1]=查询前读到的代数 ARGV[2]=缓存内容 ARGV[3]=TTL
+# 代数未变时写入缓存，返回是否写入
+STORE_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+_store_script = redis_client.register_script(STORE_SCRIPT)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """当前用户的精简信息，属性名与User一致，可替代只读取这些字段的User对象"""
+    id: int
+    uuid: str
+    username: str
+    role: str
+    is_active: bool
+
+
+class _LocalCache:
+    """带过期时间的LRU，同步依赖在线程池中运行，读写都在锁内完成"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Principal]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Principal) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+
+_local = _LocalCache(settings.PRINCIPAL_LOCAL_CACHE_SIZE, settings.PRINCIPAL_LOCAL_TTL)
+
+_COLUMNS = (User.id, User.uuid, User.username, User.role, User.is_active)
+
+
+def _from_redis(uuid: str) -> Tuple[Optional[Principal], Optional[bytes]]:
+    """返回 (缓存的用户信息, 当前代数)，Redis不可用时代数为None"""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.get(KEY_PREFIX + uuid)
+        pipe.get(GENERATION_PREFIX + uuid)
+        raw, generation = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Principal cache read failed: {e}")
+        return None, None
+    return (Principal(**json.loads(raw)) if raw else None), generation or b""
+
+
+def _store(principal: Principal, generation: Optional[bytes]) -> None:
+    if generation is not None:
+        try:
+            stored = _store_script(
+                keys=[KEY_PREFIX + principal.uuid, GENERATION_PREFIX + principal.uuid],
+                args=[generation, json.dumps(asdict(principal)), settings.PRINCIPAL_CACHE_TTL]
+            )
+        except RedisError as e:
+            logger.warning(f"Principal cache write failed: {e}")
+        else:
+            if not stored:
+                # 查询期间用户信息已变更，本次结果可能是旧的
+                return
+    _local.set(principal.uuid, principal)
+
+
+def get_principal(db: Session, uuid: str) -> Optional[Principal]:
+    """按uuid获取用户精简信息，用户不存在时返回None"""
+    principal = _local.get(uuid)
+    if principal is not None:
+        return principal
+    principal, generation = _from_redis(uuid)
+    if principal is not None:
+        _local.set(uuid, principal)
+        return principal
+    # 结果会写入缓存，从库延迟时会缓存变更前的信息
+    stick_to_primary(db)
+    row = db.execute(select(*_COLUMNS).where(User.uuid == uuid)).first()
+    if row is None:
+        return None
+    principal = Principal(*row)
+    _store(principal, generation)
+    return principal
+
+
+async def get_principal_async(db: AsyncSession, uuid: str) -> Optional[Principal]:
+    """get_principal 的异步版本，Redis读写放在线程池中"""
+    principal = _local.get(uuid)
+    if principal is not None:
+        return principal
+    principal, generation = await run_in_threadpool(_from_redis, uuid)
+    if principal is not None:
+        _local.set(uuid, principal)
+        return principal
+    stick_to_primary(db)
+    row = (await db.execute(select(*_COLUMNS).where(User.uuid == uuid))).first()
+    if row is None:
+        return None
+    principal = Principal(*row)
+    await run_in_threadpool(_store, principal, generation)
+    return principal
+
+
+def invalidate(*uuids: str) -> None:
+    """用户信息变更（改名、改角色、封禁、删除、改密码）后调用"""
+    if not uuids:
+        return
+    for uuid in uuids:
+        _local.pop(uuid)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for uuid in uuids:
+            pipe.incr(GENERATION_PREFIX + uuid)
+            pipe.expire(GENERATION_PREFIX + uuid, settings.PRINCIPAL_CACHE_TTL)
+        pipe.delete(*[KEY_PREFIX + uuid for uuid in uuids])
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Principal cache invalidation failed: {e}")
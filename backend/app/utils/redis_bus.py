@@ -0,0 +1,225 @@
+"""
+基于Redis发布/订阅的进程间消息总线
+
+发布端在任意进程中同步调用 publish；每个worker进程只保持一个订阅连接，
+由后台任务按频道把消息分发给本进程内的订阅者，因此任何worker都能把消息推给连接在自己上的客户端。
+
+每个订阅者有一个有界队列：消费过慢导致队列满时丢弃新消息并标记 overflowed，
+订阅连接断开重连期间可能漏掉消息，同样标记 overflowed，由消费方通知客户端重新拉取。
+进程级的消息处理（如缓存失效）用 add_handler 注册回调，重连时调用其 on_gap 回调，
+每次订阅成功（首次启动及断线重连后）在线程池中调用其 on_subscribe 回调。
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from app.config.redis_config import redis_client, redis_config
+
+logger = logging.getLogger("app")
+
+CHANNEL_PREFIX = "bus:"
+RECONNECT_DELAY = 1.0
+
+
+def publish(channel: str, message: dict) -> None:
+    """发布消息，Redis不可用时只记录日志，不影响调用方的业务流程"""
+    try:
+        redis_client.publish(CHANNEL_PREFIX + channel, json.dumps(message, default=str))
+    except RedisError as e:
+        logger.warning(f"Publish to {channel} failed: {e}")
+
+
+class Subscription:
+    def __init__(self, channels: Iterable[str], maxsize: int):
+        self.channels = set(channels)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def _deliver(self, message: dict) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """取下一条消息，超时返回None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+@dataclass
+class BusMetrics:
+    """本进程的订阅统计，只在事件循环中更新"""
+    received: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    reconnects: int = 0
+
+
+@dataclass
+class Handler:
+    callback: Callable[[dict], None]
+    on_gap: Optional[Callable[[], None]] = None
+    on_subscribe: Optional[Callable[[], None]] = None
+
+
+metrics = BusMetrics()
+_subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+_listener: Optional[asyncio.Task] = None
+_subscribed = False
+# 正在运行的 on_subscribe 回调，保留引用避免任务被回收
+_subscribe_callbacks: Set[asyncio.Task] = set()
+
+
+async def _run_on_subscribe(handler: Handler) -> None:
+    try:
+        await run_in_threadpool(handler.on_subscribe)
+    except Exception as e:
+        logger.error(f"Redis bus on_subscribe callback failed: {e}")
+
+
+def _notify_subscribed() -> None:
+    for handlers in _handlers.values():
+        for handler in handlers:
+            if handler.on_subscribe is not None:
+                task = asyncio.create_task(_run_on_subscribe(handler))
+                _subscribe_callbacks.add(task)
+                task.add_done_callback(_subscribe_callbacks.discard)
+
+
+def _dispatch(channel: str, data: bytes) -> None:
+    metrics.received += 1
+    subscribers = _subscribers.get(channel)
+    handlers = _handlers.get(channel)
+    if not subscribers and not handlers:
+        return
+    message = json.loads(data)
+    for handler in handlers or ():
+        try:
+            handler.callback(message)
+        except Exception as e:
+            logger.error(f"Redis bus handler for {channel} failed: {e}")
+    for subscription in subscribers or ():
+        if subscription._deliver(message):
+            metrics.delivered += 1
+        else:
+            metrics.dropped += 1
+
+
+async def _listen() -> None:
+    # 订阅所有总线频道，本进程没有订阅者的消息直接丢弃
+    global _subscribed
+    while True:
+        client = aioredis.Redis(**redis_config)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.psubscribe(CHANNEL_PREFIX + "*")
+            _subscribed = True
+            _notify_subscribed()
+            async for item in pubsub.listen():
+                if item["type"] == "pmessage":
+                    _dispatch(item["channel"].decode()[len(CHANNEL_PREFIX):], item["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Redis bus connection lost, reconnecting: {e}")
+            metrics.reconnects += 1
+            _subscribed = False
+            # 断开期间的消息已丢失，让所有订阅者重新同步
+            for subscribers in _subscribers.values():
+                for subscription in subscribers:
+                    subscription.overflowed = True
+            for handlers in _handlers.values():
+                for handler in handlers:
+                    if handler.on_gap is not None:
+                        handler.on_gap()
+            await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            _subscribed = False
+            await pubsub.aclose()
+            await client.aclose()
+
+
+def _ensure_listening() -> None:
+    global _listener
+    if _listener is None or _listener.done():
+        _listener = asyncio.create_task(_listen(), name="redis_bus")
+
+
+def is_subscribed() -> bool:
+    """本进程当前是否在接收总线消息，为False时这段时间的消息会丢失"""
+    return _subscribed
+
+
+def add_handler(
+    channel: str,
+    callback: Callable[[dict], None],
+    *,
+    on_gap: Optional[Callable[[], None]] = None,
+    on_subscribe: Optional[Callable[[], None]] = None
+) -> None:
+    """
+    注册进程级的消息回调，回调在事件循环中同步执行，不能阻塞
+
+    on_gap 在订阅连接中断（期间的消息已丢失）时调用。
+    on_subscribe 在每次订阅成功后于线程池中调用，可以执行阻塞操作，如按Redis重建本地状态。
+    """
+    _handlers[channel].append(Handler(callback=callback, on_gap=on_gap, on_subscribe=on_subscribe))
+
+
+async def start() -> None:
+    """应用启动时调用，使进程级回调在没有推送订阅者时也能收到消息"""
+    _ensure_listening()
+
+
+@asynccontextmanager
+async def subscribe(channels: Iterable[str], *, maxsize: int) -> AsyncIterator[Subscription]:
+    """订阅一组频道，退出上下文时取消订阅"""
+    _ensure_listening()
+    subscription = Subscription(channels, maxsize)
+    for channel in subscription.channels:
+        _subscribers[channel].add(subscription)
+    try:
+        yield subscription
+    finally:
+        for channel in subscription.channels:
+            subscribers = _subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del _subscribers[channel]
+
+
+async def stop() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        await asyncio.gather(_listener, return_exceptions=True)
+        _listener = None
+
+
+def get_stats() -> dict:
+    subscriptions = {s for subscribers in _subscribers.values() for s in subscribers}
+    return {
+        "listening": _listener is not None and not _listener.done(),
+        "subscriptions": len(subscriptions),
+        "channels": len(_subscribers),
+        "queued": sum(s.queue.qsize() for s in subscriptions),
+        "received": metrics.received,
+        "delivered": metrics.delivered,
+        "dropped": metrics.dropped,
+        "reconnects": metrics.reconnects,
+    }
@@ -0,0 +1,48 @@
+"""
+定时任务用的Redis互斥锁
+
+多进程部署时同一任务只由抢到锁的进程执行。锁的值为随机token，释放时在Lua中比较后删除：
+任务执行超过TTL、锁已被其他进程重新获取时，不会误删对方的锁。
+"""
+import logging
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+from redis.exceptions import RedisError
+
+from app.config.redis_config import redis_client
+
+logger = logging.getLogger("app")
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release_script = redis_client.register_script(RELEASE_SCRIPT)
+
+
+@contextmanager
+def hold(key: str, ttl: int) -> Iterator[bool]:
+    """
+    尝试获取锁，产出是否获取成功，退出时释放自己持有的锁
+
+    Redis不可用时视为未获取（记录日志），调用方应跳过本次执行。
+    """
+    token = uuid.uuid4().hex
+    try:
+        acquired = bool(redis_client.set(key, token, nx=True, ex=ttl))
+    except RedisError as e:
+        logger.warning(f"Lock {key} unavailable: {e}")
+        acquired = False
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                _release_script(keys=[key], args=[token])
+            except RedisError as e:
+                logger.warning(f"Releasing lock {key} failed: {e}")
@@ -48,3 +48,6 @@ def InternalServerError(message: str = "Internal Server Error"):
 # Aliases for common usage patterns
 success_response = Success
 error_response = BadRequest
+
+def ServiceUnavailable(message: str = "Service Unavailable"):
+    return UJSONResponse(data=None, message=message, status_code=status.HTTP_503_SERVICE_UNAVAILABLE, code=status.HTTP_503_SERVICE_UNAVAILABLE)
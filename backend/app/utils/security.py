@@ -1,20 +1,20 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from redis import Redis
 
 from app import schemas
 from app.config.settings import settings
+from app.utils import password_hasher, token_blacklist
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
+# bcrypt runs in the password hasher process pool; both may raise PasswordHasherBusy under load
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_password(plain_password, hashed_password)
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -32,7 +32,8 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
+    # jti identifies the token in the blacklist
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
@@ -45,14 +46,12 @@ def decode_token(token: str) -> Optional[dict]:
 
 def add_token_to_blacklist(redis_client: Redis, token: str, expires_in: int):
     """
-    Adds a token to the Redis blacklist with an expiration time.
+    Adds a token to the blacklist until it expires, keyed by its jti.
     """
-    key = f"blacklist:{token}"
-    redis_client.set(key, "true", ex=expires_in)
+    token_blacklist.revoke(redis_client, token, expires_in)
 
 def is_token_blacklisted(redis_client: Redis, token: str) -> bool:
     """
-    Checks if a token is in the Redis blacklist.
+    Checks if a token is blacklisted. Most checks are answered by the local bloom filter without Redis.
     """
-    key = f"blacklist:{token}"
-    return redis_client.exists(key) > 0
+    return token_blacklist.is_revoked(redis_client, token)
@@ -0,0 +1,175 @@
+"""
+refresh token 黑名单
+
+黑名单键为 blacklist:{token_id}，token_id 取 jti，没有jti的旧token取其SHA-256前32位，过期时间与token一致。
+
+每个进程在本地维护一个包含全部已吊销id的布隆过滤器：总线订阅成功后（启动时及断线重连后）立即、
+此后每隔 TOKEN_BLACKLIST_REBUILD_INTERVAL 秒扫描Redis重建，新的吊销通过总线频道实时加入。过滤器判定“不在”即可确定未吊销，不访问Redis；
+判定“可能在”或过滤器尚不完整（未完成重建、订阅中断过）时再查Redis。
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Optional
+
+from jose import JWTError, jwt
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.config.redis_config import redis_client
+from app.config.settings import settings
+from app.utils import redis_bus
+
+logger = logging.getLogger("app")
+
+KEY_PREFIX = "blacklist:"
+CHANNEL = "token:revoked"
+SCAN_COUNT = 1000
+# 检查过滤器是否需要重建的间隔（秒），过滤器不完整时最多这么久后恢复
+CHECK_INTERVAL = 10
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def token_id(token: str) -> str:
+    """黑名单中使用的token标识"""
+    try:
+        jti = jwt.get_unverified_claims(token).get("jti")
+    except JWTError:
+        jti = None
+    return jti or hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+class _LocalFilter:
+    """本进程的已吊销id过滤器，complete为False时不能据此判定未吊销"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = self._new_bloom()
+        self._complete = False
+        # 递增表示期间可能漏掉了吊销消息，进行中的重建作废
+        self._generation = 0
+        self._rebuilding: Optional[set] = None
+        self._built_at = 0.0
+
+    @staticmethod
+    def _new_bloom() -> BloomFilter:
+        return BloomFilter(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+
+    def add(self, revoked_id: str) -> None:
+        with self._lock:
+            self._bloom.add(revoked_id)
+            if self._rebuilding is not None:
+                self._rebuilding.add(revoked_id)
+
+    def might_contain(self, revoked_id: str) -> bool:
+        with self._lock:
+            return not self._complete or revoked_id in self._bloom
+
+    def mark_gap(self) -> None:
+        with self._lock:
+            self._complete = False
+            self._generation += 1
+
+    def needs_rebuild(self) -> bool:
+        with self._lock:
+            return not self._complete or time.monotonic() - self._built_at > settings.TOKEN_BLACKLIST_REBUILD_INTERVAL
+
+    def rebuild(self, client: Redis) -> int:
+        """扫描Redis重建过滤器，返回黑名单条目数；只有重建期间一直在接收吊销消息时才标记为完整"""
+        if not redis_bus.is_subscribed():
+            return 0
+        with self._lock:
+            generation = self._generation
+            self._rebuilding = set()
+        bloom = self._new_bloom()
+        count = 0
+        finished = False
+        try:
+            for key in client.scan_iter(match=KEY_PREFIX + "*", count=SCAN_COUNT):
+                revoked_id = key.decode()[len(KEY_PREFIX):]
+                if "." in revoked_id:
+                    revoked_id = _migrate_legacy_key(client, key, revoked_id)
+                if revoked_id:
+                    bloom.add(revoked_id)
+                    count += 1
+            finished = True
+        finally:
+            with self._lock:
+                received, self._rebuilding = self._rebuilding, None
+                if finished and generation == self._generation and redis_bus.is_subscribed():
+                    for revoked_id in received:
+                        bloom.add(revoked_id)
+                    self._bloom = bloom
+                    self._complete = True
+                    self._built_at = time.monotonic()
+        return count
+
+
+def _migrate_legacy_key(client: Redis, key: bytes, token: str) -> Optional[str]:
+    """旧版本以完整JWT作键，改写为按token_id的键，保留剩余有效期"""
+    ttl = client.pttl(key)
+    if ttl <= 0:
+        return None
+    revoked_id = token_id(token)
+    pipe = client.pipeline()
+    pipe.set(KEY_PREFIX + revoked_id, 1, px=ttl)
+    pipe.delete(key)
+    pipe.execute()
+    return revoked_id
+
+
+_filter = _LocalFilter()
+# 订阅成功后立即重建，不等定时任务的第一个间隔，否则这段时间的每次校验都要查Redis
+redis_bus.add_handler(
+    CHANNEL,
+    lambda message: _filter.add(message["id"]),
+    on_gap=_filter.mark_gap,
+    on_subscribe=lambda: rebuild()
+)
+
+
+def revoke(client: Redis, token: str, expires_in: int) -> None:
+    """吊销token直到其过期，并通知所有进程"""
+    revoked_id = token_id(token)
+    client.set(KEY_PREFIX + revoked_id, 1, ex=expires_in)
+    _filter.add(revoked_id)
+    redis_bus.publish(CHANNEL, {"id": revoked_id})
+
+
+def is_revoked(client: Redis, token: str) -> bool:
+    revoked_id = token_id(token)
+    if not _filter.might_contain(revoked_id):
+        return False
+    return client.exists(KEY_PREFIX + revoked_id) > 0
+
+
+def rebuild(db=None) -> int:
+    """定时任务：过滤器不完整或已过 TOKEN_BLACKLIST_REBUILD_INTERVAL 时重建本进程的过滤器（db参数仅为符合定时任务签名）"""
+    if not _filter.needs_rebuild():
+        return 0
+    try:
+        return _filter.rebuild(redis_client)
+    except RedisError as e:
+        logger.warning(f"Token blacklist rebuild failed: {e}")
+        return 0
@@ -0,0 +1,190 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import delete, event, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config.mysql_config import stick_to_primary
+from app.config.redis_config import redis_client
+from app.models.blog import Blog
+from app.models.counter_flush_batch import CounterFlushBatch
+from app.models.course_resource import CourseResource
+from app.models.forum_post import ForumPost
+from app.models.showcase import Showcase
+from app.utils import redis_lock
+
+logger = logging.getLogger("app")
+
+# 计数类型 -> 计数列。浏览先累加到Redis，由定时任务批量写回数据库
+COUNTERS = {
+    "forum_post": ForumPost.view_count,
+    "blog": Blog.view_count,
+    "showcase": Showcase.views_count,
+    "course_resource": CourseResource.download_count,
+}
+
+PENDING_PREFIX = "views:pending:"
+FLUSHING_PREFIX = "views:flushing:"
+FLUSH_LOCK_KEY = "views:flush:lock"
+FLUSH_LOCK_TTL = 60
+# flushing hash 中保存批次id的字段，与对象id不会冲突
+BATCH_FIELD = "_batch"
+# 已写回批次的记录保留时间，远大于批次可能滞留的时间
+BATCH_RETENTION = timedelta(days=1)
+
+# KEYS[1]=pending KEYS[2]=flushing ARGV[1]=新批次id ARGV[2]=保存批次id的字段
+# 上次写回中断时留下的flushing批次沿用其批次id，否则把pending整体换出为新批次；没有待写回的浏览时返回false
+TAKE_BATCH_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return false
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+redis.call('HSETNX', KEYS[2], ARGV[2], ARGV[1])
+return redis.call('HGET', KEYS[2], ARGV[2])
+"""
+
+_take_batch_script = redis_client.register_script(TAKE_BATCH_SCRIPT)
+
+# 对象上记录已合并的增量，计数从数据库重新加载后清零
+MERGED_ATTR = "_pending_views"
+
+
+def _reset_merged(target, context, attrs):
+    target.__dict__.pop(MERGED_ATTR, None)
+
+
+for _column in COUNTERS.values():
+    event.listen(_column.class_, "refresh", _reset_merged)
+
+
+def _apply(db: Session, kind: str, deltas: Dict[int, int], batch_id: Optional[str] = None) -> bool:
+    """
+    按增量分组，每组一条 UPDATE ... SET col = col + n WHERE id IN (...)
+
+    传入batch_id时在同一事务中记录该批次，批次已写回过则不再执行，返回是否写入
+    """
+    if batch_id is not None:
+        # 判断批次是否已写回必须读主库
+        stick_to_primary(db)
+        if db.get(CounterFlushBatch, batch_id) is not None:
+            return False
+        db.add(CounterFlushBatch(batch_id=batch_id, kind=kind))
+        db.flush()
+    column = COUNTERS[kind]
+    model = column.class_
+    groups = defaultdict(list)
+    for obj_id, delta in deltas.items():
+        if delta > 0:
+            groups[delta].append(obj_id)
+    for delta, ids in groups.items():
+        db.execute(
+            update(model).where(model.id.in_(ids)).values({column.key: column + delta}),
+            execution_options={"synchronize_session": False}
+        )
+    db.commit()
+    return True
+
+
+def get_pending(kind: str, ids: Iterable[int]) -> Dict[int, int]:
+    """尚未写回数据库的浏览增量（含正在写回的批次）"""
+    ids = list(ids)
+    if not ids:
+        return {}
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hmget(PENDING_PREFIX + kind, ids)
+        pipe.hmget(FLUSHING_PREFIX + kind, ids)
+        pending, flushing = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"View counter read failed: {e}")
+        return {}
+    return {
+        obj_id: int(a or 0) + int(b or 0)
+        for obj_id, a, b in zip(ids, pending, flushing)
+    }
+
+
+def merge_pending(kind: str, objs: Iterable) -> None:
+    """把待写回的增量加到已加载对象的计数上，只改内存中的值，不会被提交"""
+    objs = [obj for obj in objs if obj is not None]
+    pending = get_pending(kind, [obj.id for obj in objs])
+    key = COUNTERS[kind].key
+    for obj in objs:
+        # 同一对象重复合并时先扣掉上次合并的增量
+        base = (getattr(obj, key) or 0) - getattr(obj, MERGED_ATTR, 0)
+        setattr(obj, MERGED_ATTR, pending.get(obj.id, 0))
+        set_committed_value(obj, key, base + pending.get(obj.id, 0))
+
+
+def record_view(db: Session, kind: str, obj, increment: int = 1) -> None:
+    """
+    记录浏览并把待写回的增量合并到obj上
+
+    Redis不可用时退化为直接对数据库做原子自增。
+    """
+    try:
+        redis_client.hincrby(PENDING_PREFIX + kind, obj.id, increment)
+    except RedisError as e:
+        logger.warning(f"View counter incr failed, writing through: {e}")
+        _apply(db, kind, {obj.id: increment})
+        db.refresh(obj)
+        return
+    merge_pending(kind, [obj])
+
+
+def _flush_kind(db: Session, kind: str) -> int:
+    pending_key = PENDING_PREFIX + kind
+    flushing_key = FLUSHING_PREFIX + kind
+    # 上次写回中断时会留下flushing批次，先写回它；否则把当前增量整体换出，新的浏览继续累加到新的hash
+    batch_id = _take_batch_script(keys=[pending_key, flushing_key], args=[str(uuid.uuid4()), BATCH_FIELD])
+    if batch_id is None:
+        return 0
+    deltas = {
+        int(k): int(v) for k, v in redis_client.hgetall(flushing_key).items() if k.decode() != BATCH_FIELD
+    }
+    # 批次id与计数更新在同一事务中提交：提交后、删除flushing前崩溃时，下次写回会跳过这一批
+    try:
+        applied = _apply(db, kind, deltas, batch_id=batch_id.decode()) if deltas else False
+    except IntegrityError:
+        # 并发写回了同一批次
+        db.rollback()
+        applied = False
+    redis_client.delete(flushing_key)
+    return len(deltas) if applied else 0
+
+
+def _prune_batches(db: Session) -> None:
+    db.execute(delete(CounterFlushBatch).where(CounterFlushBatch.applied_at < datetime.utcnow() - BATCH_RETENTION))
+    db.commit()
+
+
+def flush(db: Session) -> int:
+    """
+    把所有待写回的浏览批量写入数据库，返回写回的行数
+
+    多进程部署时通过Redis锁保证同一时刻只有一个进程在写回。
+    """
+    with redis_lock.hold(FLUSH_LOCK_KEY, FLUSH_LOCK_TTL) as acquired:
+        if not acquired:
+            return 0
+        total = 0
+        for kind in COUNTERS:
+            try:
+                total += _flush_kind(db, kind)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"View counter flush failed for {kind}: {e}")
+        try:
+            _prune_batches(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Pruning view counter batches failed: {e}")
+        return total
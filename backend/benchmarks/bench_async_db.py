@@ -0,0 +1,146 @@
+"""
+同步 / 异步数据库访问模式吞吐对比
+
+在进程内启动一个只包含对比端点的 FastAPI 应用，对同一查询分别走
+同步 Session（线程池）和 AsyncSession（aiomysql）两条路径，
+用指定数量的并发客户端压测并输出 requests/sec 与延迟分位数。
+
+依赖 backend/.env 中配置的 MySQL，且库中应有论坛帖子、优秀作品数据；
+压测客户端需要 requirements-dev.txt 中的依赖（pip install -r requirements-dev.txt）。
+
+用法:
+    cd backend
+    python benchmarks/bench_async_db.py --clients 500 --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.crud import crud_forum_post, crud_showcase
+from app.schemas.forum_post import ForumPostListResponse
+from app.schemas.showcase import ShowcaseResponse
+from app.utils.response import Success
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/sync/forum-posts")
+def sync_forum_posts(db: Session = Depends(deps.get_db)):
+    total, has_more, posts = crud_forum_post.get_multi(db, skip=0, limit=20)
+    return Success(data={"total": total, "has_more": has_more, "items": [ForumPostListResponse.from_orm(p).model_dump() for p in posts]})
+
+
+@bench_app.get("/async/forum-posts")
+async def async_forum_posts(db: AsyncSession = Depends(deps.get_async_db)):
+    total, has_more, posts = await crud_forum_post.get_multi_async(db, skip=0, limit=20)
+    return Success(data={"total": total, "has_more": has_more, "items": [ForumPostListResponse.from_orm(p).model_dump() for p in posts]})
+
+
+@bench_app.get("/sync/showcases")
+def sync_showcases(db: Session = Depends(deps.get_db)):
+    total, has_more, showcases = crud_showcase.get_showcases_for_frontend(db, skip=0, limit=10)
+    return Success(data={"total": total, "has_more": has_more, "items": [ShowcaseResponse.from_orm(s).model_dump() for s in showcases]})
+
+
+@bench_app.get("/async/showcases")
+async def async_showcases(db: AsyncSession = Depends(deps.get_async_db)):
+    total, has_more, showcases = await crud_showcase.get_showcases_for_frontend_async(db, skip=0, limit=10)
+    return Success(data={"total": total, "has_more": has_more, "items": [ShowcaseResponse.from_orm(s).model_dump() for s in showcases]})
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    config = uvicorn.Config(bench_app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_load(url: str, clients: int, total_requests: int) -> dict:
+    latencies = []
+    errors = 0
+    remaining = total_requests
+    lock = asyncio.Lock()
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+
+        async def worker():
+            nonlocal remaining, errors
+            while True:
+                async with lock:
+                    if remaining <= 0:
+                        return
+                    remaining -= 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "rps": total_requests / elapsed,
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync vs async DB endpoints")
+    parser.add_argument("--clients", type=int, default=500, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=20000, help="requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=500, help="warmup requests per endpoint")
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = start_server(port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    print(f"clients={args.clients} requests={args.requests}")
+    print(f"{'endpoint':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for path in ("/sync/forum-posts", "/async/forum-posts", "/sync/showcases", "/async/showcases"):
+        asyncio.run(run_load(base_url + path, min(args.clients, 50), args.warmup))
+        result = asyncio.run(run_load(base_url + path, args.clients, args.requests))
+        print(
+            f"{path:<22}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+            f"{result['p95']:>10.1f}{result['p99']:>10.1f}{result['errors']:>8}"
+        )
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
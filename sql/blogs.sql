@@ -32,9 +32,11 @@ CREATE TABLE blog_tags (
     name VARCHAR(50) NOT NULL UNIQUE COMMENT '标签名称',
     color VARCHAR(7) DEFAULT '#2196F3' COMMENT '标签颜色(HEX)',
     description TEXT COMMENT '标签描述',
+    blog_count INT UNSIGNED NOT NULL DEFAULT 0 COMMENT '使用此标签的已发布博客数',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
-    INDEX idx_name (name)
+    INDEX idx_name (name),
+    INDEX idx_blog_tag_count (blog_count)
 ) COMMENT = 'Blog标签表';
 
 -- Blog文章标签关联表
@@ -83,4 +85,11 @@ INSERT INTO blog_tag_relations (blog_id, tag_id) VALUES
 (1, 4), -- GitHub趋势榜 - 开源框架
 (2, 3), -- Web框架对比 - JavaScript  
 (3, 5), -- 容器化部署 - DevOps
-(3, 4); -- 容器化部署 - 开源框架
\ No newline at end of file
+(3, 4); -- 容器化部署 - 开源框架
+
+-- 示例标签的博客数
+UPDATE blog_tags t
+SET t.blog_count = (
+    SELECT COUNT(*) FROM blog_tag_relations r JOIN blogs b ON b.id = r.blog_id
+    WHERE r.tag_id = t.id AND b.is_deleted = FALSE AND b.status = 'published'
+);
\ No newline at end of file
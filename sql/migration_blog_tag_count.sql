@@ -0,0 +1,17 @@
+-- 标签博客数：blog_tags.blog_count 统计已发布且未删除的博客，由博客的创建、修改（标签或状态）、删除增量维护
+-- 描述: 不再在每次读取时加载全部关联和博客计数，热门标签直接按该列排序
+
+ALTER TABLE blog_tags
+    ADD COLUMN blog_count INT UNSIGNED NOT NULL DEFAULT 0 COMMENT '使用此标签的已发布博客数' AFTER description,
+    ADD INDEX idx_blog_tag_count (blog_count);
+
+-- 以已有的已发布博客初始化（定时任务按同样的统计核对纠正）
+UPDATE blog_tags t
+LEFT JOIN (
+    SELECT r.tag_id, COUNT(*) AS blog_count
+    FROM blog_tag_relations r
+    JOIN blogs b ON b.id = r.blog_id
+    WHERE b.is_deleted = FALSE AND b.status = 'published'
+    GROUP BY r.tag_id
+) c ON c.tag_id = t.id
+SET t.blog_count = COALESCE(c.blog_count, 0);
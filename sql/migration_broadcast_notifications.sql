@@ -0,0 +1,30 @@
+-- 广播通知：每次广播只写一行，读取时与个人通知合并
+-- 描述: 系统公告不再按用户逐条写入 notifications 表
+
+CREATE TABLE broadcast_notifications (
+    id INT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    uuid CHAR(36) NOT NULL UNIQUE,
+    admin_id INT UNSIGNED NULL COMMENT '发布广播的管理员',
+    type VARCHAR(50) NOT NULL COMMENT '通知类型',
+    title VARCHAR(255) NOT NULL COMMENT '通知标题',
+    content TEXT NULL COMMENT '通知内容',
+    related_id INT UNSIGNED NULL COMMENT '相关对象ID',
+    related_uuid VARCHAR(36) NULL COMMENT '相关对象UUID',
+    target_role VARCHAR(50) NULL COMMENT '只对该角色可见，为空时对所有用户可见',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_broadcast_notifications_admin_id (admin_id),
+    INDEX idx_broadcast_notifications_created_at (created_at),
+    FOREIGN KEY (admin_id) REFERENCES users(id) ON DELETE SET NULL
+);
+
+-- 用户对广播通知的已读/删除标记，没有记录表示未读
+CREATE TABLE broadcast_notification_reads (
+    broadcast_id INT UNSIGNED NOT NULL,
+    user_id INT UNSIGNED NOT NULL,
+    read_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '阅读时间',
+    deleted_at TIMESTAMP NULL COMMENT '用户删除该广播的时间',
+    PRIMARY KEY (broadcast_id, user_id),
+    INDEX idx_broadcast_reads_user (user_id, broadcast_id),
+    FOREIGN KEY (broadcast_id) REFERENCES broadcast_notifications(id) ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
@@ -0,0 +1,9 @@
+-- 浏览计数写回批次：记录已写回数据库的批次id，与计数的UPDATE在同一事务中提交
+-- 描述: 写回提交后、删除Redis中的批次前进程崩溃时，下次写回据此跳过该批次，避免浏览数重复累加
+
+CREATE TABLE counter_flush_batches (
+    batch_id CHAR(36) NOT NULL PRIMARY KEY COMMENT '批次ID',
+    kind VARCHAR(32) NOT NULL COMMENT '计数类型',
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '写回时间',
+    KEY idx_counter_flush_batches_applied_at (applied_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,14 @@
+-- 帖子楼层计数器：回复的楼层号由 forum_posts.floor_seq 原子分配
+-- 描述: 不再通过 MAX(floor_number) 计算楼层，避免并发回复得到相同楼层
+
+ALTER TABLE forum_posts
+    ADD COLUMN floor_seq INT UNSIGNED NOT NULL DEFAULT 0 COMMENT '已分配的最大楼层号' AFTER reply_count;
+
+-- 以已有回复（含已删除的）的最大楼层初始化
+UPDATE forum_posts p
+JOIN (
+    SELECT post_id, MAX(floor_number) AS max_floor
+    FROM forum_replies
+    GROUP BY post_id
+) r ON r.post_id = p.id
+SET p.floor_seq = COALESCE(r.max_floor, 0);
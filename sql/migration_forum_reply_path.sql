@@ -0,0 +1,24 @@
+-- 楼中楼路径：回复记录所属顶级回复、嵌套深度和由楼层号拼接的路径
+-- 描述: 一次查询即可取出一页顶级回复及其前若干条子回复，不再逐个父回复加载
+
+ALTER TABLE forum_replies
+    ADD COLUMN root_id INT UNSIGNED NULL COMMENT '所属顶级回复ID，顶级回复为自身' AFTER floor_number,
+    ADD COLUMN depth INT UNSIGNED NOT NULL DEFAULT 0 COMMENT '嵌套深度，顶级回复为0' AFTER root_id,
+    ADD COLUMN path VARCHAR(255) NULL COMMENT '各级楼层号（8位定长）拼接的路径' AFTER depth,
+    ADD INDEX idx_forum_replies_root_path (root_id, path);
+
+-- 按父子关系递归回填已有回复
+UPDATE forum_replies f
+JOIN (
+    WITH RECURSIVE tree AS (
+        SELECT id, id AS root_id, 0 AS depth, CAST(LPAD(COALESCE(floor_number, 0), 8, '0') AS CHAR(255)) AS path
+        FROM forum_replies
+        WHERE parent_id IS NULL
+        UNION ALL
+        SELECT r.id, tree.root_id, tree.depth + 1, CONCAT(tree.path, LPAD(COALESCE(r.floor_number, 0), 8, '0'))
+        FROM forum_replies r
+        JOIN tree ON r.parent_id = tree.id
+    )
+    SELECT id, root_id, depth, path FROM tree
+) t ON t.id = f.id
+SET f.root_id = t.root_id, f.depth = t.depth, f.path = t.path;
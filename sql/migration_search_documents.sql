@@ -0,0 +1,18 @@
+-- 全文检索：博客、论坛帖子、作品展示的公开内容统一建立 ngram 分词的 FULLTEXT 索引
+-- 描述: 替代标题上的 LIKE '%关键词%' 查询；建表后调用 POST /api/v1/admin/search/reindex 初始化索引
+-- 注意: ngram 分词长度由 MySQL 参数 ngram_token_size 决定（默认2）
+
+CREATE TABLE search_documents (
+    id INT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    content_type VARCHAR(20) NOT NULL COMMENT '内容类型：blog/forum_post/showcase',
+    content_id INT UNSIGNED NOT NULL COMMENT '内容ID',
+    content_uuid CHAR(36) NOT NULL COMMENT '内容UUID',
+    author_id INT UNSIGNED NULL COMMENT '作者ID',
+    title VARCHAR(255) NOT NULL COMMENT '标题',
+    body MEDIUMTEXT NOT NULL COMMENT '去除标记后的正文',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_search_documents_content (content_type, content_id),
+    FULLTEXT KEY ft_search_documents_title (title) WITH PARSER ngram,
+    FULLTEXT KEY ft_search_documents_title_body (title, body) WITH PARSER ngram
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,11 @@
+-- 直接写入MySQL的点赞：Redis不可用时点赞改为直接写点赞表，同时在同一事务中记录到此表
+-- 描述: Redis恢复后由任一进程据此删除对应的点赞集合和待写回记录，进程重启或由其他进程处理时也不会遗漏
+
+CREATE TABLE stale_likes (
+    id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY COMMENT 'ID',
+    kind VARCHAR(32) NOT NULL COMMENT '点赞类型',
+    target_id INT UNSIGNED NOT NULL COMMENT '被点赞对象ID',
+    user_id INT UNSIGNED NOT NULL COMMENT '用户ID',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '写入时间',
+    KEY idx_stale_likes_kind_target (kind, target_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
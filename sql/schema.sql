@@ -201,6 +201,7 @@ CREATE TABLE forum_posts (
     is_deleted BOOLEAN NOT NULL DEFAULT FALSE,
     view_count INT UNSIGNED NOT NULL DEFAULT 0,
     reply_count INT UNSIGNED NOT NULL DEFAULT 0,
+    floor_seq INT UNSIGNED NOT NULL DEFAULT 0,
     last_reply_at TIMESTAMP NULL,
     last_reply_user_id INT UNSIGNED NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
@@ -232,6 +233,9 @@ CREATE TABLE forum_replies (
     reply_to_user_id INT UNSIGNED NULL,
     is_deleted BOOLEAN NOT NULL DEFAULT FALSE,
     floor_number INT UNSIGNED NULL,
+    root_id INT UNSIGNED NULL,
+    depth INT UNSIGNED NOT NULL DEFAULT 0,
+    path VARCHAR(255) NULL,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     deleted_at TIMESTAMP NULL,
@@ -248,5 +252,6 @@ CREATE INDEX idx_forum_replies_parent_id ON forum_replies(parent_id);
 CREATE INDEX idx_forum_replies_reply_to_user_id ON forum_replies(reply_to_user_id);
 CREATE INDEX idx_forum_replies_is_deleted ON forum_replies(is_deleted);
 CREATE INDEX idx_forum_replies_floor_number ON forum_replies(floor_number);
+CREATE INDEX idx_forum_replies_root_path ON forum_replies(root_id, path);
 CREATE INDEX idx_forum_replies_created_at ON forum_replies(created_at);
 CREATE INDEX idx_forum_replies_deleted_at ON forum_replies(deleted_at);